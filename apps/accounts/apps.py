@@ -5,3 +5,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
     verbose_name = 'Cuentas de Usuario'
+
+    def ready(self):
+        # Invalida el índice geográfico en memoria al editar países/ciudades
+        from . import signals  # noqa: F401
@@ -0,0 +1,205 @@
+"""
+Índice en memoria de países, departamentos y ciudades.
+
+Los datos geográficos casi nunca cambian, así que cada proceso los carga
+una sola vez (tres consultas) y responde los selects en cascada y la
+búsqueda de ciudades sin tocar la base de datos. La versión del índice vive
+en la caché compartida (``GEO_VERSION_KEY``): ``load_geo_data`` y las
+ediciones desde el admin la cambian y cada proceso recarga al notarlo.
+
+La búsqueda por prefijo (``search_cities``) usa arreglos ordenados por el
+nombre normalizado (minúsculas, sin tildes) y ``bisect``.
+"""
+import json
+import threading
+import unicodedata
+import uuid
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+
+from .models import City, Country, State
+
+GEO_VERSION_KEY = 'geo:version'
+DEFAULT_SEARCH_LIMIT = 20
+
+
+def normalize(text):
+    """Minúsculas y sin tildes, para comparar prefijos."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+@dataclass(frozen=True)
+class GeoCountry:
+    pk: int
+    name: str
+    iso2: str
+
+
+@dataclass
+class GeoIndex:
+    version: str
+    countries: tuple
+    countries_by_id: dict
+    states_by_country: dict
+    cities_by_state: dict
+    state_country: dict
+    state_names: dict
+    # Búsqueda: (claves normalizadas, filas) ordenadas por clave
+    search_all: tuple
+    search_by_country: dict
+    # JSON ya serializado por país/departamento (se llena al pedirse)
+    _payloads: dict = field(default_factory=dict)
+
+    def country_by_iso2(self, iso2):
+        iso2 = (iso2 or '').upper()
+        for country in self.countries:
+            if country.iso2 == iso2:
+                return country
+        return None
+
+    def states_json(self, country_id):
+        key = ('s', country_id)
+        payload = self._payloads.get(key)
+        if payload is None:
+            rows = self.states_by_country.get(country_id, ())
+            payload = self._payloads[key] = json.dumps(
+                [{'id': pk, 'name': name} for pk, name in rows],
+                ensure_ascii=False,
+            ).encode('utf-8')
+        return payload
+
+    def cities_json(self, state_id):
+        key = ('c', state_id)
+        payload = self._payloads.get(key)
+        if payload is None:
+            rows = self.cities_by_state.get(state_id, ())
+            payload = self._payloads[key] = json.dumps(
+                [{'id': pk, 'name': name} for pk, name in rows],
+                ensure_ascii=False,
+            ).encode('utf-8')
+        return payload
+
+
+def _build_search(rows):
+    rows.sort(key=lambda row: row[0])
+    return tuple(row[0] for row in rows), tuple(row[1:] for row in rows)
+
+
+def _load(version):
+    countries = tuple(
+        GeoCountry(pk, name, iso2)
+        for pk, name, iso2 in Country.objects.order_by('name').values_list('pk', 'name', 'iso2')
+    )
+    states_by_country = {}
+    state_country = {}
+    state_names = {}
+    for pk, name, country_id in State.objects.order_by('name').values_list(
+        'pk', 'name', 'country_id'
+    ):
+        states_by_country.setdefault(country_id, []).append((pk, name))
+        state_country[pk] = country_id
+        state_names[pk] = name
+
+    cities_by_state = {}
+    search_rows = []
+    country_rows = {}
+    for pk, name, state_id in City.objects.order_by('name').values_list(
+        'pk', 'name', 'state_id'
+    ):
+        cities_by_state.setdefault(state_id, []).append((pk, name))
+        row = (normalize(name), pk, name, state_id)
+        search_rows.append(row)
+        country_rows.setdefault(state_country.get(state_id), []).append(row)
+
+    return GeoIndex(
+        version=version,
+        countries=countries,
+        countries_by_id={c.pk: c for c in countries},
+        states_by_country={k: tuple(v) for k, v in states_by_country.items()},
+        cities_by_state={k: tuple(v) for k, v in cities_by_state.items()},
+        state_country=state_country,
+        state_names=state_names,
+        search_all=_build_search(search_rows),
+        search_by_country={k: _build_search(v) for k, v in country_rows.items()},
+    )
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(GEO_VERSION_KEY)
+    if version is None:
+        cache.add(GEO_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(GEO_VERSION_KEY, '')
+    return version
+
+
+def get_index():
+    """Índice geográfico vigente del proceso."""
+    global _index
+    version = _current_version()
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            index = _index
+            if index is None or index.version != version:
+                index = _index = _load(version)
+    return index
+
+
+def invalidate_geo_index():
+    """Obliga a todos los procesos a recargar el índice."""
+    global _index
+    cache.set(GEO_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _index = None
+
+
+def search_cities(query, country_id=None, state_id=None, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Ciudades cuyo nombre empieza por ``query`` (sin distinguir tildes ni
+    mayúsculas), opcionalmente dentro de un país o departamento.
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    index = get_index()
+    if state_id is not None:
+        country_id = index.state_country.get(state_id)
+    if country_id is not None:
+        keys, rows = index.search_by_country.get(country_id, ((), ()))
+    else:
+        keys, rows = index.search_all
+
+    results = []
+    i = bisect_left(keys, prefix)
+    while i < len(keys) and keys[i].startswith(prefix) and len(results) < limit:
+        pk, name, city_state = rows[i]
+        if state_id is None or city_state == state_id:
+            results.append({
+                'id': pk,
+                'name': name,
+                'state_id': city_state,
+                'state': index.state_names.get(city_state, ''),
+            })
+        i += 1
+    return results
+
+
+def country_choices(empty_label=None):
+    choices = [(c.pk, c.name) for c in get_index().countries]
+    return [('', empty_label)] + choices if empty_label else choices
+
+
+def state_choices(country_id, empty_label=None):
+    rows = get_index().states_by_country.get(country_id, ())
+    return [('', empty_label or '---------')] + list(rows)
+
+
+def city_choices(state_id, empty_label=None):
+    rows = get_index().cities_by_state.get(state_id, ())
+    return [('', empty_label or '---------')] + list(rows)
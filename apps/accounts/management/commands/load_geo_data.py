@@ -1,9 +1,76 @@
 import json
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.accounts.geo import invalidate_geo_index
 from apps.accounts.models import Country, State, City
 
 
-AMERICAS_COUNTRIES = None  # Will load all from "Americas" region
+DEFAULT_REGION = 'Americas'
+READ_SIZE = 1 << 20  # 1 MB
+
+
+def iter_json_array(fp, read_size=READ_SIZE):
+    """
+    Recorre un arreglo JSON de nivel superior elemento por elemento.
+
+    Solo se mantiene en memoria el elemento actual (un país con sus
+    departamentos y ciudades), no el archivo completo. Cuando un elemento no
+    cabe en el búfer se duplica la lectura, así el costo sigue siendo lineal.
+    Los elementos deben ir separados por exactamente una coma.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+
+    def peek():
+        # Primer carácter no blanco desde pos ('' al final del archivo)
+        nonlocal buf, pos, eof
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            buf, pos = fp.read(read_size), 0
+            eof = not buf
+
+    if peek() != '[':
+        raise ValueError('Se esperaba un arreglo JSON')
+    pos += 1
+    first = True
+    while True:
+        char = peek()
+        if not char:
+            raise ValueError('Arreglo JSON incompleto')
+        if first and char == ']':
+            return
+        if char in ',]':
+            raise ValueError(f'Se esperaba un elemento en la posición {pos}')
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        if end is None or (end == len(buf) and not eof):
+            # El elemento (o un número cortado) puede seguir en la próxima lectura
+            chunk = fp.read(max(read_size, len(buf) - pos))
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        char = peek()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(
+                'Arreglo JSON incompleto' if not char
+                else f'Se esperaba "," o "]" en la posición {pos}'
+            )
+        pos += 1
+        first = False
 
 
 class Command(BaseCommand):
@@ -20,24 +87,76 @@ class Command(BaseCommand):
             ),
             help='Path to the JSON file',
         )
+        parser.add_argument(
+            '--region',
+            type=str,
+            default=DEFAULT_REGION,
+            help=f'Region to load (default: {DEFAULT_REGION})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows per INSERT (default: 2000)',
+        )
         parser.add_argument(
             '--clear',
             action='store_true',
             help='Clear existing geo data before loading',
         )
 
-    def handle(self, *args, **options):
-        file_path = options['file']
+    def _load_country(self, c_data, batch_size):
+        """Upsert de un país con sus departamentos y ciudades."""
+        Country.objects.bulk_create(
+            [Country(
+                iso2=c_data['iso2'],
+                name=c_data['name'],
+                iso3=c_data.get('iso3') or '',
+                phone_code=str(c_data.get('phonecode') or '')[:10],
+            )],
+            update_conflicts=True,
+            unique_fields=['iso2'],
+            update_fields=['name', 'iso3', 'phone_code'],
+        )
+        country_id = Country.objects.values_list('pk', flat=True).get(
+            iso2=c_data['iso2']
+        )
 
-        self.stdout.write(f'Reading {file_path}...')
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        states = {}
+        for s_data in c_data.get('states') or []:
+            states[s_data['name']] = State(
+                country_id=country_id,
+                name=s_data['name'],
+                iso2=s_data.get('iso2') or '',
+            )
+        State.objects.bulk_create(
+            list(states.values()),
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['country', 'name'],
+            update_fields=['iso2'],
+        )
+        state_ids = dict(
+            State.objects.filter(country_id=country_id).values_list('name', 'pk')
+        )
 
-        # Filter Americas
-        americas = [c for c in data if c.get('region') == 'Americas']
-        self.stdout.write(
-            f'Found {len(americas)} countries in the Americas'
+        # City solo tiene la clave natural: no hay columnas que actualizar
+        cities = {}
+        for s_data in c_data.get('states') or []:
+            state_id = state_ids[s_data['name']]
+            for ci_data in s_data.get('cities') or []:
+                key = (state_id, ci_data['name'])
+                if key not in cities:
+                    cities[key] = City(state_id=state_id, name=ci_data['name'])
+        City.objects.bulk_create(
+            list(cities.values()), batch_size=batch_size, ignore_conflicts=True,
         )
+        return len(states), len(cities)
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        region = options['region']
+        batch_size = max(1, options['batch_size'])
 
         if options['clear']:
             self.stdout.write('Clearing existing geo data...')
@@ -45,49 +164,35 @@ class Command(BaseCommand):
             State.objects.all().delete()
             Country.objects.all().delete()
 
-        total_states = 0
-        total_cities = 0
+        self.stdout.write(f'Streaming {file_path} (region: {region})...')
+        start = time.perf_counter()
+        total_countries = total_states = total_cities = 0
+        try:
+            with open(file_path, 'r', encoding='utf-8-sig') as f:
+                for c_data in iter_json_array(f):
+                    if c_data.get('region') != region:
+                        continue
+                    with transaction.atomic():
+                        n_states, n_cities = self._load_country(c_data, batch_size)
+                    total_countries += 1
+                    total_states += n_states
+                    total_cities += n_cities
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'  {c_data["name"]} ({c_data["iso2"]}): '
+                        f'{n_states} states, {n_cities} cities | '
+                        f'{total_cities} cities in {elapsed:.1f}s '
+                        f'({total_cities / max(elapsed, 1e-6):.0f}/s)'
+                    )
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read {file_path}: {exc}')
 
-        for c_data in americas:
-            country, _ = Country.objects.update_or_create(
-                iso2=c_data['iso2'],
-                defaults={
-                    'name': c_data['name'],
-                    'iso3': c_data.get('iso3', ''),
-                    'phone_code': str(c_data.get('phonecode', '')),
-                },
-            )
-
-            for s_data in c_data.get('states', []):
-                state, _ = State.objects.update_or_create(
-                    country=country,
-                    name=s_data['name'],
-                    defaults={
-                        'iso2': s_data.get('iso2', ''),
-                    },
-                )
-                total_states += 1
-
-                cities_bulk = []
-                existing = set(
-                    City.objects.filter(state=state)
-                    .values_list('name', flat=True)
-                )
-                for ci_data in s_data.get('cities', []):
-                    if ci_data['name'] not in existing:
-                        cities_bulk.append(
-                            City(state=state, name=ci_data['name'])
-                        )
-                if cities_bulk:
-                    City.objects.bulk_create(cities_bulk, batch_size=500)
-                total_cities += len(s_data.get('cities', []))
-
-            self.stdout.write(
-                f'  {country.name} ({country.iso2}): '
-                f'{len(c_data.get("states", []))} states'
-            )
+        # bulk_create no dispara señales: recargar el índice en memoria
+        invalidate_geo_index()
 
+        elapsed = time.perf_counter() - start
         self.stdout.write(self.style.SUCCESS(
-            f'\nDone! {len(americas)} countries, '
-            f'{total_states} states, {total_cities} cities loaded.'
+            f'\nDone! {total_countries} countries, '
+            f'{total_states} states, {total_cities} cities loaded '
+            f'in {elapsed:.1f}s.'
         ))
@@ -0,0 +1,57 @@
+# Generated manually
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Une filas repetidas antes de crear las restricciones únicas: el cargador
+    anterior podía insertar dos veces la misma ciudad. Se conserva el id más
+    bajo y las direcciones se reasignan a él.
+    """
+    State = apps.get_model('accounts', 'State')
+    City = apps.get_model('accounts', 'City')
+    UserAddress = apps.get_model('accounts', 'UserAddress')
+
+    dup_states = (
+        State.objects.values('country_id', 'name')
+        .annotate(keep=Min('pk'), n=Count('pk')).filter(n__gt=1)
+    )
+    for row in dup_states:
+        others = State.objects.filter(
+            country_id=row['country_id'], name=row['name'],
+        ).exclude(pk=row['keep'])
+        City.objects.filter(state__in=others).update(state_id=row['keep'])
+        UserAddress.objects.filter(state__in=others).update(state_id=row['keep'])
+        others.delete()
+
+    dup_cities = (
+        City.objects.values('state_id', 'name')
+        .annotate(keep=Min('pk'), n=Count('pk')).filter(n__gt=1)
+    )
+    for row in dup_cities:
+        others = City.objects.filter(
+            state_id=row['state_id'], name=row['name'],
+        ).exclude(pk=row['keep'])
+        UserAddress.objects.filter(city__in=others).update(city_id=row['keep'])
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_geo_models'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(fields=('state', 'name'), name='city_state_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='state',
+            constraint=models.UniqueConstraint(fields=('country', 'name'), name='state_country_name_uniq'),
+        ),
+    ]
@@ -1,8 +1,24 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
 
+class UserManager(BaseUserManager):
+
+    def with_email(self, email):
+        """
+        Usuarios con ``email`` sin distinguir mayúsculas.
+
+        Compara contra ``LOWER(email)`` para usar el índice funcional
+        ``user_email_lower_idx``; ``email__iexact`` no puede usarlo.
+        """
+        return self.alias(email_lower=Lower('email')).filter(
+            email_lower=(email or '').strip().lower()
+        )
+
+
 class User(AbstractUser):
     """Modelo de usuario extendido"""
     
@@ -42,10 +58,15 @@ class User(AbstractUser):
         auto_now=True,
         verbose_name="Fecha de actualización"
     )
+
+    objects = UserManager()
     
     class Meta:
         verbose_name = "Usuario"
         verbose_name_plural = "Usuarios"
+        indexes = [
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
         permissions = [
             ('can_view_dashboard', 'Puede ver el dashboard'),
             ('can_manage_quotes', 'Puede gestionar cotizaciones'),
@@ -153,6 +174,11 @@ class State(models.Model):
         verbose_name = "Departamento"
         verbose_name_plural = "Departamentos"
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['country', 'name'], name='state_country_name_uniq',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -170,6 +196,11 @@ class City(models.Model):
         verbose_name = "Ciudad"
         verbose_name_plural = "Ciudades"
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['state', 'name'], name='city_state_name_uniq',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .geo import invalidate_geo_index
+from .models import City, Country, State
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=City)
+def _invalidate_geo_index(sender, **kwargs):
+    invalidate_geo_index()
+    transaction.on_commit(invalidate_geo_index)
@@ -0,0 +1,51 @@
+"""
+Utilidades para vistas async que esperan I/O externo (Wompi, cPanel, SMTP).
+
+Las llamadas bloqueantes se ejecutan en un pool de hilos propio con
+concurrencia acotada (``ASYNC_IO_MAX_WORKERS``), separado del hilo donde
+``sync_to_async`` ejecuta el ORM. Así un worker ASGI atiende muchas
+peticiones que esperan al proveedor sin bloquear el event loop.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+DEFAULT_MAX_WORKERS = 20
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(getattr(settings, "ASYNC_IO_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, workers),
+                    thread_name_prefix="async-io",
+                )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    # Algunas llamadas (p. ej. envío de correo) leen configuración de la BD:
+    # las conexiones abiertas en el pool se cierran como al final de un request.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_io(func, *args, **kwargs):
+    """Ejecuta ``func`` (bloqueante) en el pool de I/O y espera su resultado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(_call, func, args, kwargs)
+    )
@@ -1,14 +1,18 @@
 import logging
 from django.contrib.auth.views import LoginView
 from django.http import HttpResponseForbidden
+from django.utils.decorators import method_decorator
+
+from .ratelimit import get_client_ip, rate_limit
 
 logger = logging.getLogger('security')
 
 
+@method_decorator(rate_limit('login'), name='dispatch')
 class SecureLoginView(LoginView):
     """
-    Login view with honeypot anti-bot protection and
-    security logging.
+    Login view with honeypot anti-bot protection, per-IP rate
+    limiting and security logging.
     """
     template_name = 'registration/login.html'
     redirect_authenticated_user = True
@@ -35,7 +39,4 @@ class SecureLoginView(LoginView):
         return super().form_invalid(form)
 
     def _get_client_ip(self, request):
-        xff = request.META.get('HTTP_X_FORWARDED_FOR')
-        if xff:
-            return xff.split(',')[0].strip()
-        return request.META.get('REMOTE_ADDR', 'unknown')
+        return get_client_ip(request)
@@ -13,19 +13,14 @@ class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None:
             return None
-        # Treat the username field as email
-        email = username.strip().lower()
-        try:
-            user = User.objects.get(email__iexact=email)
-        except User.DoesNotExist:
+        # Treat the username field as email. The lookup uses the LOWER(email)
+        # index; duplicates resolve to the oldest account.
+        user = User.objects.with_email(username).order_by('id').first()
+        if user is None:
             # Run the default password hasher to prevent timing attacks
             User().set_password(password)
             return None
-        except User.MultipleObjectsReturned:
-            user = User.objects.filter(
-                email__iexact=email
-            ).order_by('id').first()
 
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
@@ -0,0 +1,271 @@
+"""
+Pool de CAPTCHAs pre-generados para los formularios públicos.
+
+``django-simple-captcha`` escribe una fila de ``CaptchaStore`` cada vez que
+se muestra un formulario y dibuja la imagen con PIL en cada petición de la
+imagen. Aquí los retos se dibujan por adelantado, en lotes, y se guardan en
+la caché compartida como ``(clave, hash de la respuesta, png)``:
+
+* ``take()`` entrega uno con un ``cache.incr`` sobre la cabeza del pool
+  (O(1), sin consultas ni PIL) y lo registra como emitido durante
+  ``CAPTCHA_TIMEOUT`` minutos. Si el pool está vacío se dibuja uno en línea
+  (cuenta como fallo en ``pool_metrics()``).
+* La respuesta se guarda como HMAC (``salted_hmac``), nunca en claro, y cada
+  clave admite un solo intento.
+* Cuando el pool baja de ``CAPTCHA_POOL_LOW_WATER`` se rellena en un hilo
+  de fondo hasta ``CAPTCHA_POOL_SIZE``; ``fill_captcha_pool`` hace lo mismo
+  desde cron o al desplegar.
+
+Los retos del pool no crean filas en ``CaptchaStore``. Las que quedan (el
+endpoint ``captcha-refresh`` de la librería, versiones anteriores) se borran
+en lotes con ``sweep_captchas``.
+
+Con una caché local por proceso (LocMem) cada worker tiene su propio pool;
+en producción se espera Redis o Memcached, igual que ``ratelimit``.
+"""
+import logging
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from captcha.conf import settings as captcha_settings
+from captcha.fields import CaptchaField, CaptchaTextInput
+from captcha.models import CaptchaStore
+from captcha.views import captcha_image
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections
+from django.forms import MultiValueField
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+logger = logging.getLogger(__name__)
+
+HEAD_KEY = 'captcha:pool:head'
+TAIL_KEY = 'captcha:pool:tail'
+SLOT_KEY = 'captcha:pool:slot:{}'
+ISSUED_KEY = 'captcha:issued:{}'
+SERVED_KEY = 'captcha:pool:served'
+MISSES_KEY = 'captcha:pool:misses'
+FILL_LOCK_KEY = 'captcha:pool:filling'
+FILL_LOCK_TIMEOUT = 300
+
+DEFAULT_POOL_SIZE = 500
+FILL_BATCH_SIZE = 50
+
+
+def pool_target():
+    return int(getattr(settings, 'CAPTCHA_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+
+def _low_water():
+    return int(getattr(settings, 'CAPTCHA_POOL_LOW_WATER', pool_target() // 4))
+
+
+def _counter(key, delta=1):
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # La clave fue desalojada entre add() e incr()
+        cache.set(key, delta, None)
+        return delta
+
+
+def _answer_hash(response):
+    return salted_hmac(__name__, response.strip().lower()).hexdigest()
+
+
+def render_challenges(count):
+    """``[(clave, hash de la respuesta, png), ...]`` con ``count`` retos nuevos."""
+    # El dibujo es el de captcha.views.captcha_image, que lee el reto de
+    # CaptchaStore: las filas nacen vencidas y se borran al terminar.
+    expired = timezone.now()
+    rows = CaptchaStore.objects.bulk_create([
+        CaptchaStore(
+            challenge=challenge, response=response.lower(),
+            hashkey=secrets.token_hex(20), expiration=expired,
+        )
+        for challenge, response in (captcha_settings.get_challenge()() for _ in range(count))
+    ])
+    try:
+        return [
+            (row.hashkey, _answer_hash(row.response), captcha_image(None, row.hashkey).content)
+            for row in rows
+        ]
+    finally:
+        CaptchaStore.objects.filter(hashkey__in=[row.hashkey for row in rows]).delete()
+
+
+def pool_size():
+    values = cache.get_many([HEAD_KEY, TAIL_KEY])
+    return max(0, values.get(TAIL_KEY, 0) - values.get(HEAD_KEY, 0))
+
+
+def pool_metrics():
+    """Tamaño actual del pool y retos entregados desde él o dibujados en línea."""
+    values = cache.get_many([SERVED_KEY, MISSES_KEY])
+    return {
+        'size': pool_size(),
+        'target': pool_target(),
+        'served': values.get(SERVED_KEY, 0),
+        'misses': values.get(MISSES_KEY, 0),
+    }
+
+
+def reset_pool_metrics():
+    cache.delete_many([SERVED_KEY, MISSES_KEY])
+
+
+def fill(target=None, batch_size=FILL_BATCH_SIZE):
+    """
+    Completa el pool hasta ``target`` (``CAPTCHA_POOL_SIZE`` por defecto).
+
+    Retorna cuántos retos agregó; 0 si otro proceso ya lo está llenando.
+    """
+    target = pool_target() if target is None else target
+    if not cache.add(FILL_LOCK_KEY, 1, FILL_LOCK_TIMEOUT):
+        return 0
+    added = 0
+    try:
+        while True:
+            values = cache.get_many([HEAD_KEY, TAIL_KEY])
+            head, tail = values.get(HEAD_KEY, 0), values.get(TAIL_KEY, 0)
+            if tail < head:
+                # Entregas con el pool vacío dejaron la cabeza adelante
+                cache.set(TAIL_KEY, head, None)
+                tail = head
+            missing = target - (tail - head)
+            if missing <= 0:
+                return added
+            entries = render_challenges(min(batch_size, missing))
+            # Primero los slots y luego la cola: take() nunca ve un slot vacío
+            cache.set_many(
+                {SLOT_KEY.format(tail + i): entry for i, entry in enumerate(entries, 1)}, None,
+            )
+            _counter(TAIL_KEY, len(entries))
+            added += len(entries)
+    finally:
+        cache.delete(FILL_LOCK_KEY)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='captcha-pool')
+    return _executor
+
+
+def _fill_in_background():
+    close_old_connections()
+    try:
+        fill()
+    except Exception:
+        logger.exception('No se pudo rellenar el pool de CAPTCHAs')
+    finally:
+        close_old_connections()
+
+
+def take():
+    """Entrega la clave de un CAPTCHA listo para mostrarse."""
+    slot = SLOT_KEY.format(_counter(HEAD_KEY))
+    entry = cache.get(slot)
+    if entry is None:
+        _counter(MISSES_KEY)
+        entry = render_challenges(1)[0]
+    else:
+        cache.delete(slot)
+        _counter(SERVED_KEY)
+
+    key, answer, png = entry
+    cache.set(ISSUED_KEY.format(key), (answer, png), int(captcha_settings.CAPTCHA_TIMEOUT) * 60)
+    if getattr(settings, 'CAPTCHA_POOL_AUTOFILL', True) and pool_size() < _low_water():
+        _get_executor().submit(_fill_in_background)
+    return key
+
+
+def new_challenge():
+    """Clave e imagen de un CAPTCHA nuevo, para formularios AJAX que reintentan."""
+    key = take()
+    return {'key': key, 'image_url': reverse('captcha-pool-image', kwargs={'key': key})}
+
+
+def check(key, response):
+    """True si ``response`` resuelve el CAPTCHA ``key``; la clave queda consumida."""
+    issued = ISSUED_KEY.format(key)
+    entry = cache.get(issued) if key else None
+    if entry is None:
+        return False
+    cache.delete(issued)
+    return constant_time_compare(entry[0], _answer_hash(response))
+
+
+def discard(key):
+    if key:
+        cache.delete(ISSUED_KEY.format(key))
+
+
+def sweep_expired(batch_size=5000):
+    """Borra en lotes las filas vencidas de ``CaptchaStore``. Retorna cuántas."""
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            CaptchaStore.objects.filter(expiration__lte=now)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += CaptchaStore.objects.filter(pk__in=ids).delete()[0]
+
+
+def captcha_image_view(request, key):
+    """PNG de un CAPTCHA emitido por ``take()``."""
+    entry = cache.get(ISSUED_KEY.format(key))
+    if entry is None:
+        # Como la librería: 410 para que los crawlers no indexen claves vencidas
+        return HttpResponse(status=410)
+    response = HttpResponse(entry[1], content_type='image/png')
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+class PooledCaptchaTextInput(CaptchaTextInput):
+    def fetch_captcha_store(self, name, value, attrs=None, generator=None):
+        self._key = take()
+        self._value = [self._key, '']
+        self.id_ = self.build_attrs(attrs).get('id', None)
+
+    def image_url(self):
+        return reverse('captcha-pool-image', kwargs={'key': self._key})
+
+    def audio_url(self):
+        return None
+
+
+class PooledCaptchaField(CaptchaField):
+    """``CaptchaField`` que entrega retos del pool y los valida contra la caché."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', PooledCaptchaTextInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, value):
+        MultiValueField.clean(self, value)
+        response, value[1] = (value[1] or '').strip().lower(), ''
+        if captcha_settings.CAPTCHA_TEST_MODE and response == 'passed':
+            discard(value[0])
+        elif not self.required and not response:
+            pass
+        elif not check(value[0], response):
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
+        return value
@@ -0,0 +1,72 @@
+"""
+Respuestas condicionales (ETag / Last-Modified) para páginas públicas.
+
+``@conditional_page(state_func)`` llama a ``state_func(request, *args,
+**kwargs)``, que resume con una sola consulta de agregación (``Max``/
+``Count``) los datos que muestra la página. Con ese resumen se arman los
+validadores: ``Last-Modified`` es la fecha más reciente y el ETag un hash del
+resumen completo (así un borrado también lo cambia). Si el navegador ya tiene
+esa versión se responde 304 sin ejecutar la vista ni renderizar la plantilla.
+
+``state_func`` retorna None para omitir los validadores (p. ej. cuando el
+objeto no existe y la vista debe responder 404). Solo aplica a visitantes
+anónimos: las páginas de usuarios autenticados dependen de la sesión.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def latest_subquery(model):
+    """``updated_at`` más reciente de ``model``, para usar dentro de ``Max()``."""
+    return Subquery(model.objects.order_by('-updated_at').values('updated_at')[:1])
+
+
+def _validators(state):
+    parts = [getattr(settings, 'ETAG_SALT', '')]
+    parts += [f'{key}={state[key]!r}' for key in sorted(state)]
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+
+    dates = [v for v in state.values() if isinstance(v, datetime)]
+    last_modified = None
+    if dates:
+        last_modified = int(max(dates).timestamp())
+    return etag, last_modified
+
+
+def conditional_page(state_func):
+    """Agrega ETag/Last-Modified y responde 304 cuando la página no cambió."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            user = getattr(request, 'user', None)
+            if request.method not in ('GET', 'HEAD') or (user and user.is_authenticated):
+                return view(request, *args, **kwargs)
+
+            state = state_func(request, *args, **kwargs)
+            if not state:
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = _validators(state)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified,
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            if not response.has_header('ETag'):
+                response['ETag'] = etag
+            if last_modified and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
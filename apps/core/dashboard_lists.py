@@ -0,0 +1,59 @@
+"""
+Filas ya armadas para ``core/dashboard_list.html``.
+
+Las listas genéricas del dashboard declaran ``columns = [(campo,
+etiqueta), ...]``. En vez de pasar objetos del ORM y resolver cada celda en
+la plantilla (un filtro y un ``getattr`` por fila × columna), ``list_rows``
+trae solo esas columnas con ``values_list`` y entrega por fila la URL de
+detalle y las celdas como ``(clase css, texto)``. La plantilla solo las
+imprime.
+"""
+from django.shortcuts import render
+from django.urls import reverse
+
+_URL_SENTINEL = 987654321
+
+NAME_CLASS = 'text-white font-semibold'
+TEXT_CLASS = 'text-gray-300'
+BADGE = 'inline-flex items-center px-2 py-0.5 rounded-md text-xs font-bold '
+ACTIVE_CELL = (BADGE + 'bg-green-500/10 text-green-400', 'Activo')
+INACTIVE_CELL = (BADGE + 'bg-gray-700/50 text-gray-400', 'Inactivo')
+
+
+def _url_builder(url_name):
+    """``pk -> url`` resolviendo la ruta una sola vez."""
+    prefix, suffix = reverse(url_name, args=[_URL_SENTINEL]).split(str(_URL_SENTINEL))
+    return lambda pk: f'{prefix}{pk}{suffix}'
+
+
+def _cell_formatters(model, columns):
+    formatters = []
+    for field_name, _ in columns:
+        if field_name == 'is_active':
+            formatters.append(lambda v: ACTIVE_CELL if v else INACTIVE_CELL)
+            continue
+        css = NAME_CLASS if field_name == 'name' else TEXT_CLASS
+        choices = dict(model._meta.get_field(field_name).flatchoices)
+        if choices:
+            formatters.append(lambda v, c=choices, css=css: (css, c.get(v, v) or '-'))
+        else:
+            # Igual que ``|default:"-"``: valores vacíos (y 0) se muestran como "-"
+            formatters.append(lambda v, css=css: (css, v or '-'))
+    return formatters
+
+
+def list_rows(queryset, columns, detail_url):
+    """``[(url de detalle, ((clase, texto), ...)), ...]`` para ``queryset``."""
+    fields = [name for name, _ in columns]
+    url_for = _url_builder(detail_url)
+    formatters = _cell_formatters(queryset.model, columns)
+    return [
+        (url_for(pk), tuple(fmt(value) for fmt, value in zip(formatters, values)))
+        for pk, *values in queryset.values_list('pk', *fields)
+    ]
+
+
+def render_list(request, queryset, context):
+    """Renderiza ``core/dashboard_list.html`` con las filas de ``queryset``."""
+    rows = list_rows(queryset, context['columns'], context['detail_url'])
+    return render(request, 'core/dashboard_list.html', {**context, 'rows': rows})
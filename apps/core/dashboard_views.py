@@ -1,5 +1,7 @@
 """Vistas del dashboard - listados, detalle, crear, editar"""
 from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -29,6 +31,8 @@ from .forms import (
     EmailConfigForm,
     ClientEmailPasswordChangeForm,
 )
+from .async_io import run_io
+from .dashboard_lists import render_list
 from .models import HomeClientLogo, HomeTestimonial
 
 User = get_user_model()
@@ -66,8 +70,7 @@ def _get_next_number(prefix, model_class, number_field='number'):
 @dashboard_required
 def dashboard_clients(request):
     clients = Client.objects.all().order_by('name')
-    return render(request, 'core/dashboard_list.html', {
-        'object_list': clients,
+    return render_list(request, clients, {
         'title': 'Clientes',
         'create_url': 'core:dashboard_client_create',
         'detail_url': 'core:dashboard_client_detail',
@@ -1378,8 +1381,13 @@ def dashboard_emails(request):
 
 @login_required
 @dashboard_required
-def dashboard_email_password(request, pk):
-    """Asignar o cambiar contraseña de una cuenta de correo desde el dashboard."""
+def _dashboard_email_password(request, pk):
+    """
+    Parte sync de ``dashboard_email_password`` (ORM, formulario y render).
+
+    Si hay que sincronizar con cPanel retorna un dict con los datos en vez de
+    una respuesta; la vista async hace esa llamada fuera del hilo del ORM.
+    """
     account = get_object_or_404(
         ClientEmailAccount.objects.select_related('client_service__client', 'client_service__service'),
         pk=pk,
@@ -1395,39 +1403,12 @@ def dashboard_email_password(request, pk):
             account.save(update_fields=['password_encrypted'])
 
             if cfg.sync_enabled and cfg.cpanel_ready:
-                try:
-                    cpanel = CpanelAPI(
-                        host=cfg.host,
-                        username=cfg.username,
-                        api_token=cfg.api_token,
-                        use_https=cfg.use_https,
-                        port=cfg.port,
-                        timeout=cfg.timeout,
-                    )
-                    if had_password:
-                        cpanel.update_mailbox_password(
-                            email=account.email,
-                            new_password=new_password,
-                        )
-                        messages.success(
-                            request,
-                            f'Contraseña actualizada para {account.email}. Sincronizada con cPanel.',
-                        )
-                    else:
-                        cpanel.create_mailbox(
-                            email=account.email,
-                            password=new_password,
-                            quota_mb=cfg.mailbox_quota_mb,
-                        )
-                        messages.success(
-                            request,
-                            f'Contraseña asignada para {account.email}. Buzón creado en cPanel.',
-                        )
-                except CpanelAPIError as exc:
-                    messages.warning(
-                        request,
-                        f'Contraseña guardada, pero error en cPanel: {exc}',
-                    )
+                return {
+                    'cfg': cfg,
+                    'email': account.email,
+                    'password': new_password,
+                    'had_password': had_password,
+                }
             else:
                 messages.success(
                     request,
@@ -1443,6 +1424,56 @@ def dashboard_email_password(request, pk):
     })
 
 
+async def dashboard_email_password(request, pk):
+    """
+    Asignar o cambiar contraseña de una cuenta de correo desde el dashboard.
+
+    Vista async: la sincronización con cPanel se espera en el pool de I/O.
+    """
+    result = await sync_to_async(_dashboard_email_password)(request, pk)
+    if isinstance(result, HttpResponse):
+        return result
+
+    cfg = result['cfg']
+    email = result['email']
+    cpanel = CpanelAPI(
+        host=cfg.host,
+        username=cfg.username,
+        api_token=cfg.api_token,
+        use_https=cfg.use_https,
+        port=cfg.port,
+        timeout=cfg.timeout,
+    )
+    try:
+        if result['had_password']:
+            await run_io(
+                cpanel.update_mailbox_password,
+                email=email,
+                new_password=result['password'],
+            )
+            messages.success(
+                request,
+                f'Contraseña actualizada para {email}. Sincronizada con cPanel.',
+            )
+        else:
+            await run_io(
+                cpanel.create_mailbox,
+                email=email,
+                password=result['password'],
+                quota_mb=cfg.mailbox_quota_mb,
+            )
+            messages.success(
+                request,
+                f'Contraseña asignada para {email}. Buzón creado en cPanel.',
+            )
+    except CpanelAPIError as exc:
+        messages.warning(
+            request,
+            f'Contraseña guardada, pero error en cPanel: {exc}',
+        )
+    return redirect('core:dashboard_emails')
+
+
 # ============ CONFIGURACIÓN SMTP / ENVÍO DE CORREOS ============
 
 @login_required
@@ -1785,8 +1816,7 @@ def dashboard_order_edit(request, pk):
 @dashboard_required
 def dashboard_home_logos(request):
     logos = HomeClientLogo.objects.all().order_by('order', 'name')
-    return render(request, 'core/dashboard_list.html', {
-        'object_list': logos,
+    return render_list(request, logos, {
         'title': 'Logos (Home)',
         'create_url': 'core:dashboard_home_logo_create',
         'detail_url': 'core:dashboard_home_logo_edit',
@@ -1855,8 +1885,7 @@ def dashboard_home_logo_delete(request, pk):
 @dashboard_required
 def dashboard_home_testimonials(request):
     testimonials = HomeTestimonial.objects.all().order_by('order', '-created_at')
-    return render(request, 'core/dashboard_list.html', {
-        'object_list': testimonials,
+    return render_list(request, testimonials, {
         'title': 'Testimonios (Home)',
         'create_url': 'core:dashboard_home_testimonial_create',
         'detail_url': 'core:dashboard_home_testimonial_edit',
@@ -0,0 +1,167 @@
+"""
+Renderizado de correos con plantillas compiladas una sola vez por proceso.
+
+Las plantillas que extienden ``emails/base_email.html`` se separan en dos:
+
+- el "cascarón" del layout (cabecera, pie y CSS ya inlineado), que se
+  renderiza una vez por ``(site_name, año)`` y queda en memoria;
+- los bloques ``subject``, ``email_title`` y ``email_body`` de la plantilla
+  hija, que es lo único que se renderiza por mensaje.
+
+El texto plano se genera con ``<plantilla>.txt`` cuando existe; si no, se
+deriva solo del bloque ``email_body`` (nunca del HTML completo con CSS).
+"""
+import re
+from functools import lru_cache
+
+from django.template import Context, TemplateDoesNotExist
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+BASE_TEMPLATE = "emails/base_email.html"
+BLOCKS = ("subject", "email_title", "email_body")
+
+_MARKER = "\x00{}\x00"
+_STYLE_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_RULE_RE = re.compile(r"\.([\w-]+)\s*\{([^}]*)\}")
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_TAG_WITH_CLASS_RE = re.compile(r'<[a-zA-Z][^>]*\sclass="([^"]*)"[^>]*>')
+_STYLE_ATTR_RE = re.compile(r'\sstyle="([^"]*)"')
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+@lru_cache(maxsize=None)
+def _get_template(name):
+    """Plantilla compilada (o None si no existe), cacheada por proceso."""
+    try:
+        return get_template(name)
+    except TemplateDoesNotExist:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _child_blocks(name):
+    """Bloques de la plantilla si extiende el layout base; si no, None."""
+    tpl = _get_template(name)
+    if tpl is None:
+        return None
+    nodes = tpl.template.nodelist.get_nodes_by_type(ExtendsNode)
+    if not nodes or nodes[0].parent_name.var != BASE_TEMPLATE:
+        return None
+    return nodes[0].blocks
+
+
+def _class_styles(css):
+    """Mapa ``clase -> declaraciones`` para selectores simples ``.clase``."""
+    styles = {}
+    for name, decls in _RULE_RE.findall(_COMMENT_RE.sub("", css)):
+        decls = " ".join(decls.split()).strip().rstrip(";")
+        if decls:
+            styles[name] = f"{styles[name]}; {decls}" if name in styles else decls
+    return styles
+
+
+def inline_css(html, styles):
+    """Copia los estilos de cada clase al atributo ``style`` del elemento."""
+    if not styles:
+        return html
+
+    def _replace(match):
+        tag = match.group(0)
+        decls = [styles[c] for c in match.group(1).split() if c in styles]
+        if not decls:
+            return tag
+        inline = "; ".join(decls)
+        existing = _STYLE_ATTR_RE.search(tag)
+        if existing:
+            # El estilo propio del elemento va al final para que prevalezca
+            merged = f'{inline}; {existing.group(1)}'
+            return tag[:existing.start(1)] + merged + tag[existing.end(1):]
+        end = -2 if tag.endswith("/>") else -1
+        return f'{tag[:end]} style="{inline}"{tag[end:]}'
+
+    return _TAG_WITH_CLASS_RE.sub(_replace, html)
+
+
+@lru_cache(maxsize=32)
+def _shell(site_name, year):
+    """
+    Layout base renderizado e inlineado una vez, partido en 4 segmentos
+    alrededor de los bloques ``subject``, ``email_title`` y ``email_body``.
+    """
+    base = _get_template(BASE_TEMPLATE).template
+    source = "{% extends '" + BASE_TEMPLATE + "' %}" + "".join(
+        "{% block " + b + " %}" + _MARKER.format(b) + "{% endblock %}"
+        for b in BLOCKS
+    )
+    shell_tpl = base.engine.from_string(source)
+    html = shell_tpl.render(Context({"site_name": site_name}))
+
+    match = _STYLE_RE.search(html)
+    styles = _class_styles(match.group(1)) if match else {}
+    head_end = html.lower().find("</head>")
+    if head_end != -1:
+        html = html[:head_end] + inline_css(html[head_end:], styles)
+
+    parts = []
+    rest = html
+    for b in BLOCKS:
+        before, _sep, rest = rest.partition(_MARKER.format(b))
+        parts.append(before)
+    parts.append(rest)
+    return tuple(parts), styles
+
+
+def _text_from_html(html):
+    text = strip_tags(html)
+    lines = [line.strip() for line in text.splitlines()]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def render_email(template, context):
+    """
+    Renderiza ``template`` y retorna ``(html, texto_plano)``.
+
+    ``context`` debe incluir ``site_name`` (``send_html_email`` lo agrega).
+    """
+    ctx = dict(context or {})
+    text_tpl = _get_template(re.sub(r"\.html$", "", template) + ".txt")
+    blocks = _child_blocks(template)
+
+    if blocks is None:
+        html = _get_template(template).render(ctx)
+        text = text_tpl.render(ctx).strip() if text_tpl else _text_from_html(html)
+        return html, text
+
+    tpl = _get_template(template).template
+    site_name = ctx.get("site_name") or "Megadominio"
+    parts, styles = _shell(site_name, timezone.now().year)
+
+    c = Context(ctx, autoescape=tpl.engine.autoescape)
+    with c.bind_template(tpl):
+        rendered = {
+            b: blocks[b].nodelist.render(c) if b in blocks else ""
+            for b in BLOCKS
+        }
+    body = inline_css(rendered["email_body"], styles)
+    html = "".join((
+        parts[0], rendered["subject"],
+        parts[1], rendered["email_title"],
+        parts[2], body,
+        parts[3],
+    ))
+
+    if text_tpl is not None:
+        text = text_tpl.render(ctx).strip()
+    else:
+        text = _text_from_html(f"{rendered['email_title']}\n\n{rendered['email_body']}")
+    return html, text
+
+
+def clear_cache():
+    """Descarta plantillas y layout cacheados (útil en tests o tras editar plantillas)."""
+    _get_template.cache_clear()
+    _child_blocks.cache_clear()
+    _shell.cache_clear()
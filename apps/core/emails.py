@@ -1,10 +1,15 @@
+import logging
+from decimal import Decimal, InvalidOperation
 from typing import Iterable, Mapping, Optional
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
+from apps.core.email_rendering import render_email
+
+logger = logging.getLogger(__name__)
+
 
 def _get_default_from_email() -> str:
     """Remitente por defecto: EmailConfig si está configurado, sino settings."""
@@ -36,8 +41,7 @@ def send_html_email(
     if "brand_name" not in ctx:
         ctx["brand_name"] = ctx["site_name"]
 
-    html = render_to_string(template, ctx)
-    text = strip_tags(html)
+    html, text = render_email(template, ctx)
 
     msg = EmailMultiAlternatives(
         subject=subject,
@@ -107,6 +111,29 @@ def send_service_renewal_reminder(
     )
 
 
+def send_service_renewal_digest(
+    to: str,
+    *,
+    items: Iterable[Mapping],
+    client_name: Optional[str] = None,
+    manage_url: Optional[str] = None,
+    subject: Optional[str] = None,
+) -> int:
+    """Un solo correo con todos los servicios del cliente próximos a renovarse."""
+    items = list(items)
+    ctx = {
+        "items": items,
+        "client_name": client_name,
+        "manage_url": manage_url,
+    }
+    return send_html_email(
+        subject or f"Recordatorio: {len(items)} servicios próximos a renovarse",
+        "emails/service_renewal_digest.html",
+        ctx,
+        [to],
+    )
+
+
 def send_service_assigned_notification(
     to: str,
     *,
@@ -349,6 +376,40 @@ def admin_recipients() -> list[str]:
     return emails
 
 
+def _is_critical_admin_event(event_type: str, amount=None, critical: bool = False) -> bool:
+    """Eventos que no esperan al resumen: se envían de inmediato."""
+    if critical:
+        return True
+    critical_types = getattr(settings, "ADMIN_DIGEST_CRITICAL_TYPES", ("error",)) or ()
+    if event_type in critical_types:
+        return True
+    threshold = getattr(settings, "ADMIN_DIGEST_CRITICAL_AMOUNT", None)
+    if event_type == "payment_failed" and threshold is not None and amount is not None:
+        try:
+            return Decimal(str(amount)) >= Decimal(str(threshold))
+        except (InvalidOperation, ValueError):
+            return False
+    return False
+
+
+def _queue_admin_event(event_type, title, body, body_html, cta_url, cta_label) -> bool:
+    """Guarda el evento para el resumen. False si no se pudo (se envía directo)."""
+    from apps.core.models import AdminEvent
+
+    try:
+        AdminEvent.objects.create(
+            event_type=event_type or "other",
+            title=title[:255],
+            body=body or (strip_tags(body_html) if body_html else ""),
+            cta_url=(cta_url or "")[:500],
+            cta_label=(cta_label or "")[:100],
+        )
+    except Exception:
+        logger.exception("No se pudo encolar el evento para administradores")
+        return False
+    return True
+
+
 def send_admin_notification(
     title: str,
     *,
@@ -357,10 +418,28 @@ def send_admin_notification(
     cta_url: Optional[str] = None,
     cta_label: Optional[str] = None,
     subject: Optional[str] = None,
+    event_type: str = "other",
+    amount=None,
+    critical: bool = False,
 ) -> int:
+    """
+    Notifica a los administradores.
+
+    Con ``ADMIN_NOTIFICATION_DIGEST`` activo el evento se guarda en
+    ``AdminEvent`` y sale en el próximo resumen (``send_admin_digest``),
+    salvo que sea crítico: ``critical=True``, tipo incluido en
+    ``ADMIN_DIGEST_CRITICAL_TYPES`` o pago fallido con ``amount`` mayor o
+    igual a ``ADMIN_DIGEST_CRITICAL_AMOUNT``.
+    """
     recipients = admin_recipients()
     if not recipients:
         return 0
+    if (
+        getattr(settings, "ADMIN_NOTIFICATION_DIGEST", False)
+        and not _is_critical_admin_event(event_type, amount, critical)
+        and _queue_admin_event(event_type, title, body, body_html, cta_url, cta_label)
+    ):
+        return 0
     ctx = {
         "title": title,
         "body": body,
@@ -374,3 +453,84 @@ def send_admin_notification(
         ctx,
         recipients,
     )
+
+
+def send_admin_digest(*, max_events: int = 1000, per_type: int = 20, dry_run: bool = False) -> dict:
+    """
+    Envía en un solo correo los ``AdminEvent`` pendientes, agrupados por tipo
+    con su conteo y los enlaces de los más recientes (``per_type`` por grupo).
+
+    Los eventos se reclaman con un ``update()`` condicional antes de enviar,
+    así dos ejecuciones simultáneas no repiten eventos. Si el envío falla se
+    liberan para el siguiente ciclo. Retorna ``{'events', 'groups', 'sent'}``.
+    """
+    from django.utils import timezone
+
+    from apps.core.models import AdminEvent
+
+    stats = {"events": 0, "groups": 0, "sent": 0}
+    recipients = admin_recipients()
+    pending = AdminEvent.objects.filter(sent_at__isnull=True)
+    ids = list(pending.order_by("created_at", "pk").values_list("pk", flat=True)[:max_events])
+    if not ids or not recipients:
+        return stats
+
+    if dry_run:
+        events = list(AdminEvent.objects.filter(pk__in=ids))
+    else:
+        now = timezone.now()
+        AdminEvent.objects.filter(pk__in=ids, sent_at__isnull=True).update(sent_at=now)
+        events = list(AdminEvent.objects.filter(pk__in=ids, sent_at=now))
+    if not events:
+        return stats
+
+    site_url = (getattr(settings, "SITE_URL", "") or "").rstrip("/")
+    if site_url and not site_url.startswith(("http://", "https://")):
+        site_url = f"https://{site_url}"
+
+    def _item(ev):
+        url = ev.cta_url
+        if url.startswith("/") and site_url:
+            url = f"{site_url}{url}"
+        return {
+            "title": ev.title,
+            "created_at": ev.created_at,
+            "url": url,
+            "label": ev.cta_label or "Ver detalle",
+        }
+
+    labels = dict(AdminEvent.EVENT_TYPE_CHOICES)
+    groups = {}
+    for ev in events:
+        groups.setdefault(ev.event_type, []).append(ev)
+    ordered = sorted(groups.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+    group_ctx = [
+        {
+            "label": labels.get(event_type, event_type),
+            "count": len(items),
+            "items": [_item(ev) for ev in reversed(items[-per_type:])],
+            "hidden": max(0, len(items) - per_type),
+        }
+        for event_type, items in ordered
+    ]
+    stats["events"] = len(events)
+    stats["groups"] = len(group_ctx)
+    if dry_run:
+        return stats
+
+    try:
+        stats["sent"] = send_html_email(
+            f"Resumen de actividad: {len(events)} eventos",
+            "emails/admin_digest.html",
+            {
+                "groups": group_ctx,
+                "total": len(events),
+                "since": events[0].created_at,
+                "dashboard_url": f"{site_url}/dashboard/" if site_url else None,
+            },
+            recipients,
+        )
+    except Exception:
+        AdminEvent.objects.filter(pk__in=[ev.pk for ev in events]).update(sent_at=None)
+        raise
+    return stats
@@ -1,6 +1,9 @@
 from django import forms
 from django.forms import inlineformset_factory
 from django.contrib.auth import get_user_model
+from apps.accounts.geo import (
+    city_choices, country_choices, get_index as get_geo_index, state_choices,
+)
 from apps.accounts.models import Country, State, City, UserAddress
 from apps.clients.models import Client
 from apps.services.models import Service, ClientService, ClientEmailAccount, CpanelConfig, EmailConfig
@@ -10,7 +13,7 @@ from apps.store.models import ProductCategory, Product, Order, OrderItem
 from .models import HomeClientLogo, HomeTestimonial
 
 try:
-    from captcha.fields import CaptchaField
+    from .captcha_pool import PooledCaptchaField as CaptchaField
 except ImportError:
     CaptchaField = None
 
@@ -783,26 +786,32 @@ class SignupForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Las opciones salen del índice geográfico en memoria; los querysets
+        # solo se consultan al validar el valor enviado.
+        geo = get_geo_index()
         self.fields['country'].queryset = Country.objects.all()
+        self.fields['country'].choices = country_choices('---------')
         # Prefer posted data; otherwise set default to Colombia
         if 'country' in self.data:
             try:
                 cid = int(self.data.get('country') or 0)
                 self.fields['state'].queryset = State.objects.filter(country_id=cid)
+                self.fields['state'].choices = state_choices(cid)
             except (TypeError, ValueError):
                 self.fields['state'].queryset = State.objects.none()
         else:
-            try:
-                co = Country.objects.filter(iso2__iexact='CO').first() or Country.objects.filter(name__iexact='Colombia').first()
-                if co:
-                    self.fields['country'].initial = co.pk
-                    self.fields['state'].queryset = State.objects.filter(country=co)
-            except Exception:
-                pass
+            co = geo.country_by_iso2('CO') or next(
+                (c for c in geo.countries if c.name.lower() == 'colombia'), None
+            )
+            if co:
+                self.fields['country'].initial = co.pk
+                self.fields['state'].queryset = State.objects.filter(country_id=co.pk)
+                self.fields['state'].choices = state_choices(co.pk)
         if 'state' in self.data:
             try:
                 sid = int(self.data.get('state') or 0)
                 self.fields['city'].queryset = City.objects.filter(state_id=sid)
+                self.fields['city'].choices = city_choices(sid)
             except (TypeError, ValueError):
                 self.fields['city'].queryset = City.objects.none()
 
@@ -830,7 +839,7 @@ class SignupForm(forms.Form):
 
     def clean_email(self):
         email = self.cleaned_data['email'].lower().strip()
-        if User.objects.filter(email__iexact=email).exists():
+        if User.objects.with_email(email).exists():
             raise forms.ValidationError(
                 'Ya existe una cuenta con este correo electr\u00f3nico.'
             )
@@ -1053,9 +1062,8 @@ class UserAddressForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         from apps.accounts.models import Country, State, City
 
-        iso_map = dict(
-            Country.objects.values_list('pk', 'iso2')
-        )
+        geo = get_geo_index()
+        iso_map = {c.pk: c.iso2 for c in geo.countries}
 
         class CountrySelect(forms.Select):
             """Select that adds data-iso2 to each country option."""
@@ -1074,6 +1082,7 @@ class UserAddressForm(forms.ModelForm):
         )
         self.fields['country'].queryset = Country.objects.all()
         self.fields['country'].empty_label = '— Selecciona país —'
+        self.fields['country'].choices = country_choices('— Selecciona país —')
 
         self.fields['state'].widget = forms.Select(
             attrs={**self._sel, 'id': 'id_state'}
@@ -1085,36 +1094,37 @@ class UserAddressForm(forms.ModelForm):
         )
         self.fields['city'].empty_label = '— Selecciona ciudad —'
 
+        country_id = state_id = None
         if self.instance and self.instance.pk:
-            if self.instance.country_id:
-                self.fields['state'].queryset = State.objects.filter(
-                    country_id=self.instance.country_id
-                )
-            else:
-                self.fields['state'].queryset = State.objects.none()
-            if self.instance.state_id:
-                self.fields['city'].queryset = City.objects.filter(
-                    state_id=self.instance.state_id
-                )
-            else:
-                self.fields['city'].queryset = City.objects.none()
+            country_id = self.instance.country_id
+            state_id = self.instance.state_id
         elif self.data.get('country'):
             try:
-                cid = int(self.data.get('country'))
-                self.fields['state'].queryset = (
-                    State.objects.filter(country_id=cid)
-                )
+                country_id = int(self.data.get('country'))
             except (ValueError, TypeError):
-                self.fields['state'].queryset = State.objects.none()
+                pass
             try:
-                sid = int(self.data.get('state'))
-                self.fields['city'].queryset = (
-                    City.objects.filter(state_id=sid)
-                )
+                state_id = int(self.data.get('state'))
             except (ValueError, TypeError):
-                self.fields['city'].queryset = City.objects.none()
+                pass
+
+        if country_id:
+            self.fields['state'].queryset = State.objects.filter(
+                country_id=country_id
+            )
+            self.fields['state'].choices = state_choices(
+                country_id, '— Selecciona departamento —'
+            )
         else:
             self.fields['state'].queryset = State.objects.none()
+        if state_id:
+            self.fields['city'].queryset = City.objects.filter(
+                state_id=state_id
+            )
+            self.fields['city'].choices = city_choices(
+                state_id, '— Selecciona ciudad —'
+            )
+        else:
             self.fields['city'].queryset = City.objects.none()
 
 
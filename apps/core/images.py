@@ -0,0 +1,202 @@
+"""
+Derivados redimensionados (WebP + JPEG/PNG) de las imágenes subidas.
+
+Al guardar un modelo con imagen (ver ``IMAGE_FIELDS``) se encola, después
+del commit, la generación de versiones a anchos fijos en un pool de hilos
+propio (``IMAGE_WORKERS``); la petición no espera a Pillow. Los derivados se
+guardan junto al original con nombre predecible::
+
+    products/foto.jpg -> products/foto.w640.webp, products/foto.w640.jpg
+
+Las imágenes con transparencia conocida (PNG/GIF) usan PNG como formato de
+respaldo en vez de JPEG. Se aplica la orientación EXIF y se descartan los
+metadatos (EXIF, GPS, perfiles). No se amplía: si el original es más angosto
+que un ancho, ese derivado queda con el tamaño original.
+
+Las plantillas usan ``{% picture %}`` / ``{% srcset %}`` (``image_tags``).
+Mientras los derivados no existan se sirve solo el original; la marca de
+"listo" se guarda en caché para no consultar el storage en cada render.
+``generate_image_derivatives`` rellena las imágenes existentes.
+"""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_save
+
+logger = logging.getLogger(__name__)
+
+# label del modelo + campo -> anchos en px
+IMAGE_FIELDS = {
+    'store.product.image': (320, 640, 1280),
+    'core.homeclientlogo.image': (160, 320),
+    'core.hometestimonial.avatar': (48, 96),
+    'accounts.user.avatar': (48, 96),
+}
+
+ALPHA_EXTENSIONS = ('.png', '.gif')
+READY_KEY = 'images:ready:{}'
+NOT_READY_TIMEOUT = 60
+
+
+def field_widths(label):
+    return tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', {}).get(label, IMAGE_FIELDS[label]))
+
+
+def fallback_format(name):
+    return 'png' if os.path.splitext(name)[1].lower() in ALPHA_EXTENSIONS else 'jpeg'
+
+
+def derivative_name(name, width, fmt):
+    base = os.path.splitext(name)[0]
+    ext = {'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}[fmt]
+    return f'{base}.w{width}.{ext}'
+
+
+def _ready_key(name):
+    return READY_KEY.format(hashlib.md5(name.encode('utf-8')).hexdigest())
+
+
+def mark_ready(name):
+    cache.set(_ready_key(name), True, None)
+
+
+def _encode(image, fmt):
+    buf = BytesIO()
+    if fmt == 'webp':
+        image.save(buf, 'WEBP', quality=getattr(settings, 'IMAGE_WEBP_QUALITY', 80), method=4)
+    elif fmt == 'jpeg':
+        image.convert('RGB').save(
+            buf, 'JPEG', quality=getattr(settings, 'IMAGE_JPEG_QUALITY', 82),
+            optimize=True, progressive=True,
+        )
+    else:
+        image.save(buf, 'PNG', optimize=True)
+    return buf.getvalue()
+
+
+def generate_derivatives(storage, name, widths):
+    """
+    Crea los derivados de ``name`` en ``storage`` y lo marca como listo.
+    Retorna los nombres escritos.
+    """
+    from PIL import Image, ImageOps
+
+    with storage.open(name, 'rb') as fh:
+        with Image.open(fh) as source:
+            source = ImageOps.exif_transpose(source)
+            source.load()
+
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA' if 'transparency' in source.info or source.mode in ('LA', 'PA') else 'RGB')
+    fallback = fallback_format(name)
+
+    written = []
+    for width in sorted(set(widths)):
+        if source.width > width:
+            height = max(1, round(source.height * width / source.width))
+            resized = source.resize((width, height), Image.LANCZOS)
+        else:
+            resized = source.copy()
+        # Sin EXIF, XMP ni perfil ICC en los derivados
+        resized.info = {}
+        for fmt in ('webp', fallback):
+            target = derivative_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+            written.append(storage.save(target, ContentFile(_encode(resized, fmt))))
+
+    mark_ready(name)
+    return written
+
+
+def has_derivatives(file):
+    """True si los derivados de ``file`` (un FieldFile) ya existen."""
+    name = file.name
+    ready = cache.get(_ready_key(name))
+    if ready is None:
+        widths = field_widths(_label(file))
+        ready = file.storage.exists(derivative_name(name, widths[0], 'webp'))
+        cache.set(_ready_key(name), ready, None if ready else NOT_READY_TIMEOUT)
+    return ready
+
+
+def _label(file):
+    return f'{file.instance._meta.label_lower}.{file.field.name}'
+
+
+def srcset(file, fmt=None):
+    """Valor del atributo ``srcset`` de ``file`` ('' si aún no hay derivados)."""
+    if not file or not has_derivatives(file):
+        return ''
+    fmt = fmt or fallback_format(file.name)
+    storage = file.storage
+    return ', '.join(
+        f'{storage.url(derivative_name(file.name, width, fmt))} {width}w'
+        for width in field_widths(_label(file))
+    )
+
+
+# ---- Worker en segundo plano ----
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(getattr(settings, 'IMAGE_WORKERS', 2))),
+                    thread_name_prefix='images',
+                )
+    return _executor
+
+
+def _run(storage, name, widths, label):
+    try:
+        generate_derivatives(storage, name, widths)
+    except Exception:
+        logger.exception('No se pudieron generar los derivados de %s', name)
+        return
+    from .page_cache import PAGE_CACHE_MODELS, invalidate_pages
+    if label.rsplit('.', 1)[0] in PAGE_CACHE_MODELS:
+        # Las páginas cacheadas se renderizaron sin srcset
+        invalidate_pages()
+
+
+def schedule(file):
+    """Encola la generación de derivados de ``file`` después del commit."""
+    label = _label(file)
+    args = (file.storage, file.name, field_widths(label), label)
+    if getattr(settings, 'IMAGE_DERIVATIVES_SYNC', False):
+        transaction.on_commit(lambda: _run(*args))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run, *args))
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    prefix = f'{instance._meta.label_lower}.'
+    for label in IMAGE_FIELDS:
+        if not label.startswith(prefix):
+            continue
+        field_name = label[len(prefix):]
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        file = getattr(instance, field_name)
+        if file and not has_derivatives(file):
+            schedule(file)
+
+
+post_save.connect(_on_save, dispatch_uid='image_derivatives_on_save')
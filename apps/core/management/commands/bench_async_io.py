@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.core.async_io import run_io
+from apps.store.views import _verify_transaction
+from apps.store.wompi import get_client
+
+
+def _stub_server(delay):
+    """Servidor local que imita GET /transactions/<id> de Wompi con latencia fija."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            tx_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+            payload = json.dumps({
+                "data": {"id": tx_id, "status": "APPROVED", "payment_method_type": "CARD"},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara verificaciones de transacción por segundo contra un servidor "
+        "Wompi simulado y lento: un worker sync (una a la vez) vs. un solo "
+        "event loop con run_io (pool de I/O acotado)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=50,
+            help="Peticiones por escenario (por defecto: 50)",
+        )
+        parser.add_argument(
+            "--delay", type=float, default=0.2,
+            help="Latencia simulada del proveedor en segundos (por defecto: 0.2)",
+        )
+
+    def handle(self, *args, **opts):
+        n = max(1, opts["requests"])
+        server = _stub_server(max(0.0, opts["delay"]))
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        async def concurrent():
+            return await asyncio.gather(*(
+                run_io(_verify_transaction, f"tx-{i}") for i in range(n)
+            ))
+
+        get_client().reset_metrics()
+        try:
+            with override_settings(WOMPI_API_BASE=base):
+                start = time.perf_counter()
+                sync_ok = sum(1 for i in range(n) if _verify_transaction(f"tx-{i}"))
+                sync_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                async_ok = sum(1 for r in asyncio.run(concurrent()) if r)
+                async_time = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+        self.stdout.write(
+            f"sync:  {sync_ok}/{n} en {sync_time:.2f}s ({n / sync_time:,.1f} req/s)"
+        )
+        self.stdout.write(
+            f"async: {async_ok}/{n} en {async_time:.2f}s ({n / async_time:,.1f} req/s) "
+            f"x{sync_time / async_time:.1f}"
+        )
+        m = get_client().metrics().get("transactions")
+        if m:
+            self.stdout.write(
+                f"latencia Wompi: {m['calls']} llamadas, prom {m['avg_ms']:.1f} ms, "
+                f"máx {m['max_ms']:.1f} ms, errores {m['errors']}"
+            )
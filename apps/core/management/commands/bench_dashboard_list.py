@@ -0,0 +1,107 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import engines
+from django.template.loader import get_template
+
+from apps.clients.models import Client
+from apps.core.dashboard_lists import list_rows
+
+
+# Filas de la plantilla anterior de core/dashboard_list.html: objetos del ORM y un
+# getattr_filter por celda.
+LEGACY_ROWS = """{% load dashboard_tags %}
+{% for obj in object_list %}
+<tr class="hover:bg-gray-800/40 transition">
+    {% for field, _ in columns %}
+    <td class="px-5 py-3.5 text-sm">
+        {% if field == 'is_active' %}
+            {% if obj|getattr_filter:field %}
+                <span class="inline-flex items-center px-2 py-0.5 rounded-md text-xs font-bold bg-green-500/10 text-green-400">Activo</span>
+            {% else %}
+                <span class="inline-flex items-center px-2 py-0.5 rounded-md text-xs font-bold bg-gray-700/50 text-gray-400">Inactivo</span>
+            {% endif %}
+        {% elif field == 'billing_type' %}
+            <span class="text-gray-300">{{ obj.get_billing_type_display|default:"-" }}</span>
+        {% elif field == 'name' %}
+            <span class="text-white font-semibold">{{ obj|getattr_filter:field|default:"-" }}</span>
+        {% else %}
+            <span class="text-gray-300">{{ obj|getattr_filter:field|default:"-" }}</span>
+        {% endif %}
+    </td>
+    {% endfor %}
+    <td class="px-5 py-3.5 text-right">
+        <a href="{% url detail_url obj.pk %}" class="inline-flex items-center gap-1.5 px-3 py-1.5 text-xs font-semibold text-red-400 bg-red-500/10 rounded-lg hover:bg-red-500/20 transition">
+            <i class="fas fa-eye"></i> Ver
+        </a>
+    </td>
+</tr>
+{% endfor %}"""
+
+COLUMNS = [
+    ("name", "Nombre"),
+    ("email", "Email"),
+    ("phone", "Teléfono"),
+    ("company", "Empresa"),
+]
+DETAIL_URL = "core:dashboard_client_detail"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el render de las filas de la lista genérica del dashboard "
+        "(clientes): objetos + getattr_filter vs. filas armadas con values_list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+            help="Cantidades de filas a medir (por defecto: 1000 10000 50000)",
+        )
+
+    def _time(self, fn):
+        start = time.perf_counter()
+        html = fn()
+        return (time.perf_counter() - start) * 1000, len(html)
+
+    def handle(self, *args, **opts):
+        sizes = sorted(max(1, n) for n in opts["sizes"])
+        legacy = engines["django"].from_string(LEGACY_ROWS)
+        current = get_template("core/dashboard_list_rows.html")
+
+        # Los clientes sintéticos se descartan al final (rollback)
+        with transaction.atomic():
+            existing = Client.objects.count()
+            Client.objects.bulk_create(
+                [
+                    Client(
+                        name=f"Cliente {i:06d}", email=f"bench{i}@example.com",
+                        phone="3000000000", company="Empresa S.A.S." if i % 2 else "",
+                    )
+                    for i in range(max(0, sizes[-1] - existing))
+                ],
+                batch_size=2000,
+            )
+
+            for n in sizes:
+                qs = Client.objects.order_by("name")[:n]
+
+                def render_legacy():
+                    return legacy.render({
+                        "object_list": list(qs),
+                        "columns": COLUMNS,
+                        "detail_url": DETAIL_URL,
+                    })
+
+                def render_current():
+                    return current.render({"rows": list_rows(qs, COLUMNS, DETAIL_URL)})
+
+                old_ms, old_size = self._time(render_legacy)
+                new_ms, new_size = self._time(render_current)
+                self.stdout.write(
+                    f"{n:>6} filas | getattr_filter {old_ms:9.1f} ms ({old_size / 1024:,.0f} KB) | "
+                    f"values_list {new_ms:8.1f} ms ({new_size / 1024:,.0f} KB) | "
+                    f"x{old_ms / new_ms:.1f}"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from apps.core.email_rendering import clear_cache, render_email
+
+
+SAMPLE_CONTEXTS = {
+    "emails/service_renewal_reminder.html": {
+        "service_name": "Hosting Pro",
+        "renewal_date": "15/03/2027",
+        "amount": "$250.000",
+        "billing_type": "Anual",
+        "client_name": "Cliente de prueba",
+        "manage_url": "https://megadominio.co/mi-cuenta/servicios/",
+    },
+    "emails/generic_notification.html": {
+        "title": "Nuevo mensaje de contacto",
+        "body": "Nombre: Cliente\nEmail: cliente@test.com\n\nMensaje de prueba",
+        "cta_url": "https://megadominio.co/dashboard/",
+        "cta_label": "Abrir dashboard",
+    },
+    "emails/order_confirmation.html": {
+        "order_number": "ORD-00042",
+        "items": [
+            {"name": f"Producto {i}", "qty": 1, "total": "$10.000"}
+            for i in range(5)
+        ],
+        "order_total": "$50.000",
+        "billing_name": "Cliente de prueba",
+        "shipping_address": "Calle 1 # 2-3, Medellín",
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide correos renderizados por segundo: render_to_string + strip_tags "
+        "(método anterior) vs. render_email con layout cacheado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--messages", type=int, default=1000,
+            help="Mensajes a renderizar por plantilla (por defecto: 1000)",
+        )
+
+    def handle(self, *args, **opts):
+        n = max(1, int(opts["messages"]))
+        clear_cache()
+
+        for template, sample in SAMPLE_CONTEXTS.items():
+            ctx = {"site_name": "Megadominio", "brand_name": "Megadominio", **sample}
+
+            # Calentamiento: compila plantillas y layout antes de medir
+            render_to_string(template, ctx)
+            render_email(template, ctx)
+
+            start = time.perf_counter()
+            for _ in range(n):
+                html = render_to_string(template, ctx)
+                strip_tags(html)
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(n):
+                render_email(template, ctx)
+            cached = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{template}: "
+                f"anterior {n / legacy:,.0f} msg/s | "
+                f"cacheado {n / cached:,.0f} msg/s | "
+                f"x{legacy / cached:.1f}"
+            )
@@ -0,0 +1,107 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.core.backends import EmailBackend
+
+User = get_user_model()
+
+PREFIX = "bench-login-"
+PASSWORD = "bench-login-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la búsqueda de usuario por email del login con N usuarios: "
+        "email__iexact (sin índice) vs. LOWER(email) indexado, y el "
+        "authenticate() completo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=100_000,
+            help="Usuarios sintéticos a crear (por defecto: 100000)",
+        )
+        parser.add_argument(
+            "--lookups", type=int, default=500,
+            help="Búsquedas por modo (por defecto: 500)",
+        )
+        parser.add_argument(
+            "--keep", action="store_true",
+            help="No borrar los usuarios sintéticos al terminar",
+        )
+
+    def _create_users(self, n):
+        existing = User.objects.filter(username__startswith=PREFIX).count()
+        if existing >= n:
+            return
+        password = make_password(PASSWORD)
+        batch = []
+        with transaction.atomic():
+            for i in range(existing, n):
+                batch.append(User(
+                    username=f"{PREFIX}{i}",
+                    email=f"{PREFIX}{i}@Example.com",
+                    password=password,
+                ))
+                if len(batch) >= 5000:
+                    User.objects.bulk_create(batch)
+                    batch = []
+            User.objects.bulk_create(batch)
+
+    def _explain(self, qs):
+        try:
+            plan = qs.explain()
+        except Exception:
+            return "?"
+        return "índice" if "INDEX" in plan.upper() else "scan secuencial"
+
+    def _time(self, lookup, emails):
+        start = time.perf_counter()
+        for email in emails:
+            lookup(email)
+        return (time.perf_counter() - start) / len(emails) * 1000
+
+    def handle(self, *args, **opts):
+        n = max(1, opts["users"])
+        lookups = max(1, opts["lookups"])
+
+        self.stdout.write(f"Creando {n} usuarios sintéticos...")
+        self._create_users(n)
+        step = max(1, n // lookups)
+        emails = [f"{PREFIX.upper()}{i}@example.COM" for i in range(0, n, step)][:lookups]
+
+        try:
+            def iexact(email):
+                return User.objects.filter(email__iexact=email).order_by("id").first()
+
+            def indexed(email):
+                return User.objects.with_email(email).order_by("id").first()
+
+            for label, lookup, qs in (
+                ("email__iexact", iexact, User.objects.filter(email__iexact=emails[0])),
+                ("LOWER(email)", indexed, User.objects.with_email(emails[0])),
+            ):
+                lookup(emails[0])  # calentamiento
+                ms = self._time(lookup, emails)
+                self.stdout.write(
+                    f"{label:<14} {ms:8.3f} ms/búsqueda "
+                    f"({1000 / ms:8.0f}/s) | plan: {self._explain(qs)}"
+                )
+
+            backend = EmailBackend()
+            sample = emails[: min(len(emails), 20)]
+            start = time.perf_counter()
+            for email in sample:
+                if backend.authenticate(None, username=email, password=PASSWORD) is None:
+                    raise CommandError(f"authenticate() falló para {email}")
+            ms = (time.perf_counter() - start) / len(sample) * 1000
+            self.stdout.write(
+                f"authenticate() {ms:8.3f} ms/login ({1000 / ms:8.0f}/s, incluye el hash)"
+            )
+        finally:
+            if not opts["keep"]:
+                User.objects.filter(username__startswith=PREFIX).delete()
@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from apps.core.page_cache import invalidate_pages
+from apps.services.models import Service
+from apps.store.models import Product
+from apps.store.plans import get_catalog
+
+
+def _public_paths():
+    paths = [
+        reverse("core:home"),
+        reverse("core:services"),
+        reverse("core:about"),
+        reverse("core:terms"),
+        reverse("core:privacy"),
+        reverse("core:store"),
+    ]
+    plan = next(iter(get_catalog()), None)
+    if plan:
+        paths.append(reverse("core:plan_detail", args=[plan.slug]))
+    product = Product.objects.filter(is_active=True).first()
+    if product:
+        paths.append(reverse("core:product_detail", args=[product.slug]))
+    service = Service.objects.filter(is_active=True).first()
+    if service:
+        paths.append(service.get_absolute_url())
+    return paths
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip(".")
+        if host and host != "*":
+            return host
+    return "localhost"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las páginas públicas para visitantes anónimos sin caché de "
+        "página y con caché (latencia y consultas por petición)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=200,
+            help="Peticiones por página y modo (por defecto: 200)",
+        )
+
+    def _run(self, view, path, kwargs, n):
+        factory = RequestFactory(HTTP_HOST=_host())
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for _ in range(n):
+                request = factory.get(path)
+                request.user = AnonymousUser()
+                response = view(request, **kwargs)
+                response.content
+            elapsed = time.perf_counter() - start
+        return elapsed / n * 1000, len(ctx.captured_queries) / n
+
+    def handle(self, *args, **opts):
+        n = max(1, opts["requests"])
+        for path in _public_paths():
+            match = resolve(path)
+            with override_settings(PAGE_CACHE_TIMEOUT=0):
+                self._run(match.func, path, match.kwargs, 1)  # calentamiento
+                cold = self._run(match.func, path, match.kwargs, n)
+            invalidate_pages()
+            self._run(match.func, path, match.kwargs, 1)
+            warm = self._run(match.func, path, match.kwargs, n)
+            self.stdout.write(
+                f"{path:<40} sin caché {cold[0]:7.2f} ms ({cold[1]:.0f} consultas) | "
+                f"con caché {warm[0]:6.2f} ms ({warm[1]:.0f} consultas) | "
+                f"x{cold[0] / warm[0]:.1f}"
+            )
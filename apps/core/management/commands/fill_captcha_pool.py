@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core import captcha_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Llena el pool de CAPTCHAs pre-generados hasta CAPTCHA_POOL_SIZE y "
+        "muestra su tamaño y cuántos retos se entregaron desde el pool o en línea."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=None,
+            help="Tamaño objetivo (por defecto: CAPTCHA_POOL_SIZE)",
+        )
+        parser.add_argument(
+            "--stats", action="store_true", default=False,
+            help="Solo mostrar las métricas del pool, sin llenarlo",
+        )
+
+    def handle(self, *args, **opts):
+        if not opts["stats"]:
+            start = time.perf_counter()
+            added = captcha_pool.fill(target=opts["size"])
+            self.stdout.write(self.style.SUCCESS(
+                f"CAPTCHAs agregados: {added} en {time.perf_counter() - start:.1f}s"
+            ))
+        metrics = captcha_pool.pool_metrics()
+        self.stdout.write(
+            f"Pool: {metrics['size']}/{metrics['target']} | "
+            f"entregados desde el pool: {metrics['served']} | "
+            f"dibujados en línea: {metrics['misses']}"
+        )
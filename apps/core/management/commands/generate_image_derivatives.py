@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.core import images
+from apps.core.page_cache import invalidate_pages
+
+
+def _storage(label):
+    model_label, field_name = label.rsplit(".", 1)
+    return apps.get_model(model_label)._meta.get_field(field_name).storage
+
+
+def _generate(label, name, widths):
+    """Se ejecuta en un proceso del pool: solo toca el storage, no la BD."""
+    return len(images.generate_derivatives(_storage(label), name, widths))
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los derivados WebP/JPEG de las imágenes ya subidas (productos, "
+        "logos, testimonios y avatares) repartiendo el trabajo entre procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Procesos en paralelo (por defecto: núcleos disponibles)",
+        )
+        parser.add_argument(
+            "--field", action="append", choices=sorted(images.IMAGE_FIELDS),
+            help="Limitar a estos campos (repetible; por defecto: todos)",
+        )
+        parser.add_argument(
+            "--force", action="store_true", default=False,
+            help="Regenerar aunque los derivados ya existan",
+        )
+
+    def _pending(self, labels, force):
+        for label in labels:
+            model_label, field_name = label.rsplit(".", 1)
+            model = apps.get_model(model_label)
+            storage = _storage(label)
+            widths = images.field_widths(label)
+            names = (
+                model._default_manager.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list(field_name, flat=True).distinct()
+            )
+            for name in names.iterator():
+                if force or not storage.exists(images.derivative_name(name, widths[0], "webp")):
+                    yield label, name, widths
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        jobs = list(self._pending(opts["field"] or sorted(images.IMAGE_FIELDS), opts["force"]))
+        if not jobs:
+            self.stdout.write("Sin imágenes pendientes.")
+            return
+
+        # Los procesos hijos no deben heredar conexiones abiertas
+        connections.close_all()
+        stats = {"images": len(jobs), "files": 0, "errors": 0}
+        workers = max(1, min(opts["workers"], len(jobs)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            futures = {pool.submit(_generate, *job): job for job in jobs}
+            for future in as_completed(futures):
+                label, name, _ = futures[future]
+                try:
+                    stats["files"] += future.result()
+                except Exception as exc:
+                    stats["errors"] += 1
+                    self.stderr.write(f"{label} {name}: {exc}")
+                    continue
+                # La caché de los hijos puede ser local a cada proceso
+                images.mark_ready(name)
+
+        invalidate_pages()
+        self.stdout.write(
+            f"{stats['images']} imágenes, {stats['files']} archivos, "
+            f"{stats['errors']} errores con {workers} procesos "
+            f"en {time.perf_counter() - start:.1f}s"
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.emails import send_admin_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía a los administradores el resumen de eventos pendientes "
+        "(AdminEvent) agrupados por tipo. Programar en cron cada N minutos "
+        "con ADMIN_NOTIFICATION_DIGEST = True."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-events", type=int, default=1000,
+            help="Máximo de eventos por resumen (por defecto: 1000)",
+        )
+        parser.add_argument(
+            "--per-type", type=int, default=20,
+            help="Eventos listados por tipo; el resto solo se cuenta (por defecto: 20)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", default=False,
+            help="Muestra el conteo sin enviar ni marcar eventos",
+        )
+
+    def handle(self, *args, **opts):
+        stats = send_admin_digest(
+            max_events=max(1, opts["max_events"]),
+            per_type=max(1, opts["per_type"]),
+            dry_run=opts["dry_run"],
+        )
+        if not stats["events"]:
+            self.stdout.write("Sin eventos pendientes.")
+            return
+        prefix = "[DRY] " if opts["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Resumen: {stats['events']} eventos en {stats['groups']} grupos"
+        ))
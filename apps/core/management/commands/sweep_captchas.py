@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.captcha_pool import sweep_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra en lotes las filas vencidas de CaptchaStore. Los formularios ya "
+        "no lo hacen en cada envío: programar en cron (p. ej. cada hora)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Filas por DELETE (por defecto: 5000)",
+        )
+
+    def handle(self, *args, **opts):
+        deleted = sweep_expired(batch_size=max(1, opts["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"CAPTCHAs vencidos borrados: {deleted}"))
@@ -0,0 +1,31 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('order', 'Órdenes'), ('payment_failed', 'Pagos fallidos'), ('quote', 'Cotizaciones'), ('service', 'Servicios de clientes'), ('reminder', 'Recordatorios'), ('contact', 'Mensajes de contacto'), ('signup', 'Registros de usuarios'), ('error', 'Errores'), ('other', 'Otros')], default='other', max_length=30)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('cta_url', models.CharField(blank=True, max_length=500)),
+                ('cta_label', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Evento para administradores',
+                'verbose_name_plural': 'Eventos para administradores',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
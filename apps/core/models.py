@@ -1,5 +1,76 @@
 from django.db import models
 
+_UNLOADED = object()
+
+
+class FieldTrackerMixin:
+    """
+    Recuerda el valor con que se cargaron los campos de ``tracked_fields``
+    para saber en ``post_save`` qué cambió, sin volver a consultar la BD.
+
+    La foto se toma al instanciar (también desde ``from_db``) y se renueva
+    después de cada ``save()``; por eso en las señales de guardado
+    ``previous()`` todavía devuelve el valor anterior. Durante el ``save()``
+    que inserta la fila (incluidas sus señales, aunque Django ya marcó
+    ``_state.adding = False``) ``previous()`` es None y ``has_changed()`` es
+    True.
+    """
+
+    tracked_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tracked_snapshot = {}
+        self._tracked_inserting = False
+        self._snapshot_tracked()
+
+    def _snapshot_tracked(self, fields=None):
+        for name in self.tracked_fields:
+            if fields is None or name in fields:
+                # Un campo diferido (.only/.defer) no está en __dict__: no se
+                # lee para no disparar una consulta.
+                self._tracked_snapshot[name] = self.__dict__.get(
+                    self._meta.get_field(name).attname, _UNLOADED
+                )
+
+    def _is_new(self):
+        return self._state.adding or self._tracked_inserting
+
+    def previous(self, field):
+        """Valor de ``field`` al cargarse o guardarse por última vez."""
+        if self._is_new():
+            return None
+        value = self._tracked_snapshot.get(field, _UNLOADED)
+        return None if value is _UNLOADED else value
+
+    def has_changed(self, field):
+        if self._is_new():
+            return True
+        value = self._tracked_snapshot.get(field, _UNLOADED)
+        return value is _UNLOADED or value != getattr(self, field)
+
+    def saves_tracked(self, update_fields, *fields):
+        """
+        True si un ``save(update_fields=...)`` incluye alguno de ``fields``
+        (por defecto, los rastreados). ``update_fields=None`` guarda todo.
+        """
+        if update_fields is None:
+            return True
+        return bool(set(update_fields) & set(fields or self.tracked_fields))
+
+    def save(self, *args, **kwargs):
+        self._tracked_inserting = self._state.adding
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._tracked_inserting = False
+        update_fields = kwargs.get('update_fields')
+        self._snapshot_tracked(None if update_fields is None else set(update_fields))
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._snapshot_tracked(None if fields is None else set(fields))
+
 
 class HomeClientLogo(models.Model):
     name = models.CharField(max_length=120)
@@ -51,3 +122,44 @@ class HomeTestimonial(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.company or ''}"
+
+
+class AdminEvent(models.Model):
+    """Notificación para administradores en espera del resumen periódico."""
+
+    EVENT_TYPE_CHOICES = [
+        ('order', 'Órdenes'),
+        ('payment_failed', 'Pagos fallidos'),
+        ('quote', 'Cotizaciones'),
+        ('service', 'Servicios de clientes'),
+        ('reminder', 'Recordatorios'),
+        ('contact', 'Mensajes de contacto'),
+        ('signup', 'Registros de usuarios'),
+        ('error', 'Errores'),
+        ('other', 'Otros'),
+    ]
+
+    event_type = models.CharField(
+        max_length=30, choices=EVENT_TYPE_CHOICES, default='other'
+    )
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    cta_url = models.CharField(max_length=500, blank=True)
+    cta_label = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'Evento para administradores'
+        verbose_name_plural = 'Eventos para administradores'
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} - {self.title}"
+
+
+# Registra la invalidación de la caché de páginas públicas y del panel, y los
+# derivados de imágenes
+from . import images  # noqa: E402,F401
+from . import page_cache  # noqa: E402,F401
+from . import panel_summary  # noqa: E402,F401
@@ -0,0 +1,126 @@
+"""
+Caché de páginas completas para visitantes anónimos.
+
+``@cache_public_page`` guarda el HTML de las respuestas GET 200 por URL
+absoluta (host + ruta + query string). Los usuarios autenticados y los
+métodos distintos de GET/HEAD nunca usan la caché.
+
+CSRF: el token de los formularios (``{% csrf_token %}``) se reemplaza en la
+copia guardada por un marcador y en cada respuesta se inserta el token del
+visitante (``get_token``), así la página cacheada sigue siendo válida para
+enviar formularios.
+
+Invalidación: las claves incluyen una generación guardada en la caché;
+guardar o borrar un modelo de ``PAGE_CACHE_MODELS`` cambia la generación y
+todas las páginas se regeneran en la siguiente visita.
+
+``QuerySet.update()``, ``bulk_create()`` y ``bulk_update()`` no envían
+señales: el código que escribe así en esos modelos debe llamar a
+``invalidate_pages()`` (dentro de una transacción, con
+``transaction.on_commit(invalidate_pages)``), como hace ``store.inventory``
+al mover el stock.
+"""
+import hashlib
+import re
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+DEFAULT_TIMEOUT = 600
+
+GENERATION_KEY = 'pagecache:generation'
+CSRF_PLACEHOLDER = '__PAGE_CACHE_CSRF__'
+
+# Modelos cuyo contenido aparece en las páginas públicas
+PAGE_CACHE_MODELS = {
+    'services.service',
+    'store.product',
+    'store.productcategory',
+    'store.plan',
+    'core.homeclientlogo',
+    'core.hometestimonial',
+}
+
+_CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def current_generation():
+    """Generación vigente del contenido público (cambia al editarlo)."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(GENERATION_KEY, '')
+    return generation
+
+
+def _page_key(request):
+    url = request.build_absolute_uri()
+    digest = hashlib.md5(url.encode('utf-8')).hexdigest()
+    return f'pagecache:{current_generation()}:{digest}'
+
+
+def invalidate_pages():
+    """Descarta todas las páginas cacheadas (cambia la generación)."""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def _cacheable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user = getattr(request, 'user', None)
+    return not (user is not None and user.is_authenticated)
+
+
+def cache_public_page(view):
+    """Cachea la página para visitantes anónimos (``PAGE_CACHE_TIMEOUT`` segundos)."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+        if not timeout or not _cacheable(request):
+            return view(request, *args, **kwargs)
+
+        key = _page_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            content, content_type, has_csrf = entry
+            if has_csrf:
+                content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Page-Cache'] = 'hit'
+            return response
+
+        response = view(request, *args, **kwargs)
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not response.has_header('Cache-Control')
+        ):
+            content = response.content.decode(response.charset)
+            content, count = _CSRF_INPUT_RE.subn(
+                f'name="csrfmiddlewaretoken" value="{CSRF_PLACEHOLDER}"', content,
+            )
+            cache.set(key, (content, response['Content-Type'], bool(count)), timeout)
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    return wrapper
+
+
+def _invalidate_on_change(sender, **kwargs):
+    if sender._meta.label_lower in PAGE_CACHE_MODELS:
+        # También al confirmar: una visita durante la transacción pudo volver
+        # a cachear el contenido anterior.
+        invalidate_pages()
+        transaction.on_commit(invalidate_pages)
+
+
+post_save.connect(_invalidate_on_change, dispatch_uid='page_cache_invalidate_save')
+post_delete.connect(_invalidate_on_change, dispatch_uid='page_cache_invalidate_delete')
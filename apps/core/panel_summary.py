@@ -0,0 +1,135 @@
+"""
+Resumen del panel "Mi cuenta" (``panel_home``) por usuario.
+
+Los contadores y totales (servicios, servicios activos, cuentas de cobro,
+órdenes y total pagado) salen de una sola consulta: la fila del usuario con
+su ``Client`` (``select_related``) y una subconsulta escalar por contador.
+Las listas de recientes solo se consultan si el contador respectivo no es
+cero.
+
+El resultado se cachea por usuario (``PANEL_SUMMARY_TIMEOUT``, 300 s por
+defecto) y las señales de ``Client``, ``ClientService``, ``CuentaDeCobro`` y
+``Order`` lo invalidan cuando cambian filas de ese usuario.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+SUMMARY_KEY = 'panel:summary:{}'
+RECENT = 5
+
+
+def _scalar(queryset, fk, aggregate, output_field=None):
+    """Subconsulta que agrega ``queryset`` para la fila externa (0 si no hay filas)."""
+    subquery = queryset.order_by().values(fk).annotate(v=aggregate).values('v')
+    return Coalesce(Subquery(subquery, output_field=output_field), 0, output_field=output_field)
+
+
+def _load(user_id):
+    from apps.clients.models import Client
+    from apps.invoices.models import CuentaDeCobro
+    from apps.services.models import ClientService
+    from apps.store.models import Order
+
+    client_ref = OuterRef('client_profile__pk')
+    services = ClientService.objects.filter(client=client_ref)
+    orders = Order.objects.filter(customer=OuterRef('pk'))
+    order_total = Order._meta.get_field('total')
+
+    user = get_user_model().objects.select_related('client_profile').annotate(
+        total_services=_scalar(services, 'client', Count('pk'), IntegerField()),
+        active_services_count=_scalar(
+            services.filter(status='active'), 'client', Count('pk'), IntegerField(),
+        ),
+        total_cuentas=_scalar(
+            CuentaDeCobro.objects.filter(client=client_ref), 'client', Count('pk'), IntegerField(),
+        ),
+        total_orders=_scalar(orders, 'customer', Count('pk'), IntegerField()),
+        total_spent=_scalar(
+            orders.filter(payment_status='approved'), 'customer', Sum('total'), order_total,
+        ),
+    ).get(pk=user_id)
+
+    try:
+        client = user.client_profile
+    except Client.DoesNotExist:
+        client = None
+
+    summary = {
+        'client': client,
+        'services': [],
+        'active_services_count': user.active_services_count if client else 0,
+        'recent_cuentas': [],
+        'total_cuentas': user.total_cuentas if client else 0,
+        'recent_orders': [],
+        'total_orders': user.total_orders,
+        'total_spent': user.total_spent,
+    }
+    if client and user.total_services:
+        summary['services'] = list(
+            ClientService.objects.filter(client=client)
+            .select_related('service').order_by('-created_at')[:RECENT]
+        )
+    if client and user.total_cuentas:
+        summary['recent_cuentas'] = list(
+            CuentaDeCobro.objects.filter(client=client).order_by('-created_at')[:RECENT]
+        )
+    if user.total_orders:
+        summary['recent_orders'] = list(
+            Order.objects.filter(customer_id=user_id).order_by('-created_at').only(
+                'pk', 'number', 'created_at', 'total', 'status', 'payment_status',
+            )[:RECENT]
+        )
+    return summary
+
+
+def client_summary(user):
+    """Contexto de resumen de ``panel_home`` para ``user`` (cacheado)."""
+    key = SUMMARY_KEY.format(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = _load(user.pk)
+        cache.set(key, summary, getattr(settings, 'PANEL_SUMMARY_TIMEOUT', 300))
+    return summary
+
+
+def invalidate_client_summary(*user_ids):
+    keys = [SUMMARY_KEY.format(pk) for pk in user_ids if pk]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _invalidate_soon(*user_ids):
+    invalidate_client_summary(*user_ids)
+    transaction.on_commit(lambda: invalidate_client_summary(*user_ids))
+
+
+def _user_of_client(client_id):
+    from apps.clients.models import Client
+    return Client.objects.filter(pk=client_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender='store.Order')
+@receiver(post_delete, sender='store.Order')
+def _order_changed(sender, instance, **kwargs):
+    _invalidate_soon(instance.customer_id)
+
+
+@receiver(post_save, sender='services.ClientService')
+@receiver(post_delete, sender='services.ClientService')
+@receiver(post_save, sender='invoices.CuentaDeCobro')
+@receiver(post_delete, sender='invoices.CuentaDeCobro')
+def _client_row_changed(sender, instance, **kwargs):
+    if instance.client_id:
+        _invalidate_soon(_user_of_client(instance.client_id))
+
+
+@receiver(post_save, sender='clients.Client')
+@receiver(post_delete, sender='clients.Client')
+def _client_changed(sender, instance, **kwargs):
+    _invalidate_soon(instance.user_id)
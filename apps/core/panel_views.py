@@ -1,23 +1,32 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from io import BytesIO
+import hashlib
+import json
 import zipfile
-from django.db.models import Sum
+from django.db.models import Count
 from apps.clients.models import Client
 from apps.services.models import ClientService, ClientEmailAccount
+from apps.store.customer_orders import orders_for
 from apps.store.models import Order
 from apps.invoices.models import CuentaDeCobro
-from apps.accounts.models import UserAddress, State, City
+from apps.accounts.geo import get_index as get_geo_index, normalize, search_cities
+from apps.accounts.models import UserAddress
 from .forms import (
     ProfileForm, PasswordChangeForm, UserAddressForm,
     ClientEmailAccountForm, ClientEmailAccountPanelForm,
 )
 from apps.services.cpanel_api import CpanelAPI, CpanelAPIError
 from apps.services.cpanel_config import get_cpanel_config
+from .async_io import run_io
+from .panel_summary import client_summary
 
 
 def get_client_for_user(user):
@@ -30,48 +39,8 @@ def get_client_for_user(user):
 
 @login_required
 def panel_home(request):
-    """Panel principal del usuario — resumen."""
-    client = get_client_for_user(request.user)
-
-    # Servicios contratados
-    services = []
-    active_services_count = 0
-    recent_cuentas = []
-    total_cuentas = 0
-    if client:
-        services = ClientService.objects.filter(
-            client=client
-        ).select_related('service').order_by('-created_at')[:5]
-        active_services_count = ClientService.objects.filter(
-            client=client, status='active'
-        ).count()
-        cuentas_qs = CuentaDeCobro.objects.filter(client=client).order_by('-created_at')
-        total_cuentas = cuentas_qs.count()
-        recent_cuentas = cuentas_qs[:5]
-
-    # Órdenes de la tienda (por email o por created_by)
-    orders = Order.objects.filter(
-        customer_email=request.user.email
-    ) | Order.objects.filter(
-        created_by=request.user
-    )
-    orders = orders.distinct().order_by('-created_at')
-    total_orders = orders.count()
-    recent_orders = orders[:5]
-    total_spent = orders.filter(
-        payment_status='approved'
-    ).aggregate(t=Sum('total'))['t'] or 0
-
-    return render(request, 'panel/panel_home.html', {
-        'client': client,
-        'services': services,
-        'active_services_count': active_services_count,
-        'recent_orders': recent_orders,
-        'total_orders': total_orders,
-        'total_spent': total_spent,
-        'recent_cuentas': recent_cuentas,
-        'total_cuentas': total_cuentas,
-    })
+    """Panel principal del usuario — resumen (ver ``panel_summary``)."""
+    return render(request, 'panel/panel_home.html', client_summary(request.user))
 
 
 @login_required
@@ -83,7 +52,9 @@ def panel_servicios(request):
     if client:
         services = ClientService.objects.filter(
             client=client
-        ).select_related('service').order_by('-created_at')
+        ).select_related('service').annotate(
+            email_accounts_total=Count('email_accounts'),
+        ).order_by('-created_at')
 
     return render(request, 'panel/panel_servicios.html', {
         'client': client,
@@ -92,8 +63,13 @@ def panel_servicios(request):
 
 
 @login_required
-def panel_servicio_emails(request, pk):
-    """Administración de cuentas de correo para un servicio del cliente."""
+def _panel_servicio_emails(request, pk):
+    """
+    Parte sync de ``panel_servicio_emails`` (ORM, formulario y render).
+
+    Si hay que crear el buzón en cPanel retorna un dict con los datos en vez
+    de una respuesta; la vista async hace esa llamada fuera del hilo del ORM.
+    """
     client = get_client_for_user(request.user)
     if not client:
         return HttpResponseForbidden("No tienes acceso a este servicio.")
@@ -137,29 +113,11 @@ def panel_servicio_emails(request, pk):
                 email_account.save(update_fields=['password_encrypted'])
 
             if cfg.sync_enabled and cfg.cpanel_ready and password:
-                try:
-                    cpanel = CpanelAPI(
-                        host=cfg.host,
-                        username=cfg.username,
-                        api_token=cfg.api_token,
-                        use_https=cfg.use_https,
-                        port=cfg.port,
-                        timeout=cfg.timeout,
-                    )
-                    cpanel.create_mailbox(
-                        email=email_account.email,
-                        password=password,
-                        quota_mb=cfg.mailbox_quota_mb,
-                    )
-                    messages.success(
-                        request,
-                        'Cuenta de correo creada correctamente. Buzón configurado en el servidor.',
-                    )
-                except CpanelAPIError as exc:
-                    messages.warning(
-                        request,
-                        f'Cuenta registrada, pero no se pudo crear el buzón en el servidor: {exc}',
-                    )
+                return {
+                    'cfg': cfg,
+                    'email': email_account.email,
+                    'password': password,
+                }
             else:
                 messages.success(request, 'Cuenta de correo creada correctamente.')
             return redirect('core:panel_servicio_emails', pk=pk)
@@ -200,6 +158,45 @@ def panel_servicio_emails(request, pk):
     })
 
 
+async def panel_servicio_emails(request, pk):
+    """
+    Administración de cuentas de correo para un servicio del cliente.
+
+    Vista async: la creación del buzón en cPanel (hasta ``cfg.timeout``
+    segundos) se espera en el pool de I/O sin ocupar un hilo del ORM.
+    """
+    result = await sync_to_async(_panel_servicio_emails)(request, pk)
+    if isinstance(result, HttpResponse):
+        return result
+
+    cfg = result['cfg']
+    cpanel = CpanelAPI(
+        host=cfg.host,
+        username=cfg.username,
+        api_token=cfg.api_token,
+        use_https=cfg.use_https,
+        port=cfg.port,
+        timeout=cfg.timeout,
+    )
+    try:
+        await run_io(
+            cpanel.create_mailbox,
+            email=result['email'],
+            password=result['password'],
+            quota_mb=cfg.mailbox_quota_mb,
+        )
+        messages.success(
+            request,
+            'Cuenta de correo creada correctamente. Buzón configurado en el servidor.',
+        )
+    except CpanelAPIError as exc:
+        messages.warning(
+            request,
+            f'Cuenta registrada, pero no se pudo crear el buzón en el servidor: {exc}',
+        )
+    return redirect('core:panel_servicio_emails', pk=pk)
+
+
 @login_required
 def panel_servicio_email_delete(request, pk, email_pk):
     """Eliminar una cuenta de correo de un servicio del cliente."""
@@ -448,12 +445,7 @@ pause
 @login_required
 def panel_compras(request):
     """Listado de compras/órdenes del usuario."""
-    orders = Order.objects.filter(
-        customer_email=request.user.email
-    ) | Order.objects.filter(
-        created_by=request.user
-    )
-    orders = orders.distinct().order_by('-created_at')
+    orders = orders_for(request.user)
 
     return render(request, 'panel/panel_compras.html', {
         'orders': orders,
@@ -465,11 +457,7 @@ def panel_compra_detail(request, pk):
     """Detalle de una compra del usuario."""
     order = get_object_or_404(Order, pk=pk)
     # Verificar que la orden pertenece al usuario
-    is_owner = (
-        order.customer_email == request.user.email
-        or order.created_by == request.user
-    )
-    if not is_owner:
+    if order.customer_id != request.user.pk:
         return HttpResponseForbidden("No tienes acceso a esta orden.")
 
     return render(request, 'panel/panel_compra_detail.html', {
@@ -612,23 +600,58 @@ def panel_direccion_default(request, pk):
 
 # ── API endpoints for cascading geo selects ──
 
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+
+def _geo_response(request, payload, etag_key):
+    """JSON geográfico con ETag por versión del índice y caché larga."""
+    etag = quote_etag(hashlib.md5(etag_key.encode('utf-8')).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(payload, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age={}'.format(
+        getattr(settings, 'GEO_CACHE_MAX_AGE', 86400)
+    )
+    return response
+
+
 def api_states(request):
     """Return states for a given country_id."""
-    country_id = request.GET.get('country_id')
-    if not country_id:
+    country_id = _int_param(request, 'country_id')
+    if country_id is None:
         return JsonResponse([], safe=False)
-    qs = State.objects.filter(
-        country_id=country_id
-    ).order_by('name').values('id', 'name')
-    return JsonResponse(list(qs), safe=False)
+    index = get_geo_index()
+    return _geo_response(
+        request, index.states_json(country_id), f'{index.version}:s:{country_id}',
+    )
 
 
 def api_cities(request):
-    """Return cities for a given state_id."""
-    state_id = request.GET.get('state_id')
-    if not state_id:
+    """
+    Return cities for a given state_id.
+
+    With ``?q=`` returns up to 20 cities whose name starts with the prefix
+    (optionally within ``country_id`` or ``state_id``), for type-ahead.
+    """
+    index = get_geo_index()
+    query = request.GET.get('q', '').strip()
+    if query:
+        country_id = _int_param(request, 'country_id')
+        state_id = _int_param(request, 'state_id')
+        results = search_cities(query, country_id=country_id, state_id=state_id)
+        return _geo_response(
+            request,
+            json.dumps(results, ensure_ascii=False),
+            f'{index.version}:q:{normalize(query)}:{country_id}:{state_id}',
+        )
+    state_id = _int_param(request, 'state_id')
+    if state_id is None:
         return JsonResponse([], safe=False)
-    qs = City.objects.filter(
-        state_id=state_id
-    ).order_by('name').values('id', 'name')
-    return JsonResponse(list(qs), safe=False)
+    return _geo_response(
+        request, index.cities_json(state_id), f'{index.version}:c:{state_id}',
+    )
@@ -0,0 +1,153 @@
+"""
+Límite de peticiones por IP y por ruta sobre la caché compartida.
+
+``@rate_limit('signup')`` cuenta las peticiones POST de cada IP con
+``cache.incr`` (atómico en Redis, Memcached y LocMem, así las ráfagas
+concurrentes no se cuelan entre un ``get`` y un ``set``) y rechaza con 429
+antes de ejecutar la vista: sin validar formularios, sin consultas ni
+correos.
+
+Se usa una ventana deslizante aproximada: el contador de la ventana actual
+más el de la anterior, ponderado por la fracción de esta que aún se solapa.
+Los límites por ruta se ajustan con ``RATE_LIMITS = {'ruta': (peticiones,
+segundos)}``; ``RATE_LIMIT_ENABLED = False`` los desactiva.
+
+Cada rechazo se registra en el log ``security`` y suma en un contador por
+ruta (ver ``rejection_metrics()``).
+
+La IP sale de ``X-Real-IP`` (nginx la fija con ``$remote_addr``); sin ella,
+del salto de ``X-Forwarded-For`` que agregó el último de
+``TRUSTED_PROXY_COUNT`` proxies (contando desde la derecha), y si no de
+``REMOTE_ADDR``. Nunca de la entrada de la izquierda, que escribe el cliente.
+"""
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+logger = logging.getLogger('security')
+
+DEFAULT_RATE_LIMITS = {
+    'login': (20, 300),
+    'signup': (5, 600),
+    'contact': (5, 600),
+    'quote_request': (10, 600),
+    'service_detail': (10, 600),
+}
+
+REJECTED_KEY = 'ratelimit:rejected:{}'
+
+
+def get_client_ip(request):
+    real_ip = request.META.get('HTTP_X_REAL_IP', '').strip()
+    if real_ip:
+        return real_ip
+    proxies = int(getattr(settings, 'TRUSTED_PROXY_COUNT', 0))
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    if proxies and len(hops) >= proxies and hops[-proxies]:
+        return hops[-proxies]
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def get_limit(route):
+    """``(peticiones, segundos)`` de ``route``."""
+    limits = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+    return limits[route]
+
+
+def _key(route, ip, window_index):
+    return f'ratelimit:{route}:{ip}:{window_index}'
+
+
+def _incr(key, timeout):
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # La clave expiró entre add() e incr()
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def hit(route, ip, now=None):
+    """
+    Registra una petición de ``ip`` en ``route``.
+
+    Retorna ``(permitida, segundos_para_reintentar)``.
+    """
+    limit, window = get_limit(route)
+    now = time.time() if now is None else now
+    index, offset = divmod(now, window)
+    index = int(index)
+
+    current = _incr(_key(route, ip, index), window * 2)
+    previous = cache.get(_key(route, ip, index - 1), 0)
+    weight = 1 - offset / window
+    if current + previous * weight <= limit:
+        return True, 0
+    return False, max(1, int(window - offset))
+
+
+def reset(route, ip):
+    """Olvida las peticiones de ``ip`` en ``route`` (p. ej. tras un registro exitoso)."""
+    _, window = get_limit(route)
+    index = int(time.time() // window)
+    cache.delete_many([_key(route, ip, index), _key(route, ip, index - 1)])
+
+
+def _record_rejection(route, ip):
+    _incr(REJECTED_KEY.format(route), None)
+    logger.warning('Rate limit exceeded on %s from IP %s', route, ip)
+
+
+def rejection_metrics():
+    """Peticiones rechazadas por ruta desde el último ``reset_rejection_metrics()``."""
+    keys = {REJECTED_KEY.format(route): route for route in DEFAULT_RATE_LIMITS}
+    keys.update({REJECTED_KEY.format(route): route for route in getattr(settings, 'RATE_LIMITS', {})})
+    values = cache.get_many(list(keys))
+    return {route: values.get(key, 0) for key, route in keys.items()}
+
+
+def reset_rejection_metrics():
+    cache.delete_many([REJECTED_KEY.format(route) for route in rejection_metrics()])
+
+
+def rate_limit(route, methods=('POST',), json=False):
+    """
+    Decorador: limita ``methods`` de la vista por IP según ``RATE_LIMITS[route]``.
+
+    Con ``json=True`` el rechazo se responde como JSON (formularios AJAX).
+    """
+    get_limit(route)  # falla al importar si la ruta no tiene límite definido
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in methods
+                or not getattr(settings, 'RATE_LIMIT_ENABLED', True)
+            ):
+                return view(request, *args, **kwargs)
+
+            ip = get_client_ip(request)
+            allowed, retry_after = hit(route, ip)
+            if allowed:
+                return view(request, *args, **kwargs)
+
+            _record_rejection(route, ip)
+            message = 'Demasiados intentos. Intenta de nuevo en unos minutos.'
+            if json:
+                response = JsonResponse(
+                    {'success': False, 'errors': {'__all__': message}}, status=429,
+                )
+            else:
+                response = HttpResponse(f'<h1>{message}</h1>', status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        return wrapper
+
+    return decorator
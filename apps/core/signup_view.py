@@ -3,46 +3,26 @@ import time
 
 from django.shortcuts import render, redirect
 from django.contrib.auth import login
-from django.core.cache import cache
 from django.http import HttpResponseForbidden
 from django.urls import reverse
 
 from .forms import SignupForm
+from .ratelimit import get_client_ip, rate_limit, reset as reset_rate_limit
 from apps.core.emails import send_admin_notification
 
 logger = logging.getLogger('security')
 
-SIGNUP_RATE_LIMIT = 5          # max attempts
-SIGNUP_RATE_WINDOW = 600       # per 10 minutes
-
-
-def _get_client_ip(request):
-    xff = request.META.get('HTTP_X_FORWARDED_FOR')
-    if xff:
-        return xff.split(',')[0].strip()
-    return request.META.get('REMOTE_ADDR', 'unknown')
-
 
+# Límite por IP (RATE_LIMITS['signup'], 5 intentos cada 10 minutos por defecto)
+@rate_limit('signup')
 def signup(request):
     """Vista de registro público de usuarios."""
     if request.user.is_authenticated:
         return redirect('core:panel_home')
 
-    client_ip = _get_client_ip(request)
+    client_ip = get_client_ip(request)
 
     if request.method == 'POST':
-        # ---- Rate limiting by IP ----
-        cache_key = f'signup_attempts_{client_ip}'
-        attempts = cache.get(cache_key, 0)
-        if attempts >= SIGNUP_RATE_LIMIT:
-            logger.warning(
-                'Signup rate limit exceeded from IP %s', client_ip
-            )
-            return HttpResponseForbidden(
-                '<h1>Demasiados intentos de registro. '
-                'Intenta de nuevo en 10 minutos.</h1>'
-            )
-
         # ---- Honeypot check ----
         if request.POST.get('website_url', ''):
             logger.warning(
@@ -52,7 +32,6 @@ def signup(request):
             return HttpResponseForbidden('<h1>403 Forbidden</h1>')
 
         form = SignupForm(request.POST)
-        cache.set(cache_key, attempts + 1, SIGNUP_RATE_WINDOW)
 
         if form.is_valid():
             user = form.save()
@@ -60,7 +39,7 @@ def signup(request):
                 'New user registered: %s from IP %s',
                 user.email, client_ip
             )
-            cache.delete(cache_key)
+            reset_rate_limit('signup', client_ip)
             login(request, user,
                   backend='django.contrib.auth.backends.ModelBackend')
 
@@ -74,6 +53,7 @@ def signup(request):
                     body=f"Usuario: {user.get_full_name() or user.email} <{user.email}>\nIP: {client_ip}",
                     cta_url=admin_url,
                     cta_label='Ver usuario',
+                    event_type='signup',
                 )
             except Exception:
                 pass
@@ -1,7 +1,34 @@
+"""
+Sitemaps del sitio: ``/sitemap.xml`` es un índice que apunta a una sitemap
+por sección (``/sitemap-<sección>.xml``), paginada cada
+``SITEMAP_PAGE_SIZE`` URLs.
+
+``cache_sitemap`` guarda el XML ya renderizado (y opcionalmente su versión
+gzip, ``SITEMAP_GZIP``) con la generación de ``page_cache``, que cambia al
+guardar servicios, productos o planes. Un rastreador que repite la petición
+no toca la base de datos; con ``If-None-Match`` recibe 304.
+"""
+import gzip
+import hashlib
+from functools import wraps
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
 from django.urls import reverse
 from apps.services.models import Service
 from apps.store.models import Product
+from apps.store.plans import get_catalog
+
+from .page_cache import current_generation
+
+DEFAULT_TIMEOUT = 3600
+DEFAULT_PAGE_SIZE = 5000
+
+CACHED_HEADERS = ('Content-Type', 'Last-Modified', 'X-Robots-Tag')
 
 
 class StaticViewSitemap(Sitemap):
@@ -33,12 +60,15 @@ class StaticViewSitemap(Sitemap):
 
 
 class ServiceSitemap(Sitemap):
+    limit = getattr(settings, 'SITEMAP_PAGE_SIZE', DEFAULT_PAGE_SIZE)
     changefreq = 'weekly'
     priority = 0.8
     protocol = 'https'
 
     def items(self):
-        return Service.objects.filter(is_active=True)
+        return Service.objects.filter(is_active=True).only(
+            'slug', 'updated_at'
+        ).order_by('pk')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -48,12 +78,15 @@ class ServiceSitemap(Sitemap):
 
 
 class ProductSitemap(Sitemap):
+    limit = getattr(settings, 'SITEMAP_PAGE_SIZE', DEFAULT_PAGE_SIZE)
     changefreq = 'weekly'
     priority = 0.7
     protocol = 'https'
 
     def items(self):
-        return Product.objects.filter(is_active=True)
+        return Product.objects.filter(is_active=True).only(
+            'slug', 'updated_at'
+        ).order_by('pk')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -62,3 +95,80 @@ class ProductSitemap(Sitemap):
         return reverse(
             'core:product_detail', kwargs={'slug': obj.slug}
         )
+
+
+class PlanSitemap(Sitemap):
+    limit = getattr(settings, 'SITEMAP_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    changefreq = 'monthly'
+    priority = 0.8
+    protocol = 'https'
+
+    def items(self):
+        return list(get_catalog())
+
+    def lastmod(self, obj):
+        return obj.updated_at
+
+    def location(self, obj):
+        return reverse(
+            'core:plan_detail', kwargs={'slug': obj.slug}
+        )
+
+
+def _entry_response(request, entry):
+    use_gzip = entry['gzip'] is not None and 'gzip' in request.META.get(
+        'HTTP_ACCEPT_ENCODING', ''
+    )
+    etag = entry['etag_gzip'] if use_gzip else entry['etag']
+    last_modified = parse_http_date_safe(entry['headers'].get('Last-Modified', ''))
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified,
+    )
+    if response is None:
+        response = HttpResponse(entry['gzip'] if use_gzip else entry['content'])
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    for header, value in entry['headers'].items():
+        response[header] = value
+    response['ETag'] = etag
+    if entry['gzip'] is not None:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def cache_sitemap(view):
+    """Cachea el XML de una vista de sitemap por URL (host, sección y página)."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        url = request.build_absolute_uri()
+        key = 'sitemap:{}:{}'.format(
+            current_generation(), hashlib.md5(url.encode('utf-8')).hexdigest(),
+        )
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            content = response.content
+            digest = hashlib.md5(content).hexdigest()
+            compressed = None
+            if getattr(settings, 'SITEMAP_GZIP', False):
+                compressed = gzip.compress(content)
+            entry = {
+                'content': content,
+                'gzip': compressed,
+                'etag': f'"{digest}"',
+                'etag_gzip': f'"{digest}-gz"',
+                'headers': {
+                    h: response[h] for h in CACHED_HEADERS if response.has_header(h)
+                },
+            }
+            cache.set(
+                key, entry, getattr(settings, 'SITEMAP_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+            )
+        return _entry_response(request, entry)
+
+    return wrapper
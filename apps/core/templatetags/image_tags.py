@@ -0,0 +1,35 @@
+"""Template tags para imágenes con derivados redimensionados (ver core.images)"""
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from apps.core import images
+
+register = template.Library()
+
+
+@register.filter
+def srcset(file, fmt=None):
+    """``{{ obj.image|srcset }}`` o ``{{ obj.image|srcset:"webp" }}``"""
+    return images.srcset(file, fmt)
+
+
+@register.simple_tag
+def picture(file, sizes='100vw', **attrs):
+    """
+    ``{% picture product.image alt=product.name class="..." sizes="..." %}``
+
+    Genera ``<picture>`` con la fuente WebP y el ``<img>`` original con el
+    srcset de respaldo. Sin derivados aún, solo el ``<img>``.
+    """
+    if not file:
+        return ''
+    attrs = {'src': file.url, **{k: v for k, v in attrs.items() if v is not None}}
+    fallback = images.srcset(file)
+    if not fallback:
+        return format_html('<img{}>', flatatt(attrs))
+    attrs.update(srcset=fallback, sizes=sizes)
+    return format_html(
+        '<picture style="display:contents"><source type="image/webp" srcset="{}" sizes="{}"><img{}></picture>',
+        images.srcset(file, 'webp'), sizes, flatatt(attrs),
+    )
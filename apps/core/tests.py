@@ -1,15 +1,70 @@
-from django.test import TestCase, Client, override_settings
-from django.urls import reverse
+from datetime import date, timedelta
+from decimal import Decimal
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from PIL import Image
+from captcha.models import CaptchaStore
 from django.conf import settings
-from apps.accounts.models import User
-from apps.services.models import Service
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.middleware.csrf import _unmask_cipher_token
+from django.template import Context, RequestContext, Template
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from apps.accounts.geo import invalidate_geo_index
+from apps.accounts.management.commands.load_geo_data import iter_json_array
+from apps.accounts.models import City, Country, State, User
+from apps.clients.models import Client as ClientModel
+from apps.core import captcha_pool
+from apps.core.backends import EmailBackend
+from apps.core.dashboard_lists import ACTIVE_CELL, INACTIVE_CELL, list_rows
+from apps.core.email_rendering import clear_cache, render_email
+from apps.core.emails import send_admin_digest, send_admin_notification
+from apps.core.forms import ContactForm, SignupForm
+from apps.core.images import derivative_name
+from apps.core.models import AdminEvent, HomeClientLogo
+from apps.core.page_cache import CSRF_PLACEHOLDER, cache_public_page, invalidate_pages
+from apps.core.panel_summary import client_summary
+from apps.core.ratelimit import get_client_ip, hit, rejection_metrics, reset_rejection_metrics
+from apps.core.sitemaps import ServiceSitemap
+from apps.invoices.models import CuentaDeCobro
 from apps.quotes.models import Quote
+from apps.services.models import ClientService, Service
+from apps.services.reminders import send_due_reminders
+from apps.store.checkout import create_order
+from apps.store.inventory import InsufficientStock, release_expired, reserve_stock
+from apps.store.models import Order, OrderItem, PaymentEvent, Plan, Product, StockReservation
+from apps.store.payments import process_payment_events
+from apps.store.plans import get_catalog, get_plan, invalidate_catalog
+from apps.store.wompi import WompiClient
 
 
 EMAIL_BACKEND_OVERRIDE = {
     'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
 }
 
+# Sin relleno del pool de CAPTCHAs en un hilo aparte: escribiría en la BD
+# mientras la transacción del test la tiene bloqueada
+CAPTCHA_POOL_OVERRIDE = {
+    'CAPTCHA_POOL_AUTOFILL': False,
+}
+
 
 class LoginPageTests(TestCase):
     """Tests para la página de login"""
@@ -200,6 +255,7 @@ class PasswordResetTests(TestCase):
         self.assertEqual(resp.status_code, 302)
 
 
+@override_settings(**CAPTCHA_POOL_OVERRIDE)
 class PublicPagesTests(TestCase):
     """Tests para páginas públicas"""
 
@@ -298,6 +354,7 @@ class PublicPagesTests(TestCase):
         self.assertEqual(resp.status_code, 404)
 
 
+@override_settings(**CAPTCHA_POOL_OVERRIDE)
 class SEOTests(TestCase):
     """Tests para SEO: sitemap, robots.txt, meta tags, JSON-LD"""
 
@@ -382,6 +439,7 @@ class SEOTests(TestCase):
         self.assertContains(resp, '/coffee/')
 
 
+@override_settings(**CAPTCHA_POOL_OVERRIDE)
 class ServiceDetailTests(TestCase):
     """Tests para la página de detalle de servicio"""
 
@@ -445,7 +503,7 @@ class ServiceDetailTests(TestCase):
         self.assertEqual(resp.status_code, 404)
 
 
-@override_settings(**EMAIL_BACKEND_OVERRIDE)
+@override_settings(**EMAIL_BACKEND_OVERRIDE, **CAPTCHA_POOL_OVERRIDE)
 class QuoteModalAjaxTests(TestCase):
     """Tests para el envío AJAX del modal de cotización"""
 
@@ -681,3 +739,1391 @@ class ServiceDescriptionsTests(TestCase):
             is_active=True
         ).count()
         self.assertGreaterEqual(count, 6)
+
+
+@override_settings(**EMAIL_BACKEND_OVERRIDE)
+class ServiceRenewalReminderTests(TestCase):
+    """Tests para el programador unificado de recordatorios"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.client_obj = ClientModel.objects.create(
+            name='Cliente Digest', email='digest@test.com',
+        )
+        self.services = []
+        for i, days in enumerate((15, 7)):
+            svc = Service.objects.create(
+                name=f'Hosting {i}', description='Hosting web',
+                price=100000, billing_type='annual',
+            )
+            self.services.append(ClientService.objects.create(
+                client=self.client_obj, service=svc,
+                start_date=self.today,
+                end_date=self.today + timedelta(days=days),
+                monthly_price=100000,
+            ))
+
+    def test_one_digest_per_client(self):
+        mail.outbox = []
+        stats = send_due_reminders((15, 7), today=self.today)
+        self.assertEqual(stats['clients'], 1)
+        self.assertEqual(stats['services'], 2)
+        to_client = [m for m in mail.outbox if 'digest@test.com' in m.to]
+        self.assertEqual(len(to_client), 1)
+
+    def test_markers_prevent_resend(self):
+        send_due_reminders((15, 7), today=self.today)
+        cs15 = ClientService.objects.get(pk=self.services[0].pk)
+        self.assertIsNotNone(cs15.reminder_15_sent_at)
+        self.assertIsNotNone(cs15.last_reminder_sent_at)
+        stats = send_due_reminders((15, 7), today=self.today)
+        self.assertEqual(stats['services'], 0)
+
+
+class EmailRenderingTests(TestCase):
+    """Tests para el renderizado de correos con layout cacheado"""
+
+    def setUp(self):
+        clear_cache()
+        self.ctx = {
+            'site_name': 'Megadominio',
+            'title': 'Aviso <importante>',
+            'body': 'Contenido del aviso',
+            'cta_url': 'https://megadominio.co/',
+        }
+
+    def test_html_matches_full_render(self):
+        html, _text = render_email('emails/generic_notification.html', self.ctx)
+        self.assertIn('Aviso &lt;importante&gt;', html)
+        self.assertIn('Contenido del aviso', html)
+        self.assertIn('soporte@api.megadominio.co', html)
+        self.assertIn('class="cta" href="https://megadominio.co/" style="', html)
+
+    def test_text_uses_dedicated_template(self):
+        _html, text = render_email('emails/generic_notification.html', self.ctx)
+        self.assertIn('Aviso <importante>', text)
+        self.assertIn('https://megadominio.co/', text)
+        self.assertNotIn('font-family', text)
+
+
+@override_settings(
+    ADMIN_NOTIFICATION_DIGEST=True,
+    ADMINS=[('Admin', 'admin@test.com')],
+    ADMIN_DIGEST_CRITICAL_AMOUNT=500000,
+    **EMAIL_BACKEND_OVERRIDE,
+)
+class AdminDigestTests(TestCase):
+    """Tests para el resumen periódico de notificaciones a administradores"""
+
+    def test_events_are_buffered_and_sent_grouped(self):
+        mail.outbox = []
+        for i in range(3):
+            send_admin_notification(
+                title=f'Nuevo registro {i}', cta_url='/dashboard/usuarios/',
+                event_type='signup',
+            )
+        send_admin_notification(title='Nueva cotización', event_type='quote')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(AdminEvent.objects.filter(sent_at__isnull=True).count(), 4)
+
+        stats = send_admin_digest()
+        self.assertEqual(stats['events'], 4)
+        self.assertEqual(stats['groups'], 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Registros de usuarios (3)', mail.outbox[0].body)
+        self.assertFalse(AdminEvent.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(send_admin_digest()['events'], 0)
+
+    def test_critical_events_bypass_digest(self):
+        mail.outbox = []
+        send_admin_notification(
+            title='Pago declinado', event_type='payment_failed', amount=100000,
+        )
+        send_admin_notification(
+            title='Pago declinado grande', event_type='payment_failed', amount=900000,
+        )
+        send_admin_notification(title='Error de envío', event_type='error')
+        self.assertEqual(AdminEvent.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+@override_settings(WOMPI_EVENTS_SECRET='', **EMAIL_BACKEND_OVERRIDE)
+class WompiAsyncViewsTests(TestCase):
+    """Tests para las vistas async de resultado de pago y webhook de Wompi"""
+
+    def setUp(self):
+        self.order = Order.objects.create(
+            number='ORD-00901', customer_name='Cliente Async',
+            customer_email='async@test.com', total=120000,
+        )
+
+    def _event(self, status, timestamp=1700000000):
+        return json.dumps({
+            'event': 'transaction.updated',
+            'timestamp': timestamp,
+            'data': {'transaction': {
+                'id': 'tx-1', 'status': status, 'reference': self.order.number,
+                'payment_method_type': 'CARD',
+            }},
+        })
+
+    def _post(self, status, timestamp=1700000000):
+        return self.client.post(
+            '/webhooks/wompi/', self._event(status, timestamp),
+            content_type='application/json',
+        )
+
+    def test_webhook_declined_updates_order_and_notifies(self):
+        mail.outbox = []
+        response = self._post('DECLINED')
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'pending')
+        with self.captureOnCommitCallbacks(execute=True):
+            process_payment_events()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'declined')
+        self.assertEqual(self.order.wompi_transaction_id, 'tx-1')
+        self.assertTrue(any('async@test.com' in m.to for m in mail.outbox))
+
+    def test_webhook_retries_are_recorded_once(self):
+        self.assertEqual(self._post('APPROVED').json()['status'], 'ok')
+        self.assertEqual(self._post('APPROVED').json()['status'], 'duplicate')
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+    def test_stale_transitions_are_ignored(self):
+        self._post('APPROVED', timestamp=1700000100)
+        self.assertEqual(process_payment_events()['applied'], 1)
+        # Llegan tarde: uno anterior al aprobado y un retroceso a PENDING
+        self._post('DECLINED', timestamp=1700000050)
+        self._post('PENDING', timestamp=1700000200)
+        stats = process_payment_events()
+        self.assertEqual(stats['stale'], 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'approved')
+        self.assertFalse(PaymentEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_webhook_rejects_get(self):
+        response = self.client.get('/webhooks/wompi/')
+        self.assertEqual(response.status_code, 405)
+
+    def test_checkout_result_renders_without_transaction(self):
+        response = self.client.get(
+            reverse('store:checkout_result'), {'ref': self.order.number},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['status'], 'pending')
+
+
+class WompiClientTests(TestCase):
+    """Tests para WompiClient contra un servidor Wompi local simulado"""
+
+    def setUp(self):
+        cache.clear()
+        self.hits = {'merchants': 0, 'transactions': 0}
+        self.fail_next = []
+        test = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                endpoint = self.path.strip('/').split('/')[0]
+                test.hits[endpoint] = test.hits.get(endpoint, 0) + 1
+                if test.fail_next:
+                    test.fail_next.pop()
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                if endpoint == 'merchants':
+                    data = {'presigned_acceptance': {'acceptance_token': 'tok-123'}}
+                else:
+                    data = {'id': self.path.rsplit('/', 1)[-1], 'status': 'APPROVED'}
+                payload = json.dumps({'data': data}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self):
+        return WompiClient(base_url=self.base, timeout=5)
+
+    def test_acceptance_token_is_cached(self):
+        client = self._client()
+        self.assertEqual(client.get_acceptance_token(), 'tok-123')
+        self.assertEqual(self._client().get_acceptance_token(), 'tok-123')
+        self.assertEqual(self.hits['merchants'], 1)
+
+    def test_transaction_retries_transient_errors(self):
+        client = self._client()
+        self.fail_next.append(True)
+        data = client.get_transaction('tx-77')
+        self.assertEqual(data['status'], 'APPROVED')
+        self.assertEqual(self.hits['transactions'], 2)
+        metrics = client.metrics()['transactions']
+        self.assertEqual(metrics['calls'], 1)
+        self.assertEqual(metrics['errors'], 0)
+
+    def test_reconcile_command_applies_pending_orders(self):
+        old = timezone.now() - timedelta(hours=1)
+        for i in range(3):
+            Order.objects.create(
+                number=f'ORD-0070{i}', customer_name='Cliente',
+                wompi_transaction_id=f'tx-70{i}',
+            )
+        Order.objects.create(number='ORD-00799', customer_name='Sin transacción')
+        Order.objects.update(created_at=old)
+
+        out = StringIO()
+        with self.settings(WOMPI_API_BASE=self.base, WOMPI_PRIVATE_KEY=''):
+            call_command('reconcile_wompi_payments', stdout=out)
+        self.assertEqual(self.hits['transactions'], 3)
+        self.assertEqual(
+            Order.objects.filter(payment_status='approved').count(), 3,
+        )
+        self.assertIn('applied: 3', out.getvalue())
+
+    def test_checkout_result_caches_and_skips_settled_orders(self):
+        order = Order.objects.create(number='ORD-00810', customer_name='Cliente')
+        url = reverse('store:checkout_result')
+        with self.settings(WOMPI_API_BASE=self.base):
+            response = self.client.get(url, {'ref': order.number, 'id': 'tx-810'})
+            self.assertEqual(response.context['status'], 'approved')
+            order.refresh_from_db()
+            updated_at = order.updated_at
+            for _ in range(3):
+                self.client.get(url, {'ref': order.number, 'id': 'tx-810'})
+        order.refresh_from_db()
+        self.assertEqual(self.hits['transactions'], 1)
+        self.assertEqual(order.updated_at, updated_at)
+
+
+class CheckoutServiceTests(TestCase):
+    """Tests para la creación de órdenes del checkout en bloque"""
+
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=f'Taza {i}', price=Decimal('10000'), stock=10)
+            for i in range(5)
+        ]
+        self.customer = {
+            'name': 'Cliente', 'email': 'checkout@test.com',
+            'phone': '3000000000', 'document': '123',
+        }
+
+    def test_totals_and_items(self):
+        cart = [{'id': p.slug, 'qty': 2} for p in self.products[:3]]
+        cart.append({'id': 'hosting-pro', 'qty': 1, 'name': 'Hosting Pro', 'price': 50000})
+        order = create_order(self.customer, cart)
+        self.assertEqual(order.items.count(), 4)
+        # El plan se cobra al precio del catálogo, no al enviado por el navegador
+        self.assertEqual(order.subtotal, Decimal('310000'))
+        self.assertEqual(order.total, Decimal('322000'))
+        self.assertEqual(order.customer_email, 'checkout@test.com')
+
+    def test_query_count_does_not_grow_with_cart(self):
+        get_catalog()  # se carga una vez por proceso
+        counts = []
+        for size in (1, 5):
+            cart = [{'id': p.slug, 'qty': 1} for p in self.products[:size]]
+            with CaptureQueriesContext(connection) as ctx:
+                create_order(self.customer, cart)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class StockReservationTests(TestCase):
+    """Tests para las reservas de stock del checkout"""
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Camiseta', price=Decimal('50000'), stock=3,
+        )
+        self.customer = {'name': 'Cliente', 'email': 'stock@test.com'}
+
+    def _order(self, qty):
+        return create_order(self.customer, [{'id': self.product.slug, 'qty': qty}])
+
+    def test_reserve_and_reject_when_short(self):
+        self._order(2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        with self.assertRaises(InsufficientStock):
+            self._order(2)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_declined_payment_releases_and_approved_commits(self):
+        declined = self._order(2)
+        approved = self._order(1)
+        declined.payment_status = 'declined'
+        declined.save()
+        approved.payment_status = 'approved'
+        approved.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+        self.assertEqual(
+            list(approved.stock_reservations.values_list('status', flat=True)),
+            ['committed'],
+        )
+
+    def test_approval_after_decline_takes_stock_again(self):
+        order = self._order(2)
+        order.payment_status = 'declined'
+        order.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+        with patch('apps.store.signals.send_admin_notification') as admin:
+            order.payment_status = 'approved'
+            order.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertEqual(
+            list(order.stock_reservations.values_list('status', flat=True)), ['committed'],
+        )
+        self.assertNotIn('sin stock', ' '.join(c.kwargs['title'] for c in admin.call_args_list))
+
+    def test_approval_after_error_alerts_when_stock_is_gone(self):
+        order = self._order(2)
+        order.payment_status = 'error'
+        order.save()
+        self._order(3)  # otro comprador se lleva las unidades devueltas
+        with patch('apps.store.signals.send_admin_notification') as admin:
+            order.payment_status = 'approved'
+            order.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        titles = [c.kwargs['title'] for c in admin.call_args_list]
+        self.assertIn(f'Orden pagada sin stock suficiente • {order.number}', titles)
+
+    def test_sweeper_releases_expired(self):
+        self._order(3)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(release_expired(), (1, 3))
+        self.assertEqual(release_expired(), (0, 0))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_reservation_refreshes_cached_pages_and_etags(self):
+        invalidate_pages()
+        store_url = reverse('core:store')
+        detail_url = reverse('core:product_detail', args=[self.product.slug])
+        etags = {url: self.client.get(url)['ETag'] for url in (store_url, detail_url)}
+        self.assertEqual(self.client.get(detail_url)['X-Page-Cache'], 'hit')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._order(3)
+
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertNotContains(self.client.get(detail_url), 'En stock (3 disponibles)')
+        self.assertContains(self.client.get(store_url), 'Agotado')
+
+
+class StockReservationConcurrencyTests(TransactionTestCase):
+    """Muchos hilos reservando el mismo producto nunca sobrevenden"""
+
+    def test_parallel_reservations_do_not_oversell(self):
+        product = Product.objects.create(name='Gorra', price=Decimal('30000'), stock=10)
+        orders = [
+            Order.objects.create(number=f'ORD-09{i:03d}', customer_name='Cliente')
+            for i in range(30)
+        ]
+        results = []
+        barrier = threading.Barrier(len(orders))
+
+        def buy(order):
+            line = OrderItem(order=order, product=product, description='Gorra',
+                             quantity=1, unit_price=product.price)
+            barrier.wait()
+            try:
+                while True:
+                    try:
+                        with transaction.atomic():
+                            reserve_stock(order, [line])
+                        results.append(True)
+                        break
+                    except InsufficientStock:
+                        results.append(False)
+                        break
+                    except OperationalError:
+                        # SQLite no admite escrituras simultáneas: reintentar
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(o,)) for o in orders]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        product.refresh_from_db()
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(StockReservation.objects.count(), 10)
+
+
+class FieldTrackerTests(TestCase):
+    """Tests para el rastreo de cambios de Order/Quote sin SELECT previo"""
+
+    def setUp(self):
+        self.order = Order.objects.create(
+            number='ORD-TRK01', customer_name='Cliente', customer_email='trk@test.com',
+        )
+
+    def test_previous_and_has_changed(self):
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertFalse(order.has_changed('payment_status'))
+        order.payment_status = 'declined'
+        self.assertTrue(order.has_changed('payment_status'))
+        self.assertEqual(order.previous('payment_status'), 'pending')
+        order.save()
+        # Después de guardar, la foto se renueva
+        self.assertFalse(order.has_changed('payment_status'))
+        self.assertEqual(order.previous('payment_status'), 'declined')
+
+    def test_save_does_not_select_previous_state(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.notes = 'Nota interna'
+        with self.assertNumQueries(1):
+            order.save(update_fields=['notes'])
+        order.status = 'processing'
+        with self.assertNumQueries(1):
+            order.save()
+
+    def test_status_change_notifies_once(self):
+        order = Order.objects.get(pk=self.order.pk)
+        with patch('apps.store.signals.send_order_shipped') as shipped, \
+                patch('apps.store.signals.send_admin_notification'):
+            order.status = 'shipped'
+            order.save()
+            order.notes = 'Guía 123'
+            order.save()
+        self.assertEqual(shipped.call_count, 1)
+
+    def test_created_approved_order_sends_emails(self):
+        with patch('apps.store.signals.send_order_confirmation') as confirmation, \
+                patch('apps.store.signals.send_admin_notification') as admin:
+            order = Order.objects.create(
+                number='ORD-TRK02', customer_name='Cliente', customer_email='trk2@test.com',
+                payment_status='approved', status='confirmed',
+            )
+        confirmation.assert_called_once()
+        self.assertEqual(confirmation.call_args.kwargs['to'], 'trk2@test.com')
+        self.assertIn('Pago aprobado • ORD-TRK02', [c.kwargs['title'] for c in admin.call_args_list])
+        # Terminado el insert, la foto es la del valor guardado
+        self.assertEqual(order.previous('payment_status'), 'approved')
+        self.assertFalse(order.has_changed('payment_status'))
+
+    def test_deferred_field_is_not_loaded(self):
+        with self.assertNumQueries(1):
+            order = Order.objects.only('pk', 'number').get(pk=self.order.pk)
+        self.assertIsNone(order.previous('status'))
+        # Al cargarse el campo diferido queda en la foto
+        self.assertEqual(order.status, 'pending')
+        self.assertFalse(order.has_changed('status'))
+
+
+class PlanCatalogTests(TestCase):
+    """Tests para el catálogo de planes compartido"""
+
+    def setUp(self):
+        invalidate_catalog()
+
+    def test_plan_detail_uses_catalog(self):
+        response = self.client.get(reverse('core:plan_detail', args=['hosting-pro']))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Hosting Pro')
+        response = self.client.get(reverse('core:plan_detail', args=['no-existe']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_lookup_is_in_memory(self):
+        get_plan('hosting-pro')
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                self.assertEqual(get_plan('hosting-pro').title, 'Hosting Pro')
+
+    def test_edit_invalidates_catalog(self):
+        self.assertEqual(get_plan('hosting-pro').price, Decimal('250000'))
+        plan = Plan.objects.get(slug='hosting-pro')
+        plan.price = Decimal('260000')
+        with self.captureOnCommitCallbacks(execute=True):
+            plan.save()
+        self.assertEqual(get_plan('hosting-pro').price, Decimal('260000'))
+        with self.captureOnCommitCallbacks(execute=True):
+            plan.delete()
+        self.assertIsNone(get_plan('hosting-pro'))
+
+    def test_checkout_rejects_unknown_items_and_ignores_client_price(self):
+        customer = {
+            'name': 'Cliente', 'email': 'plan@test.com',
+            'phone': '3000000000', 'document': '123',
+        }
+        url = reverse('store:checkout')
+        response = self.client.post(url, json.dumps({
+            'items': [{'id': 'plan-inventado', 'qty': 1, 'name': 'Gratis', 'price': 1}],
+            'customer': customer,
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, json.dumps({
+            'items': [{'id': 'corporativo', 'qty': 1, 'name': 'Corporativo', 'price': 1}],
+            'customer': customer,
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(number=response.json()['order_number'])
+        self.assertEqual(order.total, 750000)
+        self.assertEqual(order.shipping_cost, 0)
+
+    def test_sitemap_lists_plans(self):
+        response = self.client.get('/sitemap-plans.xml')
+        self.assertContains(response, '/planes/presencia-web/')
+
+
+class PageCacheTests(TestCase):
+    """Tests para la caché de páginas públicas de visitantes anónimos"""
+
+    def setUp(self):
+        invalidate_pages()
+
+    def test_anonymous_pages_are_cached(self):
+        url = reverse('core:services')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.force_login(User.objects.create_user(
+            username='pc', email='pc@test.com', password='Clave-Segura-123',
+        ))
+        url = reverse('core:about')
+        self.client.get(url)
+        self.assertFalse(self.client.get(url).has_header('X-Page-Cache'))
+
+    def test_model_change_invalidates(self):
+        url = reverse('core:store')
+        self.client.get(url)
+        Product.objects.create(name='Taza Nueva', price=Decimal('10000'), stock=1)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Taza Nueva')
+
+    def test_csrf_token_is_per_visitor(self):
+        @cache_public_page
+        def view(request):
+            html = Template('<form>{% csrf_token %}</form>').render(RequestContext(request))
+            return HttpResponse(html)
+
+        factory = RequestFactory()
+        secrets = []
+        for _ in range(2):
+            request = factory.get('/formulario/')
+            request.user = AnonymousUser()
+            response = view(request)
+            token = re.search(r'value="([^"]+)"', response.content.decode()).group(1)
+            self.assertNotEqual(token, CSRF_PLACEHOLDER)
+            # El token del formulario corresponde a la cookie de este visitante
+            secrets.append(request.META['CSRF_COOKIE'])
+            self.assertEqual(_unmask_cipher_token(token), secrets[-1])
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotEqual(secrets[0], secrets[1])
+
+
+class ConditionalGetTests(TestCase):
+    """Tests para ETag/Last-Modified en páginas de catálogo"""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Gorra', price=Decimal('30000'), stock=3)
+
+    def test_product_detail_returns_304(self):
+        url = reverse('core:product_detail', args=[self.product.slug])
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_when_data_changes(self):
+        url = reverse('core:store')
+        etag = self.client.get(url)['ETag']
+        self.product.name = 'Gorra Negra'
+        self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_object_still_404(self):
+        url = reverse('core:product_detail', args=['no-existe'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(response.status_code, 404)
+
+    def test_plan_detail_and_sitemap(self):
+        for url in (reverse('core:plan_detail', args=['hosting-pro']), '/sitemap-plans.xml'):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class SitemapCacheTests(TestCase):
+    """Tests para el índice de sitemaps cacheado"""
+
+    def setUp(self):
+        invalidate_pages()
+        self.service = Service.objects.create(
+            name='Hosting Sitemap', description='Plan', price=100, billing_type='unique',
+        )
+
+    def test_index_lists_sections(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        for section in ('static', 'services', 'products', 'plans'):
+            self.assertContains(response, f'/sitemap-{section}.xml')
+
+    def test_cached_section_costs_no_queries(self):
+        url = '/sitemap-services.xml'
+        self.assertContains(self.client.get(url), self.service.get_absolute_url())
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_save_invalidates(self):
+        url = '/sitemap-services.xml'
+        self.client.get(url)
+        other = Service.objects.create(
+            name='Correo Sitemap', description='Plan', price=50, billing_type='unique',
+        )
+        self.assertContains(self.client.get(url), other.get_absolute_url())
+
+    def test_sections_are_paginated(self):
+        ServiceSitemap.limit = 1
+        try:
+            Service.objects.create(
+                name='Correo Sitemap', description='Plan', price=50, billing_type='unique',
+            )
+            response = self.client.get('/sitemap.xml')
+            self.assertContains(response, '/sitemap-services.xml?p=2')
+            self.assertEqual(self.client.get('/sitemap-services.xml?p=2').status_code, 200)
+        finally:
+            ServiceSitemap.limit = 5000
+
+    @override_settings(SITEMAP_GZIP=True)
+    def test_gzip_variant(self):
+        response = self.client.get('/sitemap-static.xml', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'<urlset', gzip.decompress(response.content))
+
+
+class GeoIndexTests(TestCase):
+    """Tests para el índice geográfico en memoria y sus endpoints"""
+
+    def setUp(self):
+        co = Country.objects.create(name='Colombia', iso2='CO', iso3='COL')
+        pe = Country.objects.create(name='Perú', iso2='PE', iso3='PER')
+        self.antioquia = State.objects.create(country=co, name='Antioquia')
+        cundinamarca = State.objects.create(country=co, name='Cundinamarca')
+        lima = State.objects.create(country=pe, name='Lima')
+        self.medellin = City.objects.create(state=self.antioquia, name='Medellín')
+        City.objects.create(state=self.antioquia, name='Marinilla')
+        City.objects.create(state=cundinamarca, name='Mosquera')
+        City.objects.create(state=lima, name='Miraflores')
+        self.co = co
+        invalidate_geo_index()
+
+    def test_states_and_cities_without_queries(self):
+        self.client.get(reverse('core:api_states'), {'country_id': self.co.pk})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('core:api_states'), {'country_id': self.co.pk})
+            self.assertEqual([s['name'] for s in response.json()], ['Antioquia', 'Cundinamarca'])
+            response = self.client.get(reverse('core:api_cities'), {'state_id': self.antioquia.pk})
+            self.assertEqual([c['name'] for c in response.json()], ['Marinilla', 'Medellín'])
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_etag_returns_304(self):
+        url = reverse('core:api_cities')
+        response = self.client.get(url, {'state_id': self.antioquia.pk})
+        response = self.client.get(
+            url, {'state_id': self.antioquia.pk}, HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_prefix_search_ignores_accents_and_case(self):
+        url = reverse('core:api_cities')
+        names = [c['name'] for c in self.client.get(url, {'q': 'MEDE'}).json()]
+        self.assertEqual(names, ['Medellín'])
+        names = [c['name'] for c in self.client.get(
+            url, {'q': 'm', 'country_id': self.co.pk},
+        ).json()]
+        self.assertEqual(names, ['Marinilla', 'Medellín', 'Mosquera'])
+        names = [c['name'] for c in self.client.get(
+            url, {'q': 'm', 'state_id': self.antioquia.pk},
+        ).json()]
+        self.assertEqual(names, ['Marinilla', 'Medellín'])
+
+    def test_edit_invalidates_index(self):
+        url = reverse('core:api_cities')
+        self.client.get(url, {'state_id': self.antioquia.pk})
+        City.objects.create(state=self.antioquia, name='Envigado')
+        names = [c['name'] for c in self.client.get(url, {'state_id': self.antioquia.pk}).json()]
+        self.assertIn('Envigado', names)
+
+    def test_signup_form_init_without_queries(self):
+        SignupForm()
+        with self.assertNumQueries(0):
+            form = SignupForm()
+            html = str(form['country']) + str(form['state'])
+        self.assertEqual(form.fields['country'].initial, self.co.pk)
+        self.assertIn('Antioquia', html)
+
+
+class LoadGeoDataTests(TestCase):
+    """Tests para el cargador en streaming de load_geo_data"""
+
+    DATA = [
+        {'name': 'Spain', 'iso2': 'ES', 'region': 'Europe', 'states': [
+            {'name': 'Madrid', 'cities': [{'name': 'Madrid'}]},
+        ]},
+        {'name': 'Colombia', 'iso2': 'CO', 'iso3': 'COL', 'phonecode': '57',
+         'region': 'Americas', 'states': [
+             {'name': 'Antioquia', 'iso2': 'ANT', 'cities': [
+                 {'name': 'Medellín'}, {'name': 'Envigado'}, {'name': 'Medellín'},
+             ]},
+             {'name': 'Cundinamarca', 'cities': [{'name': 'Mosquera'}]},
+         ]},
+        {'name': 'Perú', 'iso2': 'PE', 'region': 'Americas', 'states': [
+            {'name': 'Lima', 'cities': [{'name': 'Miraflores'}]},
+        ]},
+    ]
+
+    def _write(self, data, encoding='utf-8'):
+        f = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding=encoding)
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_iter_json_array_with_small_reads(self):
+        text = json.dumps(self.DATA, ensure_ascii=False)
+        items = list(iter_json_array(StringIO(text), read_size=7))
+        self.assertEqual(items, self.DATA)
+        self.assertEqual(list(iter_json_array(StringIO(' [ ] '))), [])
+        self.assertEqual(list(iter_json_array(StringIO(' ' * 20 + '[12, 345]'), read_size=7)), [12, 345])
+        for bad in (text[:-20], '[{"a": 1} {"b": 2}]', '[1,,2]', '[,1]', '[1,]', '[1 2]'):
+            with self.subTest(bad=bad[:20]), self.assertRaises(ValueError):
+                list(iter_json_array(StringIO(bad), read_size=7))
+
+    def test_file_with_bom(self):
+        call_command('load_geo_data', file=self._write(self.DATA, 'utf-8-sig'), stdout=StringIO())
+        self.assertEqual(Country.objects.count(), 2)
+
+    def test_loads_region_and_is_idempotent(self):
+        path = self._write(self.DATA)
+        call_command('load_geo_data', file=path, stdout=StringIO())
+
+        self.assertEqual(set(Country.objects.values_list('iso2', flat=True)), {'CO', 'PE'})
+        self.assertEqual(State.objects.count(), 3)
+        self.assertEqual(City.objects.filter(state__name='Antioquia').count(), 2)
+        self.assertEqual(State.objects.get(name='Antioquia').iso2, 'ANT')
+
+        data = [dict(c) for c in self.DATA]
+        data[1]['name'] = 'República de Colombia'
+        City.objects.create(state=State.objects.get(name='Lima'), name='Callao')
+        call_command('load_geo_data', file=self._write(data), stdout=StringIO())
+        self.assertEqual(Country.objects.get(iso2='CO').name, 'República de Colombia')
+        self.assertEqual(City.objects.count(), 5)
+
+
+@override_settings(**CAPTCHA_POOL_OVERRIDE)
+class EmailLookupTests(TestCase):
+    """Tests para la búsqueda de email indexada (login y registro)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='mixedcase', password='TestPass2026!', email='Mixed.Case@Example.com',
+        )
+
+    def test_with_email_uses_lower_expression(self):
+        qs = User.objects.with_email('  MIXED.case@example.COM ')
+        self.assertEqual(list(qs), [self.user])
+        self.assertIn('LOWER(', str(qs.query).upper())
+        self.assertNotIn('LIKE', str(qs.query).upper())
+
+    def test_backend_authenticates_case_insensitively(self):
+        backend = EmailBackend()
+        self.assertEqual(
+            backend.authenticate(None, username='mixed.case@EXAMPLE.com', password='TestPass2026!'),
+            self.user,
+        )
+        self.assertIsNone(backend.authenticate(None, username='nobody@example.com', password='x'))
+
+    def test_backend_prefers_oldest_duplicate(self):
+        User.objects.create_user(
+            username='dup', password='TestPass2026!', email='mixed.case@example.com',
+        )
+        user = EmailBackend().authenticate(
+            None, username='mixed.case@example.com', password='TestPass2026!',
+        )
+        self.assertEqual(user, self.user)
+
+    def test_signup_rejects_existing_email_any_case(self):
+        form = SignupForm(data={'email': 'MIXED.CASE@example.com'})
+        form.is_valid()
+        self.assertIn('email', form.errors)
+        self.assertIn('Ya existe', str(form.errors['email']))
+
+
+@override_settings(
+    RATE_LIMITS={'signup': (3, 600), 'login': (2, 300), 'service_detail': (1, 600)},
+    **CAPTCHA_POOL_OVERRIDE,
+)
+class RateLimitTests(TestCase):
+    """Tests para el limitador de peticiones por IP y ruta"""
+
+    def setUp(self):
+        cache.clear()
+        reset_rejection_metrics()
+        self.addCleanup(cache.clear)
+
+    def test_signup_rejected_before_any_query(self):
+        url = reverse('signup')
+        for _ in range(3):
+            self.assertNotEqual(self.client.post(url, {}).status_code, 429)
+        # Cliente sin sesión: ninguna consulta, ni siquiera la de la sesión
+        with self.assertNumQueries(0):
+            response = Client().post(url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # GET no cuenta ni se bloquea
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_limit_is_per_ip(self):
+        url = reverse('signup')
+        for _ in range(4):
+            self.client.post(url, {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertNotEqual(self.client.post(url, {}, REMOTE_ADDR='10.0.0.2').status_code, 429)
+
+    def test_rotating_forwarded_for_does_not_reset_limit(self):
+        url = reverse('signup')
+        for i in range(4):
+            self.client.post(url, {}, REMOTE_ADDR='10.0.0.3', HTTP_X_FORWARDED_FOR=f'1.2.3.{i}')
+        response = self.client.post(url, {}, REMOTE_ADDR='10.0.0.3', HTTP_X_FORWARDED_FOR='1.2.3.9')
+        self.assertEqual(response.status_code, 429)
+
+    def test_client_ip_from_proxy_headers(self):
+        factory = RequestFactory()
+        request = factory.get('/', HTTP_X_REAL_IP='203.0.113.5', HTTP_X_FORWARDED_FOR='6.6.6.6')
+        self.assertEqual(get_client_ip(request), '203.0.113.5')
+        request = factory.get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.5, 10.0.0.1')
+        self.assertEqual(get_client_ip(request), '127.0.0.1')
+        with self.settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(get_client_ip(request), '203.0.113.5')
+
+    def test_login_limited_and_metrics_recorded(self):
+        url = reverse('login')
+        for _ in range(2):
+            self.client.post(url, {'username': 'x@example.com', 'password': 'y'})
+        self.assertEqual(self.client.post(url, {'username': 'x', 'password': 'y'}).status_code, 429)
+        self.client.post(url, {'username': 'x', 'password': 'y'})
+        self.assertEqual(rejection_metrics()['login'], 2)
+
+    def test_service_detail_rejects_with_json(self):
+        service = Service.objects.create(
+            name='Hosting RL', slug='hosting-rl', description='d', price=1000,
+            billing_type='unique', is_active=True,
+        )
+        url = reverse('core:service_detail', args=[service.slug])
+        self.client.post(url, {})
+        response = self.client.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.json()['success'])
+
+    def test_sliding_window_weights_previous_window(self):
+        start = 600 * 1000
+        for _ in range(3):
+            self.assertTrue(hit('signup', '10.0.0.9', now=start + 500)[0])
+        # Al inicio de la siguiente ventana la anterior todavía pesa casi entera
+        self.assertFalse(hit('signup', '10.0.0.9', now=start + 610)[0])
+        # Cerca del final ya casi no pesa
+        self.assertTrue(hit('signup', '10.0.0.9', now=start + 1190)[0])
+
+    def test_concurrent_hits_are_counted_atomically(self):
+        results = []
+
+        def worker():
+            for _ in range(10):
+                results.append(hit('signup', '10.0.0.7', now=600 * 2000 + 1)[0])
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results.count(True), 3)
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_can_be_disabled(self):
+        url = reverse('signup')
+        for _ in range(5):
+            self.assertNotEqual(self.client.post(url, {}).status_code, 429)
+
+
+class CustomerOrdersTests(TestCase):
+    """Tests para las órdenes ligadas al cliente en el panel"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='comprador', password='TestPass2026!', email='Comprador@Test.com',
+        )
+        self.other = User.objects.create_user(
+            username='otro', password='TestPass2026!', email='otro@test.com',
+        )
+
+    def _order(self, number, **kwargs):
+        kwargs.setdefault('customer_name', 'Cliente')
+        return Order.objects.create(number=number, **kwargs)
+
+    def test_customer_resolved_on_create(self):
+        by_email = self._order('ORD-C1', customer_email='comprador@test.com', total=1000)
+        by_creator = self._order('ORD-C2', customer_email='', created_by=self.user)
+        # Un pedido creado por otro para este email es de este cliente
+        for_user = self._order('ORD-C3', customer_email='COMPRADOR@test.com', created_by=self.other)
+        guest = self._order('ORD-C4', customer_email='nadie@test.com')
+        # El staff registra un pedido para un email sin cuenta: no es suyo
+        entered = self._order('ORD-C4B', customer_email='nadie@test.com', created_by=self.other)
+        self.assertEqual(by_email.customer, self.user)
+        self.assertEqual(by_creator.customer, self.user)
+        self.assertEqual(for_user.customer, self.user)
+        self.assertIsNone(guest.customer)
+        self.assertIsNone(entered.customer)
+
+    def test_signup_claims_order_entered_by_staff(self):
+        order = self._order('ORD-C5B', customer_email='cliente@test.com', created_by=self.other)
+        owner = User.objects.create_user(
+            username='cliente', password='TestPass2026!', email='cliente@test.com',
+        )
+        order.refresh_from_db()
+        self.assertEqual(order.customer, owner)
+        self.client.force_login(owner)
+        self.assertEqual(
+            self.client.get(reverse('core:panel_compra_detail', args=[order.pk])).status_code, 200,
+        )
+
+    def test_email_change_reassigns_customer(self):
+        order = self._order('ORD-C5C', customer_email='otro@test.com')
+        self.assertEqual(order.customer, self.other)
+        order.customer_email = 'comprador@test.com'
+        order.save(update_fields=['customer_email'])
+        order.refresh_from_db()
+        self.assertEqual(order.customer, self.user)
+        order.customer_email = 'nadie@test.com'
+        order.save()
+        order.refresh_from_db()
+        self.assertIsNone(order.customer)
+
+    def test_signup_claims_guest_orders(self):
+        guest = self._order('ORD-C5', customer_email='Nuevo@test.com')
+        new_user = User.objects.create_user(
+            username='nuevo', password='TestPass2026!', email='nuevo@test.com',
+        )
+        guest.refresh_from_db()
+        self.assertEqual(guest.customer, new_user)
+
+    def test_backfill_command(self):
+        a = self._order('ORD-C6', customer_email='comprador@test.com')
+        b = self._order('ORD-C7', customer_email='', created_by=self.other)
+        c = self._order('ORD-C8', customer_email='x@test.com', created_by=self.other)
+        Order.objects.update(customer=None)
+        out = StringIO()
+        call_command('backfill_order_customers', batch_size=2, stdout=out)
+        self.assertIn('revisadas: 3, ligadas a un cliente: 2', out.getvalue())
+        for order in (a, b, c):
+            order.refresh_from_db()
+        self.assertEqual((a.customer, b.customer, c.customer), (self.user, self.other, None))
+
+    def test_panel_summary_cached_and_invalidated(self):
+        self._order('ORD-C9', customer_email='comprador@test.com', total=1000, payment_status='approved')
+        self._order('ORD-C10', customer_email='comprador@test.com', total=500)
+        self._order('ORD-C11', customer_email='otro@test.com', total=700, payment_status='approved')
+        self.client.force_login(self.user)
+        url = reverse('core:panel_home')
+        response = self.client.get(url)
+        self.assertEqual(response.context['total_orders'], 2)
+        self.assertEqual(response.context['total_spent'], Decimal('1000'))
+
+        with self.assertNumQueries(0):
+            client_summary(self.user)
+
+        self._order('ORD-C12', customer_email='comprador@test.com', total=250, payment_status='approved')
+        response = self.client.get(url)
+        self.assertEqual(response.context['total_orders'], 3)
+        self.assertEqual(response.context['total_spent'], Decimal('1250'))
+        self.assertEqual(response.context['recent_orders'][0].number, 'ORD-C12')
+
+    def test_panel_compras_lists_only_own_orders(self):
+        mine = self._order('ORD-C13', customer_email='comprador@test.com')
+        theirs = self._order('ORD-C14', customer_email='otro@test.com')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:panel_compras'))
+        self.assertEqual([o.number for o in response.context['orders']], ['ORD-C13'])
+        self.assertEqual(
+            self.client.get(reverse('core:panel_compra_detail', args=[mine.pk])).status_code, 200,
+        )
+        self.assertEqual(
+            self.client.get(reverse('core:panel_compra_detail', args=[theirs.pk])).status_code, 403,
+        )
+
+
+class PanelSummaryTests(TestCase):
+    """Tests para el resumen cacheado de panel_home"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='panelsum', password='TestPass2026!', email='panelsum@test.com',
+        )
+        self.client_obj = ClientModel.objects.create(
+            name='Cliente Panel', email='panelsum@test.com', user=self.user,
+        )
+        self.today = date.today()
+        for i, status in enumerate(('active', 'active', 'cancelled')):
+            svc = Service.objects.create(
+                name=f'Plan panel {i}', description='d', price=1000, billing_type='annual',
+            )
+            ClientService.objects.create(
+                client=self.client_obj, service=svc, status=status,
+                start_date=self.today, monthly_price=1000,
+            )
+        CuentaDeCobro.objects.create(
+            number='CC-P1', client=self.client_obj, created_by=self.user,
+            issue_date=self.today, due_date=self.today,
+        )
+        Order.objects.create(
+            number='ORD-P1', customer_name='C', customer_email='panelsum@test.com',
+            total=4000, payment_status='approved',
+        )
+        cache.clear()
+
+    def test_counts_in_one_query_and_cached(self):
+        # 1 consulta de contadores + 3 listas de recientes
+        with self.assertNumQueries(4):
+            summary = client_summary(self.user)
+        self.assertEqual(summary['client'], self.client_obj)
+        self.assertEqual(summary['active_services_count'], 2)
+        self.assertEqual(len(summary['services']), 3)
+        self.assertEqual(summary['total_cuentas'], 1)
+        self.assertEqual(summary['total_orders'], 1)
+        self.assertEqual(summary['total_spent'], 4000)
+        with self.assertNumQueries(0):
+            client_summary(self.user)
+
+    def test_user_without_client_or_orders(self):
+        other = User.objects.create_user(
+            username='vacio', password='TestPass2026!', email='vacio@test.com',
+        )
+        with self.assertNumQueries(1):
+            summary = client_summary(other)
+        self.assertIsNone(summary['client'])
+        self.assertEqual(
+            (summary['total_orders'], summary['total_spent'], summary['total_cuentas']),
+            (0, 0, 0),
+        )
+
+    def test_invalidated_by_client_rows(self):
+        client_summary(self.user)
+        ClientService.objects.filter(status='cancelled').get().delete()
+        self.assertEqual(len(client_summary(self.user)['services']), 2)
+        cs = ClientService.objects.filter(client=self.client_obj).first()
+        cs.status = 'inactive'
+        cs.save()
+        self.assertEqual(client_summary(self.user)['active_services_count'], 1)
+        CuentaDeCobro.objects.create(
+            number='CC-P2', client=self.client_obj, created_by=self.user,
+            issue_date=self.today, due_date=self.today,
+        )
+        self.assertEqual(client_summary(self.user)['total_cuentas'], 2)
+
+    def test_panel_home_renders_summary(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:panel_home'))
+        self.assertContains(response, 'Plan panel 0')
+        self.assertContains(response, 'CC-P1')
+        self.assertContains(response, 'ORD-P1')
+
+
+class ServiceCategoryTests(TestCase):
+    """Tests para la categoría precalculada de Service"""
+
+    def _service(self, name, description='Servicio'):
+        return Service.objects.create(
+            name=name, description=description, price=1000, billing_type='annual',
+        )
+
+    def test_classified_on_save(self):
+        self.assertEqual(self._service('Correo Corporativo').category, Service.CATEGORY_EMAIL)
+        self.assertEqual(self._service('Plan', 'Incluye buzón IMAP').category, Service.CATEGORY_EMAIL)
+        hosting = self._service('Hosting Pro', 'Alojamiento web')
+        self.assertEqual(hosting.category, Service.CATEGORY_GENERAL)
+
+        hosting.name = 'Google Workspace'
+        hosting.save(update_fields=['name'])
+        hosting.refresh_from_db()
+        self.assertEqual(hosting.category, Service.CATEGORY_EMAIL)
+
+    def test_is_email_service_uses_category(self):
+        client = ClientModel.objects.create(name='Cat', email='cat@test.com')
+        mail = ClientService.objects.create(
+            client=client, service=self._service('Email Pro'),
+            start_date=date.today(), monthly_price=1000,
+        )
+        ClientService.objects.create(
+            client=client, service=self._service('Hosting Básico'),
+            start_date=date.today(), monthly_price=1000,
+        )
+        self.assertEqual(
+            list(ClientService.objects.filter(service__category=Service.CATEGORY_EMAIL)), [mail],
+        )
+        rows = list(ClientService.objects.select_related('service'))
+        with self.assertNumQueries(0):
+            flags = sorted(cs.is_email_service for cs in rows)
+        self.assertEqual(flags, [False, True])
+
+    def test_classify_command_fixes_bulk_updates(self):
+        svc = self._service('Hosting')
+        Service.objects.filter(pk=svc.pk).update(name='Cuenta de correo')
+        out = StringIO()
+        call_command('classify_services', stdout=out)
+        svc.refresh_from_db()
+        self.assertEqual(svc.category, Service.CATEGORY_EMAIL)
+        self.assertIn('reclasificados: 1', out.getvalue())
+
+
+class DashboardListRowsTests(TestCase):
+    """Tests para las filas armadas de la lista genérica del dashboard"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='listadmin', password='TestPass2026!', email='listadmin@test.com',
+            role='admin',
+        )
+        self.acme = ClientModel.objects.create(
+            name='<b>Acme</b>', email='acme@test.com', phone='', company='ACME',
+        )
+        HomeClientLogo.objects.create(name='Logo activo', order=0, is_active=True)
+        HomeClientLogo.objects.create(name='Logo oculto', order=2, is_active=False)
+
+    def test_list_rows_shapes_cells(self):
+        rows = list_rows(
+            HomeClientLogo.objects.order_by('name'),
+            [('name', 'Nombre'), ('order', 'Orden'), ('is_active', 'Activo')],
+            'core:dashboard_home_logo_edit',
+        )
+        logo = HomeClientLogo.objects.get(name='Logo activo')
+        self.assertEqual(rows[0][0], reverse('core:dashboard_home_logo_edit', args=[logo.pk]))
+        self.assertEqual(rows[0][1][1], ('text-gray-300', '-'))  # 0 se muestra como "-"
+        self.assertEqual(rows[0][1][2], ACTIVE_CELL)
+        self.assertEqual(rows[1][1][1], ('text-gray-300', 2))
+        self.assertEqual(rows[1][1][2], INACTIVE_CELL)
+
+    def test_choices_use_display_label(self):
+        Service.objects.create(name='Hosting L', description='d', price=1, billing_type='annual')
+        rows = list_rows(
+            Service.objects.filter(name='Hosting L'), [('billing_type', 'Facturación')], 'core:dashboard_service_detail',
+        )
+        self.assertEqual(rows[0][1][0], ('text-gray-300', 'Anual'))
+
+    def test_clients_list_view(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('core:dashboard_clients'))
+        self.assertContains(response, '1 registro')
+        self.assertContains(response, '&lt;b&gt;Acme&lt;/b&gt;')
+        self.assertContains(response, reverse('core:dashboard_client_detail', args=[self.acme.pk]))
+        self.assertEqual(len(response.context['rows']), 1)
+
+
+def _image_bytes(size=(800, 400), fmt='JPEG', mode='RGB', orientation=None):
+    image = Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = 'Camara'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    buf = BytesIO()
+    image.save(buf, fmt, **({'exif': exif} if fmt == 'JPEG' else {}))
+    return buf.getvalue()
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media, IMAGE_DERIVATIVES_SYNC=True)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def _logo(self, content, name='logo.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            logo = HomeClientLogo(name='Acme')
+            logo.image.save(name, ContentFile(content))
+        return logo
+
+    def _open(self, storage, name):
+        with storage.open(name) as fh:
+            image = Image.open(fh)
+            image.load()
+        return image
+
+    def test_upload_generates_resized_derivatives_without_metadata(self):
+        logo = self._logo(_image_bytes(orientation=6))
+        storage, name = logo.image.storage, logo.image.name
+        for width in (160, 320):
+            webp = self._open(storage, derivative_name(name, width, 'webp'))
+            jpeg = self._open(storage, derivative_name(name, width, 'jpeg'))
+            # Orientación 6: el original de 800x400 se ve vertical
+            self.assertEqual(webp.size, (width, width * 2))
+            self.assertEqual(jpeg.size, (width, width * 2))
+            self.assertEqual(len(jpeg.getexif()), 0)
+            self.assertNotIn('icc_profile', jpeg.info)
+
+    def test_does_not_upscale_and_keeps_alpha(self):
+        logo = self._logo(_image_bytes((100, 50), fmt='PNG', mode='RGBA'), name='logo.png')
+        png = self._open(logo.image.storage, derivative_name(logo.image.name, 320, 'png'))
+        self.assertEqual(png.size, (100, 50))
+        self.assertEqual(png.mode, 'RGBA')
+
+    def test_picture_tag(self):
+        template = Template('{% load image_tags %}{% picture logo.image alt=logo.name class="x" sizes="160px" %}')
+
+        pending = HomeClientLogo(name='Pendiente')
+        pending.image.save('p.jpg', ContentFile(_image_bytes()), save=False)
+        html = template.render(Context({'logo': pending}))
+        self.assertTrue(html.startswith('<img'))
+        self.assertNotIn('srcset', html)
+
+        logo = self._logo(_image_bytes())
+        html = template.render(Context({'logo': logo}))
+        base = logo.image.url.rsplit('.', 1)[0]
+        self.assertIn(f'<source type="image/webp" srcset="{base}.w160.webp 160w, {base}.w320.webp 320w"', html)
+        self.assertIn(f'srcset="{base}.w160.jpg 160w, {base}.w320.jpg 320w"', html)
+        self.assertIn(f'src="{logo.image.url}"', html)
+        self.assertIn('alt="Acme"', html)
+
+    def test_backfill_command(self):
+        logo = HomeClientLogo(name='Viejo')
+        logo.image.save('viejo.jpg', ContentFile(_image_bytes()), save=False)
+        HomeClientLogo.objects.bulk_create([logo])
+        storage = logo.image.storage
+
+        call_command('generate_image_derivatives', workers=2, field=['core.homeclientlogo.image'], stdout=StringIO())
+        self.assertTrue(storage.exists(derivative_name(logo.image.name, 320, 'webp')))
+        cache.clear()
+        out = StringIO()
+        call_command('generate_image_derivatives', field=['core.homeclientlogo.image'], stdout=out)
+        self.assertIn('Sin imágenes pendientes', out.getvalue())
+
+
+@override_settings(CAPTCHA_POOL_SIZE=5, **CAPTCHA_POOL_OVERRIDE)
+class CaptchaPoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = patch.object(
+            captcha_pool.captcha_settings, 'get_challenge', return_value=lambda: ('WXYZ', 'wxyz'),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = captcha_pool
+
+    def test_fill_and_take_from_pool(self):
+        self.assertEqual(self.pool.fill(), 5)
+        self.assertEqual(self.pool.fill(), 0)
+        self.assertEqual(CaptchaStore.objects.count(), 0)
+
+        with self.assertNumQueries(0):
+            key = self.pool.take()
+        self.assertEqual(self.pool.pool_metrics(), {'size': 4, 'target': 5, 'served': 1, 'misses': 0})
+
+        response = self.client.get(reverse('captcha-pool-image', kwargs={'key': key}))
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+
+        self.assertTrue(self.pool.check(key, ' WXYZ '))
+        self.assertFalse(self.pool.check(key, 'wxyz'))  # un solo uso
+        self.assertEqual(self.client.get(reverse('captcha-pool-image', kwargs={'key': key})).status_code, 410)
+
+    def test_wrong_answer_consumes_key(self):
+        self.pool.fill()
+        key = self.pool.take()
+        self.assertFalse(self.pool.check(key, 'abcd'))
+        self.assertFalse(self.pool.check(key, 'wxyz'))
+
+    def test_empty_pool_renders_inline(self):
+        key = self.pool.take()
+        self.assertTrue(self.pool.check(key, 'wxyz'))
+        self.assertEqual(self.pool.pool_metrics()['misses'], 1)
+        # La cabeza quedó adelante de la cola: el siguiente llenado la alcanza
+        self.assertEqual(self.pool.fill(), 5)
+        self.assertEqual(self.pool.pool_size(), 5)
+
+    def test_contact_form_uses_pool(self):
+        self.pool.fill()
+        html = str(ContactForm()['captcha'])
+        key = re.search(r'name="captcha_0" value="(\w+)"', html).group(1)
+        self.assertIn(reverse('captcha-pool-image', kwargs={'key': key}), html)
+        self.assertEqual(self.pool.pool_size(), 4)
+
+        data = {'name': 'Ana', 'email': 'ana@test.com', 'message': 'Hola', 'captcha_0': key}
+        self.assertFalse(ContactForm({**data, 'captcha_1': 'nope'}).is_valid())
+        self.assertFalse(ContactForm({**data, 'captcha_1': 'wxyz'}).is_valid())  # clave ya consumida
+
+        data['captcha_0'] = self.pool.take()
+        self.assertTrue(ContactForm({**data, 'captcha_1': 'WXYZ'}).is_valid())
+
+    @override_settings(**EMAIL_BACKEND_OVERRIDE)
+    def test_quote_modal_gets_new_captcha_after_error(self):
+        User.objects.create_user(username='captchaadmin', password='AdminPass2026!', role='admin')
+        service = Service.objects.create(name='Web Dev', description='d', price=1, is_active=True)
+        url = reverse('core:service_detail', args=[service.slug])
+        self.assertFalse(self.client.get(url).has_header('ETag'))
+
+        data = {
+            'name': 'Juan', 'email': 'no-es-email', 'phone': '3001234567',
+            'service': service.pk, 'captcha_0': self.pool.take(), 'captcha_1': 'wxyz',
+        }
+        response = self.client.post(url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+        self.assertFalse(response['success'])
+        self.assertEqual(list(response['errors']), ['email'])
+        self.assertEqual(
+            response['captcha']['image_url'],
+            reverse('captcha-pool-image', kwargs={'key': response['captcha']['key']}),
+        )
+
+        data.update(email='juan@test.com', captcha_0=response['captcha']['key'])
+        response = self.client.post(url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+        self.assertTrue(response['success'])
+        self.assertEqual(Quote.objects.count(), 1)
+
+    def test_sweep_expired_rows(self):
+        past = timezone.now() - timedelta(minutes=1)
+        CaptchaStore.objects.bulk_create([
+            CaptchaStore(challenge='A', response='a', hashkey=f'old{i}', expiration=past) for i in range(7)
+        ])
+        CaptchaStore.objects.create(challenge='B', response='b')
+        self.assertEqual(self.pool.sweep_expired(batch_size=3), 7)
+        self.assertEqual(CaptchaStore.objects.count(), 1)
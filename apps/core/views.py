@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Max, Sum, Q
 from django.utils import timezone
 from django.conf import settings
 from django.urls import reverse
@@ -12,11 +12,17 @@ from apps.clients.models import Client
 from apps.services.models import Service, ClientService, ClientEmailAccount
 from apps.accounts.models import User
 from apps.store.models import Product, ProductCategory, Order
+from apps.store.plans import get_plan
 from .models import HomeClientLogo, HomeTestimonial
+from .conditional import conditional_page, latest_subquery
+from .page_cache import cache_public_page
+from .ratelimit import rate_limit
 from .forms import ContactForm
 from apps.core.emails import send_admin_notification, send_generic_notification
+from apps.core.email_rendering import render_email
 
 
+@cache_public_page
 def home(request):
     """
     Vista principal del sitio - Home comercial
@@ -30,11 +36,12 @@ def home(request):
         'automatizacion': 'Automatización de Procesos',
         'consultoria': 'Consultoría Digital',
     }
-    top_services = {}
-    for key, name in top_names.items():
-        svc = Service.objects.filter(name=name, is_active=True).first()
-        if svc:
-            top_services[key] = svc
+    by_name = {}
+    for svc in Service.objects.filter(name__in=top_names.values(), is_active=True):
+        by_name.setdefault(svc.name, svc)
+    top_services = {
+        key: by_name[name] for key, name in top_names.items() if name in by_name
+    }
 
     logos = HomeClientLogo.objects.filter(is_active=True).order_by('order', 'name')
     testimonials = HomeTestimonial.objects.filter(is_active=True).order_by('order', '-created_at')
@@ -133,6 +140,7 @@ def dashboard(request):
     return render(request, 'core/dashboard.html', context)
 
 
+@cache_public_page
 def about(request):
     """
     Página sobre nosotros
@@ -140,6 +148,7 @@ def about(request):
     return render(request, 'core/about.html')
 
 
+@rate_limit('contact')
 def contact(request):
     """
     Página de contacto
@@ -167,6 +176,7 @@ def contact(request):
                 body=body,
                 cta_url=dash_url,
                 cta_label='Abrir dashboard',
+                event_type='contact',
             )
         except Exception:
             pass
@@ -194,16 +204,29 @@ def contact(request):
     return render(request, 'core/contact.html', {'form': form})
 
 
+@cache_public_page
 def terms(request):
     """Términos y condiciones."""
     return render(request, 'core/terms.html')
 
 
+@cache_public_page
 def privacy(request):
     """Política de privacidad."""
     return render(request, 'core/privacy.html')
 
 
+def _store_state(request):
+    state = Product.objects.aggregate(
+        updated=Max('updated_at'),
+        categories=Max(latest_subquery(ProductCategory)),
+        count=Count('pk'),
+    )
+    return state if state['count'] else None
+
+
+@conditional_page(_store_state)
+@cache_public_page
 def store(request):
     """
     Página de la tienda
@@ -220,221 +243,18 @@ def store(request):
     })
 
 
+def _plan_state(request, slug):
+    plan = get_plan(slug)
+    return {'updated': plan.updated_at} if plan else None
+
+
+@conditional_page(_plan_state)
+@cache_public_page
 def plan_detail(request, slug):
     """
     Página de detalle para planes (web, hosting, e-commerce, wordpress, etc.).
     """
-    plans = {
-        # Web
-        'presencia-web': {
-            'title': 'Presencia Web', 'price': 350000, 'period': 'año', 'icon': 'fa-file-alt',
-            'image': 'https://source.unsplash.com/640x640/?website,landing,ui,ux&sig=1',
-            'description': (
-                'Construye una landing page moderna enfocada en conversión, con '
-                'diseño responsive, SEO base y tiempos de carga optimizados para '
-                'validar tu propuesta y captar contactos desde el primer día.'
-            ),
-            'features': [
-                'Landing page de 1 página', 'Hosting 5 GB SSD', 'Dominio .com incluido',
-                'Certificado SSL', '2 cuentas de correo', 'Diseño responsive'
-            ]
-        },
-        'corporativo': {
-            'title': 'Corporativo', 'price': 750000, 'period': 'año', 'icon': 'fa-building',
-            'image': 'https://source.unsplash.com/640x640/?corporate,office,business&sig=2',
-            'description': (
-                'Sitio corporativo con arquitectura clara, múltiples secciones, '
-                'formularios inteligentes, analítica integrada y base SEO; '
-                'escalable y fácil de administrar para crecer con tu negocio.'
-            ),
-            'features': [
-                'Hasta 5 secciones', 'Hosting 20 GB SSD', 'Dominio .com incluido',
-                'SSL gratis', '10 correos corporativos', 'SEO básico + Analytics', 'Formulario de contacto'
-            ]
-        },
-        'e-commerce': {
-            'title': 'E-Commerce', 'price': 1200000, 'period': 'año', 'icon': 'fa-shopping-cart',
-            'image': 'https://source.unsplash.com/640x640/?ecommerce,shopping,cart,online-store&sig=3',
-            'description': (
-                'Tienda en línea lista para vender con catálogo administrable, '
-                'pasarela de pagos, seguridad, SEO base y checkout optimizado '
-                'para mejorar conversión.'
-            ),
-            'features': [
-                'Hasta 50 productos', 'Hosting 40 GB SSD', 'Dominio .com incluido',
-                'SSL gratis', '20 correos', 'Pasarela de pagos', 'SEO avanzado + Analytics'
-            ]
-        },
-        'empresarial': {
-            'title': 'Empresarial', 'price': 2500000, 'period': 'año', 'icon': 'fa-city',
-            'image': 'https://source.unsplash.com/640x640/?enterprise,city,skyscraper,headquarters&sig=4',
-            'description': (
-                'Proyecto a medida con integraciones a ERP/CRM, seguridad '
-                'avanzada, rendimiento y soporte 24/7; pensado para '
-                'operaciones críticas y crecimiento sostenido.'
-            ),
-            'features': [
-                'Sitio a medida ilimitado', 'Hosting 100 GB SSD + CDN', 'Dominio .com + .co',
-                'SSL premium', 'Correos ilimitados', 'SEO + Marketing básico', 'Soporte 24/7', 'Backups diarios'
-            ]
-        },
-        # Hosting & Email
-        'hosting-basico': {
-            'title': 'Hosting Básico', 'price': 120000, 'period': 'año', 'icon': 'fa-hdd',
-            'image': 'https://source.unsplash.com/640x640/?server,datacenter,hosting&sig=5',
-            'description': (
-                'Alojamiento confiable con SSD, SSL, cPanel y copias de '
-                'seguridad para proyectos personales o pequeños sitios que '
-                'requieren estabilidad y buen rendimiento.'
-            ),
-            'features': [
-                '5 GB SSD', 'Ancho de banda ilimitado', '1 sitio web', 'SSL gratis', 'cPanel', 'Backups semanales'
-            ]
-        },
-        'hosting-pro': {
-            'title': 'Hosting Pro', 'price': 250000, 'period': 'año', 'icon': 'fa-server',
-            'image': 'https://source.unsplash.com/640x640/?servers,datacenter,rack&sig=6',
-            'description': (
-                'Recursos generosos, sitios ilimitados, backups diarios y '
-                'dominio incluido; ideal para negocios en crecimiento que '
-                'necesitan disponibilidad y velocidad.'
-            ),
-            'features': [
-                '30 GB SSD', 'Ancho de banda ilimitado', 'Sitios ilimitados', 'SSL gratis',
-                'cPanel + Softaculous', 'Backups diarios', 'Dominio .com 1er año'
-            ]
-        },
-        'email-profesional': {
-            'title': 'Email Profesional', 'price': 180000, 'period': 'año', 'icon': 'fa-envelope-open-text',
-            'image': 'https://source.unsplash.com/640x640/?email,inbox,communication&sig=7',
-            'description': (
-                'Correo corporativo con alta entregabilidad, antispam y '
-                'antivirus, acceso IMAP/POP3/SMTP y compatibilidad con '
-                'Outlook y Gmail.'
-            ),
-            'features': [
-                '5 cuentas de correo', '5 GB por buzón', 'Webmail + IMAP/POP3/SMTP',
-                'Antispam y antivirus', 'Compatible Outlook/Gmail', 'Dominio .com incluido'
-            ]
-        },
-        'cloud-empresarial': {
-            'title': 'Cloud Empresarial', 'price': 450000, 'period': 'año', 'icon': 'fa-cloud',
-            'image': 'https://source.unsplash.com/640x640/?cloud,cloud-computing,saas&sig=8',
-            'description': (
-                'Infraestructura robusta con correos ilimitados, SSL premium, '
-                'CDN, políticas de seguridad y soporte prioritario para '
-                'organizaciones exigentes.'
-            ),
-            'features': [
-                '100 GB SSD', 'Correos ilimitados', 'Dominio .com + .co', 'SSL premium + CDN',
-                'Backups diarios', 'Soporte prioritario 24/7', 'Servidor dedicado'
-            ]
-        },
-        # E-commerce
-        'e-commerce-basico': {
-            'title': 'E-commerce Básico', 'price': 900000, 'period': 'año', 'icon': 'fa-store',
-            'image': 'https://source.unsplash.com/640x640/?shopping,bag,storefront&sig=9',
-            'description': (
-                'Todo lo esencial para empezar a vender: dominio, SSL, hosting '
-                'veloz y catálogo inicial administrable con experiencia de '
-                'compra sencilla.'
-            ),
-            'features': [
-                'Hasta 20 productos', 'Pasarela de pagos', 'Dominio .com + SSL', 'Hosting 20 GB SSD',
-                '3 cuentas de correo'
-            ]
-        },
-        'e-commerce-pro': {
-            'title': 'E-commerce Pro', 'price': 1300000, 'period': 'año', 'icon': 'fa-shopping-basket',
-            'image': 'https://source.unsplash.com/640x640/?ecommerce,logistics,shipping,cart&sig=10',
-            'description': (
-                'Catálogo amplio con variantes, envíos, automatizaciones e '
-                'integraciones clave que impulsan conversión y operaciones '
-                'diarias.'
-            ),
-            'features': [
-                'Hasta 200 productos', 'Variantes (talla/color)', 'Pagos + envíos', 'Integración WhatsApp',
-                'SEO y analítica básica'
-            ]
-        },
-        'e-commerce-avanzado': {
-            'title': 'E-commerce Avanzado', 'price': 2100000, 'period': 'año', 'icon': 'fa-boxes-stacked',
-            'image': 'https://source.unsplash.com/640x640/?warehouse,inventory,analytics&sig=11',
-            'description': (
-                'Catálogo ilimitado, integraciones con ERP/CRM, recuperación '
-                'de carrito, feeds de productos y performance optimizada '
-                'para escalar.'
-            ),
-            'features': [
-                'Catálogo ilimitado', 'Integraciones ERP/CRM', 'Carrito abandonado + email mkt',
-                'Google Merchant Center', 'SEO avanzado + performance'
-            ]
-        },
-        'marketplace': {
-            'title': 'Marketplace', 'price': 3800000, 'period': 'año', 'icon': 'fa-people-carry-box',
-            'image': 'https://source.unsplash.com/640x640/?marketplace,market,vendors&sig=12',
-            'description': (
-                'Plataforma multi-vendedor con onboarding/KYC, comisiones, '
-                'logística integrada y paneles para vendedores listos para '
-                'operar.'
-            ),
-            'features': [
-                'Múltiples vendedores', 'Comisiones y liquidaciones', 'Onboarding y KYC',
-                'Logística y envíos integrados', 'Panel para vendedores'
-            ]
-        },
-        # WordPress
-        'instalacion-basica': {
-            'title': 'Instalación Básica (WordPress)', 'price': 150000, 'period': 'único', 'icon': 'fa-download',
-            'image': 'https://source.unsplash.com/640x640/?wordpress,cms,blog&sig=13',
-            'description': (
-                'Implementación limpia de WordPress con hardening inicial y '
-                'checklist a producción para empezar con una base segura y '
-                'eficiente.'
-            ),
-            'features': [
-                'Instalación en hosting', 'Base de datos y configuración', 'Tema ligero preconfigurado'
-            ]
-        },
-        'seguridad-backup': {
-            'title': 'Seguridad & Backup (WordPress)', 'price': 220000, 'period': 'único', 'icon': 'fa-shield-alt',
-            'image': 'https://source.unsplash.com/640x640/?cybersecurity,shield,backup&sig=14',
-            'description': (
-                'Protección con firewall y antispam, monitoreo y backups '
-                'programados con restauración guiada para continuidad del '
-                'negocio.'
-            ),
-            'features': [
-                'Firewall + anti-spam', 'Backups automáticos', 'Certificado SSL'
-            ]
-        },
-        'velocidad-seo': {
-            'title': 'Velocidad & SEO (WordPress)', 'price': 260000, 'period': 'único', 'icon': 'fa-tachometer-alt',
-            'image': 'https://source.unsplash.com/640x640/?speedmeter,seo,performance&sig=15',
-            'description': (
-                'Optimización de Core Web Vitals, caché, minificación, '
-                'imágenes y bases de SEO on-page para mejorar '
-                'posicionamiento.'
-            ),
-            'features': [
-                'Cache + minificación', 'Optimización de imágenes', 'SEO on-page básico'
-            ]
-        },
-        'soporte-mensual': {
-            'title': 'Soporte Mensual (WordPress)', 'price': 180000, 'period': 'mes', 'icon': 'fa-life-ring',
-            'image': 'https://source.unsplash.com/640x640/?support,helpdesk,customer-service&sig=16',
-            'description': (
-                'Mantenimiento preventivo y correctivo, monitoreo constante y '
-                'horas de mejora para mantener tu sitio estable y '
-                'actualizado.'
-            ),
-            'features': [
-                'Actualizaciones core/plugins', 'Monitoreo uptime', 'Horas de soporte incluidas'
-            ]
-        },
-    }
-
-    plan = plans.get(slug)
+    plan = get_plan(slug)
     if not plan:
         from django.http import Http404
         raise Http404('Plan no encontrado')
@@ -445,6 +265,18 @@ def plan_detail(request, slug):
     }
     return render(request, 'core/plan_detail.html', context)
 
+def _product_state(request, slug):
+    state = Product.objects.aggregate(
+        updated=Max('updated_at'),
+        categories=Max(latest_subquery(ProductCategory)),
+        count=Count('pk'),
+        found=Count('pk', filter=Q(slug=slug, is_active=True)),
+    )
+    return state if state['found'] else None
+
+
+@conditional_page(_product_state)
+@cache_public_page
 def product_detail(request, slug):
     """
     Detalle de un producto de la tienda
@@ -469,6 +301,7 @@ def coffee(request):
     return render(request, 'core/coffee.html')
 
 
+@cache_public_page
 def services(request):
     """
     Página con todos los servicios
@@ -514,6 +347,9 @@ def services(request):
     return render(request, 'core/services.html', context)
 
 
+# Sin caché de página ni ETag: el modal de cotización trae un CAPTCHA de un
+# solo uso por visitante
+@rate_limit('service_detail', json=True)
 def service_detail(request, slug):
     """
     Página de detalle de un servicio específico
@@ -529,8 +365,6 @@ def service_detail(request, slug):
         form = QuoteRequestForm(request.POST)
         if form.is_valid():
             from django.core.mail import send_mail
-            from django.template.loader import render_to_string
-            from django.utils.html import strip_tags
             from datetime import datetime, timedelta
 
             name = form.cleaned_data['name']
@@ -596,10 +430,9 @@ def service_detail(request, slug):
                 'service': srv,
                 'site_name': 'Megadominio',
             }
-            html_msg = render_to_string(
+            html_msg, plain_msg = render_email(
                 'emails/quote_request.html', ctx_email
             )
-            plain_msg = strip_tags(html_msg)
 
             try:
                 send_mail(
@@ -630,6 +463,7 @@ def service_detail(request, slug):
                     body=body,
                     cta_url=admin_url,
                     cta_label="Ver cotización",
+                    event_type="quote",
                 )
             except Exception:
                 pass
@@ -644,10 +478,15 @@ def service_detail(request, slug):
             errors = {
                 k: v[0] for k, v in form.errors.items()
             }
-            return JsonResponse({
+            data = {
                 'success': False,
                 'errors': errors,
-            })
+            }
+            if 'captcha' in form.fields:
+                # La clave enviada ya se consumió: el modal muestra una nueva
+                from .captcha_pool import new_challenge
+                data['captcha'] = new_challenge()
+            return JsonResponse(data)
 
     # GET request
     form = QuoteRequestForm(initial={'service': service})
@@ -666,6 +505,7 @@ def service_detail(request, slug):
     return render(request, 'core/service_detail.html', context)
 
 
+@rate_limit('quote_request')
 def quote_request(request, service_id=None):
     """
     Página para solicitar cotización
@@ -673,8 +513,6 @@ def quote_request(request, service_id=None):
     from django.shortcuts import get_object_or_404, redirect
     from django.contrib import messages
     from django.core.mail import send_mail
-    from django.template.loader import render_to_string
-    from django.utils.html import strip_tags
     from .forms import QuoteRequestForm
     from datetime import datetime, timedelta
     
@@ -759,8 +597,7 @@ def quote_request(request, service_id=None):
                 'site_name': 'Megadominio',
             }
             
-            html_message = render_to_string('emails/quote_request.html', context_email)
-            plain_message = strip_tags(html_message)
+            html_message, plain_message = render_email('emails/quote_request.html', context_email)
             
             # Enviar email al cliente
             try:
@@ -798,6 +635,7 @@ def quote_request(request, service_id=None):
                     body=body,
                     cta_url=admin_url,
                     cta_label="Ver cotización",
+                    event_type="quote",
                 )
             except Exception:
                 pass
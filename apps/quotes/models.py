@@ -2,11 +2,15 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.conf import settings
 
+from apps.core.models import FieldTrackerMixin
+
 User = get_user_model()
 
 
-class Quote(models.Model):
+class Quote(FieldTrackerMixin, models.Model):
     """Modelo para gestionar cotizaciones"""
+
+    tracked_fields = ('status',)
     
     STATUS_CHOICES = [
         ('draft', 'Borrador'),
@@ -1,24 +1,14 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from .models import Quote
 from apps.core.emails import send_admin_notification
 
 
-@receiver(pre_save, sender=Quote)
-def _store_prev_quote_state(sender, instance: Quote, **kwargs):
-    if instance.pk:
-        try:
-            prev = Quote.objects.get(pk=instance.pk)
-            instance._old_status = prev.status
-        except Quote.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
-
-
 @receiver(post_save, sender=Quote)
-def _notify_quote_events(sender, instance: Quote, created: bool, **kwargs):
+def _notify_quote_events(sender, instance: Quote, created: bool, update_fields=None, **kwargs):
+    if not created and not instance.saves_tracked(update_fields):
+        return
     try:
         admin_url = None
         # Intentar armar URL del dashboard (ruta admin) sin request
@@ -40,11 +30,12 @@ def _notify_quote_events(sender, instance: Quote, created: bool, **kwargs):
                 body=body,
                 cta_url=admin_url,
                 cta_label='Ver cotización',
+                event_type='quote',
             )
             return
 
-        old = getattr(instance, '_old_status', None)
-        if old != instance.status:
+        if instance.has_changed('status'):
+            old = instance.previous('status')
             state = instance.get_status_display()
             title = f"Cotización {instance.number} → {state}"
             body = (
@@ -56,6 +47,7 @@ def _notify_quote_events(sender, instance: Quote, created: bool, **kwargs):
                 body=body,
                 cta_url=admin_url,
                 cta_label='Ver cotización',
+                event_type='quote',
             )
     except Exception:
         # Evitar que errores de correo afecten transacciones de BD
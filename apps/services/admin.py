@@ -58,8 +58,8 @@ class CpanelConfigAdmin(admin.ModelAdmin):
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'billing_type', 'is_active')
-    list_filter = ('billing_type', 'is_active')
+    list_display = ('name', 'price', 'billing_type', 'category', 'is_active')
+    list_filter = ('billing_type', 'category', 'is_active')
     search_fields = ('name', 'description')
     list_editable = ('is_active',)
     
@@ -79,7 +79,7 @@ class ClientServiceAdmin(admin.ModelAdmin):
         'client', 'service', 'status', 'start_date',
         'monthly_price', 'email_accounts_limit',
     )
-    list_filter = ('status', 'start_date')
+    list_filter = ('status', 'service__category', 'start_date')
     search_fields = ('client__name', 'service__name')
     date_hierarchy = 'start_date'
     
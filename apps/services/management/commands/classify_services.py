@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.page_cache import invalidate_pages
+from apps.services.models import Service, classify_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula Service.category de todos los servicios. Útil después de "
+        "cambios masivos (update/loaddata) que no pasan por Service.save()."
+    )
+
+    def handle(self, *args, **options):
+        changed = []
+        for service in Service.objects.only("pk", "name", "description", "category"):
+            category = classify_service(service.name, service.description)
+            if category != service.category:
+                service.category = category
+                changed.append(service)
+        Service.objects.bulk_update(changed, ["category"], batch_size=500)
+        if changed:
+            invalidate_pages()
+        self.stdout.write(self.style.SUCCESS(
+            f"Servicios reclasificados: {len(changed)}"
+        ))
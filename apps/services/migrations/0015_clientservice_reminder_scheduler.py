@@ -0,0 +1,22 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0014_clientservice_mail_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientservice',
+            name='last_reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último recordatorio enviado'),
+        ),
+        migrations.AddIndex(
+            model_name='clientservice',
+            index=models.Index(fields=['status', 'end_date'], name='clientsvc_status_end_idx'),
+        ),
+    ]
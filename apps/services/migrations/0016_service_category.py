@@ -0,0 +1,37 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+# Copia de EMAIL_KEYWORDS al momento de la migración
+EMAIL_KEYWORDS = (
+    "email", "correo", "mail", "workspace",
+    "google workspace", "smtp", "imap", "pop3",
+    "buzon", "buzón", "cuenta de correo",
+)
+
+
+def classify_services(apps, schema_editor):
+    Service = apps.get_model('services', 'Service')
+    email_ids = [
+        pk for pk, name, description
+        in Service.objects.values_list('pk', 'name', 'description')
+        if any(word in f"{name} {description}".lower() for word in EMAIL_KEYWORDS)
+    ]
+    Service.objects.filter(pk__in=email_ids).update(category='email')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0015_clientservice_reminder_scheduler'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='category',
+            field=models.CharField(choices=[('email', 'Correo electrónico'), ('general', 'General')], db_index=True, default='general', editable=False, max_length=20, verbose_name='Categoría'),
+        ),
+        migrations.RunPython(classify_services, migrations.RunPython.noop),
+    ]
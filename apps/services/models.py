@@ -2,6 +2,22 @@ from django.db import models
 from django.utils.text import slugify
 
 
+# Palabras que identifican un servicio de correo en su nombre o descripción
+EMAIL_KEYWORDS = (
+    "email", "correo", "mail", "workspace",
+    "google workspace", "smtp", "imap", "pop3",
+    "buzon", "buzón", "cuenta de correo",
+)
+
+
+def classify_service(name, description):
+    """Categoría de un servicio según su nombre y descripción."""
+    text = f"{name} {description}".lower()
+    if any(word in text for word in EMAIL_KEYWORDS):
+        return Service.CATEGORY_EMAIL
+    return Service.CATEGORY_GENERAL
+
+
 class Service(models.Model):
     """Modelo para gestionar los servicios ofrecidos"""
     
@@ -10,6 +26,13 @@ class Service(models.Model):
         ('monthly', 'Mensual'),
         ('annual', 'Anual'),
     ]
+
+    CATEGORY_EMAIL = 'email'
+    CATEGORY_GENERAL = 'general'
+    CATEGORY_CHOICES = [
+        (CATEGORY_EMAIL, 'Correo electrónico'),
+        (CATEGORY_GENERAL, 'General'),
+    ]
     
     name = models.CharField(max_length=200, verbose_name="Nombre del servicio")
     slug = models.SlugField(
@@ -24,6 +47,15 @@ class Service(models.Model):
         default='unique',
         verbose_name="Tipo de facturación"
     )
+    # Se clasifica al guardar (ver classify_service); no se edita a mano
+    category = models.CharField(
+        max_length=20,
+        choices=CATEGORY_CHOICES,
+        default=CATEGORY_GENERAL,
+        db_index=True,
+        editable=False,
+        verbose_name="Categoría"
+    )
     is_active = models.BooleanField(default=True, verbose_name="Activo")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
@@ -47,6 +79,10 @@ class Service(models.Model):
                 slug = f'{base}-{n}'
                 n += 1
             self.slug = slug
+        self.category = classify_service(self.name, self.description)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'description'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'category'}
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -171,12 +207,23 @@ class ClientService(models.Model):
         blank=True,
         verbose_name="Deshabilitado automático",
     )
+    last_reminder_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Último recordatorio enviado",
+    )
     
     class Meta:
         verbose_name = "Servicio del cliente"
         verbose_name_plural = "Servicios de clientes"
         ordering = ['-created_at']
         unique_together = ['client', 'service']
+        indexes = [
+            models.Index(
+                fields=['status', 'end_date'],
+                name='clientsvc_status_end_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.client.name} - {self.service.name}"
@@ -184,15 +231,7 @@ class ClientService(models.Model):
     @property
     def is_email_service(self):
         """Determina si este servicio es de tipo correo/email."""
-        text = (
-            f"{self.service.name} {self.service.description}".lower()
-        )
-        keywords = (
-            "email", "correo", "mail", "workspace",
-            "google workspace", "smtp", "imap", "pop3",
-            "buzon", "buzón", "cuenta de correo",
-        )
-        return any(word in text for word in keywords)
+        return self.service.category == Service.CATEGORY_EMAIL
 
 
 class ClientEmailAccount(models.Model):
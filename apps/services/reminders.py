@@ -0,0 +1,186 @@
+"""
+Programador unificado de recordatorios de renovación.
+
+Selecciona en una sola consulta (índice ``status`` + ``end_date``) todos los
+servicios activos que vencen en cualquiera de los días configurados, los
+agrupa por cliente y envía un único correo por cliente. Las marcas de envío
+se guardan con ``update()`` masivos, sin un ``save()`` por servicio.
+"""
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.emails import (
+    send_admin_notification,
+    send_service_renewal_digest,
+    send_service_renewal_reminder,
+)
+
+from .models import ClientService
+
+DEFAULT_REMINDER_DAYS = (15, 7, 3, 1)
+
+# Días con marca propia en ClientService (además de last_reminder_sent_at)
+REMINDER_MARKER_FIELDS = {
+    15: "reminder_15_sent_at",
+    3: "reminder_3_sent_at",
+}
+
+
+def _today():
+    return timezone.localdate() if settings.USE_TZ else date.today()
+
+
+def _fmt_money(value):
+    return f"${value:,.0f}".replace(",", ".")
+
+
+def _build_url(path):
+    site_url = (getattr(settings, "SITE_URL", "") or "").rstrip("/")
+    if not site_url:
+        return None
+    if not site_url.startswith(("http://", "https://")):
+        site_url = f"https://{site_url}"
+    return f"{site_url}{path}"
+
+
+def due_reminders(days, today=None):
+    """
+    Servicios con recordatorio pendiente para cualquiera de ``days``.
+
+    Una sola consulta: excluye los que ya recibieron recordatorio hoy y los
+    que ya tienen la marca específica del día (15/3). Ordenado por cliente
+    para poder agruparlos sin otra consulta.
+    """
+    today = today or _today()
+    targets = [today + timedelta(days=d) for d in days]
+
+    already_sent = Q(last_reminder_sent_at__date=today)
+    for d, field_name in REMINDER_MARKER_FIELDS.items():
+        if d in days:
+            already_sent |= Q(
+                end_date=today + timedelta(days=d),
+                **{f"{field_name}__isnull": False},
+            )
+
+    return (
+        ClientService.objects.select_related("client", "service")
+        .filter(status="active", end_date__in=targets)
+        .exclude(already_sent)
+        .order_by("client_id", "end_date", "pk")
+    )
+
+
+def send_due_reminders(days=DEFAULT_REMINDER_DAYS, *, today=None, dry_run=False, log=None):
+    """
+    Envía un correo por cliente con todos sus servicios por renovar.
+
+    Retorna un dict con ``clients``, ``services`` y ``by_days`` (servicios
+    notificados por cada día de anticipación).
+    """
+    days = sorted({int(d) for d in days if int(d) > 0}, reverse=True)
+    today = today or _today()
+    now = timezone.now()
+    log = log or (lambda msg: None)
+
+    stats = {"clients": 0, "services": 0, "by_days": {d: 0 for d in days}}
+    if not days:
+        return stats
+
+    sent_ids = []
+    sent_by_days = {}
+    admin_lines = []
+    manage_url = _build_url("/mi-cuenta/servicios/")
+
+    qs = due_reminders(days, today=today)
+    for _client_id, group in groupby(qs, key=lambda cs: cs.client_id):
+        services = list(group)
+        client = services[0].client
+        to_email = (client.email or "").strip()
+        if not to_email:
+            continue
+
+        items = []
+        for cs in services:
+            amount_num = cs.renewal_price or cs.monthly_price
+            items.append({
+                "service_name": cs.service.name,
+                "renewal_date": cs.end_date.strftime("%d/%m/%Y"),
+                "amount": _fmt_money(amount_num),
+                "billing_type": cs.get_billing_type_display(),
+                "days": (cs.end_date - today).days,
+            })
+
+        if dry_run:
+            for it in items:
+                log(
+                    f"[DRY] {to_email} • {it['service_name']} • "
+                    f"{it['renewal_date']} ({it['days']}d) • {it['amount']}"
+                )
+        else:
+            try:
+                if len(items) == 1:
+                    it = items[0]
+                    send_service_renewal_reminder(
+                        to=to_email,
+                        service_name=it["service_name"],
+                        renewal_date=it["renewal_date"],
+                        amount=it["amount"],
+                        billing_type=it["billing_type"],
+                        client_name=client.name,
+                        manage_url=manage_url,
+                    )
+                else:
+                    send_service_renewal_digest(
+                        to=to_email,
+                        items=items,
+                        client_name=client.name,
+                        manage_url=manage_url,
+                    )
+            except Exception:
+                send_admin_notification(
+                    title="Error enviando recordatorio de renovación",
+                    body=(
+                        f"Cliente: {client.name} <{to_email}>\n"
+                        f"Servicios: {', '.join(it['service_name'] for it in items)}"
+                    ),
+                    event_type="error",
+                )
+                continue
+
+        stats["clients"] += 1
+        for cs, it in zip(services, items):
+            stats["services"] += 1
+            stats["by_days"][it["days"]] = stats["by_days"].get(it["days"], 0) + 1
+            sent_ids.append(cs.pk)
+            sent_by_days.setdefault(it["days"], []).append(cs.pk)
+            admin_lines.append(
+                f"{client.name} <{to_email}>: {it['service_name']} "
+                f"(vence {it['renewal_date']}, {it['days']} días)"
+            )
+
+    if dry_run or not sent_ids:
+        return stats
+
+    ClientService.objects.filter(pk__in=sent_ids).update(
+        last_reminder_sent_at=now, updated_at=now,
+    )
+    for d, field_name in REMINDER_MARKER_FIELDS.items():
+        ids = sent_by_days.get(d)
+        if ids:
+            ClientService.objects.filter(pk__in=ids).update(**{field_name: now})
+
+    send_admin_notification(
+        title=(
+            f"Recordatorios de renovación enviados: "
+            f"{stats['services']} servicios / {stats['clients']} clientes"
+        ),
+        body="\n".join(admin_lines),
+        cta_url=_build_url("/dashboard/servicios-clientes/"),
+        cta_label="Ver servicios de clientes",
+        event_type="reminder",
+    )
+    return stats
@@ -70,10 +70,12 @@ def notify_client_service_assigned(sender, instance, created, **kwargs):
             ),
             cta_url=admin_url,
             cta_label="Ver detalle del servicio" if admin_url else None,
+            event_type="service",
         )
     except Exception as e:
         # En caso de error, notificamos al admin pero no interrumpimos el flujo
         send_admin_notification(
             title="Error al enviar notificación de servicio asignado",
             body=f"Cliente: {instance.client.name}\nServicio: {instance.service.name}\nError: {str(e)}",
+            event_type="error",
         )
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import ProductCategory, Product, Order, OrderItem
+from .models import (
+    ProductCategory, Product, Plan, Order, OrderItem, PaymentEvent,
+    StockReservation,
+)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -22,10 +25,35 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
 
 
+@admin.register(Plan)
+class PlanAdmin(admin.ModelAdmin):
+    list_display = ['title', 'slug', 'category', 'price', 'period',
+                    'order', 'is_active']
+    list_filter = ['category', 'period', 'is_active']
+    search_fields = ['title', 'slug', 'description']
+    prepopulated_fields = {'slug': ('title',)}
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['number', 'customer_name', 'status', 'total',
                     'created_at']
     list_filter = ['status']
     search_fields = ['number', 'customer_name', 'customer_email']
+    raw_id_fields = ['created_by', 'customer']
     inlines = [OrderItemInline]
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'status', 'transaction_id', 'result',
+                    'received_at', 'processed_at']
+    list_filter = ['status', 'result']
+    search_fields = ['reference', 'transaction_id']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'order', 'quantity', 'status', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['order__number', 'product__name']
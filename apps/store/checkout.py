@@ -0,0 +1,138 @@
+"""
+Creación de órdenes a partir del carrito de la tienda.
+
+Todos los productos del carrito se resuelven en una sola consulta
+(``slug__in``), los items se arman en memoria y se insertan con
+``bulk_create``; la orden se guarda una sola vez con los totales ya
+calculados, todo dentro de ``transaction.atomic``. El número de consultas no
+depende de la cantidad de líneas.
+
+Los precios salen siempre del servidor: de ``Product`` o del catálogo de
+planes (``plans.get_catalog``); el precio que envía el navegador se ignora.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from .inventory import reserve_stock
+from .models import Order, OrderItem, Product
+from .plans import get_catalog
+
+SHIPPING_COST = Decimal('12000')
+
+CUSTOMER_FIELDS = {
+    'name': 'customer_name',
+    'email': 'customer_email',
+    'phone': 'customer_phone',
+    'address': 'customer_address',
+    'country': 'customer_country',
+    'state': 'customer_state',
+    'city': 'customer_city',
+    'doc_type': 'customer_doc_type',
+    'document': 'customer_document',
+}
+
+
+class InvalidCartItem(Exception):
+    """Línea del carrito que no corresponde a un producto ni a un plan."""
+
+    def __init__(self, name):
+        self.name = name
+        super().__init__(f'Item no disponible: {name}')
+
+
+def _get_next_order_number():
+    """Genera el siguiente número de orden secuencial."""
+    last = Order.objects.order_by('-id').only('number').first()
+    if last and last.number.startswith('ORD-'):
+        try:
+            num = int(last.number.split('-')[1]) + 1
+        except (ValueError, IndexError):
+            num = 1
+    else:
+        num = 1
+    return f'ORD-{num:05d}'
+
+
+def build_items(cart_items, catalog=None):
+    """
+    Items de la orden (sin guardar) y subtotal a partir del carrito.
+
+    Los productos activos se buscan en una sola consulta y los planes en el
+    catálogo en memoria. Lanza ``InvalidCartItem`` si una línea no es ni lo
+    uno ni lo otro o trae una cantidad inválida.
+    """
+    if catalog is None:
+        catalog = get_catalog()
+    lines = []
+    for item in cart_items:
+        slug = str(item.get('id', '')).strip()
+        try:
+            qty = int(item.get('qty', 1))
+        except (TypeError, ValueError):
+            qty = 0
+        if qty < 1:
+            raise InvalidCartItem(item.get('name') or slug)
+        lines.append((slug, qty, item))
+    slugs = {slug for slug, _qty, _item in lines if slug}
+    products = {
+        p.slug: p
+        for p in Product.objects.filter(slug__in=slugs, is_active=True)
+        .only('pk', 'slug', 'name', 'price')
+    } if slugs else {}
+
+    items = []
+    subtotal = Decimal('0')
+    for slug, qty, item in lines:
+        product = products.get(slug)
+        if product:
+            unit_price = product.price
+            description = product.name
+        else:
+            plan = catalog.get(slug)
+            if plan is None:
+                raise InvalidCartItem(item.get('name') or slug)
+            unit_price = plan.price
+            description = plan.title
+        line = OrderItem(
+            product=product,
+            description=description,
+            quantity=qty,
+            unit_price=unit_price,
+            # bulk_create no pasa por OrderItem.save()
+            subtotal=qty * unit_price,
+        )
+        items.append(line)
+        subtotal += line.subtotal
+    return items, subtotal
+
+
+def create_order(customer, cart_items, user=None):
+    """
+    Crea la orden pendiente de pago con sus items y totales, y reserva el
+    stock de los productos. Lanza ``InvalidCartItem`` o ``InsufficientStock``
+    si el carrito no es válido (en ese caso no se crea nada).
+    """
+    catalog = get_catalog()
+    items, subtotal = build_items(cart_items, catalog)
+    # Los planes son digitales: un carrito solo de planes no paga envío
+    all_digital = all(line.product is None for line in items)
+    shipping_cost = Decimal('0') if all_digital else SHIPPING_COST
+
+    with transaction.atomic():
+        order = Order(
+            number=_get_next_order_number(),
+            status='pending',
+            payment_status='pending',
+            subtotal=subtotal,
+            shipping_cost=shipping_cost,
+            total=subtotal + shipping_cost,
+            created_by=user,
+            **{field: customer.get(key, '') for key, field in CUSTOMER_FIELDS.items()},
+        )
+        order.save()
+        for line in items:
+            line.order = order
+        OrderItem.objects.bulk_create(items)
+        reserve_stock(order, items)
+    return order
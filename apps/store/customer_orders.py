@@ -0,0 +1,99 @@
+"""
+Órdenes por cliente para el panel "Mi cuenta".
+
+Cada orden queda ligada a su usuario (``Order.customer``) al crearse y
+cuando cambia ``customer_email``: el usuario cuyo email coincide o, solo si
+la orden no tiene email, quien la creó. Una orden que el staff registra
+para un email sin cuenta queda sin dueño (no en "Mis compras" del staff)
+hasta que ese cliente se registre y ``link_orders_to_user`` la reclame. Así
+el panel filtra por una columna indexada con
+``(customer, created_at)`` en vez de unir dos consultas con OR sobre un
+email sin índice.
+
+Los contadores del panel salen de ``apps.core.panel_summary``; las
+asignaciones en bloque de este módulo (que no disparan señales) invalidan
+ese resumen explícitamente.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
+
+from apps.core.panel_summary import invalidate_client_summary
+
+from .models import Order
+
+
+def resolve_customer_id(order):
+    """
+    Usuario dueño de ``order``: el de ``customer_email``; quien la creó solo
+    si la orden no tiene email o es el suyo. None si nadie tiene ese email.
+    """
+    email = (order.customer_email or '').strip()
+    created_by_field = Order._meta.get_field('created_by')
+    if order.created_by_id and created_by_field.is_cached(order):
+        # En el checkout el comprador ya está en memoria: sin consulta
+        if not email or order.created_by.email.lower() == email.lower():
+            return order.created_by_id
+    if email:
+        return (
+            get_user_model().objects.with_email(email)
+            .order_by('id').values_list('pk', flat=True).first()
+        )
+    return order.created_by_id
+
+
+def customer_ids_by_email(emails):
+    """``{email en minúsculas: pk}`` del usuario más antiguo con cada email."""
+    emails = {e.strip().lower() for e in emails if e and e.strip()}
+    if not emails:
+        return {}
+    rows = (
+        get_user_model().objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=emails)
+        .order_by('-pk').values_list('email_lower', 'pk')
+    )
+    return dict(rows)
+
+
+def link_orders_to_user(user):
+    """Asigna a ``user`` las órdenes sin dueño hechas con su email."""
+    if not user.email:
+        return 0
+    linked = Order.objects.annotate(email_lower=Lower('customer_email')).filter(
+        customer__isnull=True, email_lower=user.email.strip().lower(),
+    ).update(customer=user)
+    if linked:
+        invalidate_client_summary(user.pk)
+    return linked
+
+
+def backfill_customers(batch_size=1000):
+    """
+    Liga las órdenes existentes sin ``customer`` con la misma regla de
+    ``resolve_customer_id``, por lotes. Retorna ``(revisadas, ligadas)``.
+    """
+    last_pk = 0
+    seen = linked = 0
+    while True:
+        rows = list(
+            Order.objects.filter(customer__isnull=True, pk__gt=last_pk)
+            .order_by('pk').values_list('pk', 'customer_email', 'created_by_id')[:batch_size]
+        )
+        if not rows:
+            return seen, linked
+        last_pk = rows[-1][0]
+        seen += len(rows)
+
+        by_email = customer_ids_by_email(email for _, email, _ in rows)
+        groups = {}
+        for pk, email, created_by_id in rows:
+            email = (email or '').strip().lower()
+            customer_id = by_email.get(email) if email else created_by_id
+            if customer_id:
+                groups.setdefault(customer_id, []).append(pk)
+        for customer_id, pks in groups.items():
+            linked += Order.objects.filter(pk__in=pks).update(customer_id=customer_id)
+        invalidate_client_summary(*groups)
+
+
+def orders_for(user):
+    return Order.objects.filter(customer=user).order_by('-created_at')
@@ -0,0 +1,175 @@
+"""
+Reservas de stock para la tienda.
+
+``Product.stock`` es el stock disponible. Al crear la orden se descuenta con
+un solo ``UPDATE ... WHERE stock >= cantidad`` (``F()``) para todo el
+carrito, sin leer y reescribir el valor, de modo que dos compradores
+simultáneos nunca dejan el stock negativo.
+Cada descuento queda como ``StockReservation`` con vencimiento:
+
+- pago aprobado → la reserva se confirma;
+- pago rechazado/anulado/error → las unidades vuelven al producto;
+- reserva vencida → ``release_expired_reservations`` las devuelve;
+- pago aprobado después de vencer o de un rechazo/error (Wompi permite
+  ``declined → approved`` y ``error → approved``) → se vuelve a descontar.
+
+Los cambios de estado de una reserva también son condicionales
+(``filter(status='active').update(...)``), así una reserva nunca se libera
+dos veces aunque el sweeper y el webhook coincidan.
+
+Los ``UPDATE`` de stock no pasan por ``save()``: tocan ``updated_at`` a mano
+(lo usan los ETag de la tienda) e invalidan la caché de páginas al confirmar.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from apps.core.page_cache import invalidate_pages
+
+from .models import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_MINUTES = 30
+
+
+class InsufficientStock(Exception):
+    """No hay stock disponible para reservar un producto."""
+
+    def __init__(self, product_id, requested, name=''):
+        self.product_id = product_id
+        self.requested = requested
+        self.name = name or f'producto {product_id}'
+        super().__init__(f'Stock insuficiente para {self.name} ({requested} unidades)')
+
+
+def reservation_ttl():
+    return timedelta(
+        minutes=getattr(settings, 'STOCK_RESERVATION_TTL_MINUTES', DEFAULT_TTL_MINUTES)
+    )
+
+
+def _stock_changed():
+    # UPDATE sin señales: la tienda y el detalle muestran el stock
+    transaction.on_commit(invalidate_pages)
+
+
+def reserve_stock(order, items):
+    """
+    Reserva el stock de los items con producto. Debe llamarse dentro de la
+    transacción que crea la orden: si algún producto no alcanza no se
+    descuenta nada y se lanza ``InsufficientStock``.
+    """
+    wanted = Counter()
+    names = {}
+    for line in items:
+        if line.product_id:
+            wanted[line.product_id] += line.quantity
+            names[line.product_id] = line.description
+    if not wanted:
+        return []
+
+    # Un solo UPDATE condicional para todos los productos del carrito:
+    # stock = stock - cantidad WHERE stock >= cantidad (por producto)
+    qty = Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in wanted.items()],
+        output_field=IntegerField(),
+    )
+    with transaction.atomic():
+        taken = Product.objects.filter(pk__in=list(wanted), stock__gte=qty).update(
+            stock=F('stock') - qty, updated_at=timezone.now(),
+        )
+        if taken != len(wanted):
+            transaction.set_rollback(True)
+        else:
+            _stock_changed()
+    if taken != len(wanted):
+        short_id = (
+            Product.objects.filter(pk__in=list(wanted), stock__lt=qty)
+            .values_list('pk', flat=True).first()
+        ) or next(iter(wanted))
+        raise InsufficientStock(short_id, wanted[short_id], names.get(short_id, ''))
+
+    expires_at = timezone.now() + reservation_ttl()
+    reservations = [
+        StockReservation(product_id=pk, order=order, quantity=n, expires_at=expires_at)
+        for pk, n in wanted.items()
+    ]
+    return StockReservation.objects.bulk_create(reservations)
+
+
+def _release(reservation, status):
+    """Devuelve las unidades si la reserva seguía activa. True si se liberó."""
+    with transaction.atomic():
+        changed = StockReservation.objects.filter(
+            pk=reservation.pk, status='active',
+        ).update(status=status, updated_at=timezone.now())
+        if changed:
+            Product.objects.filter(pk=reservation.product_id).update(
+                stock=F('stock') + reservation.quantity, updated_at=timezone.now(),
+            )
+            _stock_changed()
+    return bool(changed)
+
+
+def release_reservations(order, status='released'):
+    """Libera las reservas activas de la orden; retorna unidades devueltas."""
+    returned = 0
+    for reservation in StockReservation.objects.filter(order=order, status='active'):
+        if _release(reservation, status):
+            returned += reservation.quantity
+    return returned
+
+
+def commit_reservations(order):
+    """
+    Confirma las reservas de una orden pagada.
+
+    Si alguna ya había vencido o se liberó por un rechazo/error previo (pago
+    aprobado tarde) se intenta descontar el stock de nuevo; retorna los ids
+    de producto que ya no alcanzaron.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        StockReservation.objects.filter(order=order, status='active').update(
+            status='committed', updated_at=now,
+        )
+        short = []
+        late = StockReservation.objects.filter(order=order, status__in=['expired', 'released'])
+        for reservation in late:
+            taken = Product.objects.filter(
+                pk=reservation.product_id, stock__gte=reservation.quantity,
+            ).update(stock=F('stock') - reservation.quantity, updated_at=now)
+            if taken:
+                _stock_changed()
+            else:
+                short.append(reservation.product_id)
+        late.update(status='committed', updated_at=now)
+    if short:
+        logger.error(f'Orden {order.number} aprobada sin stock para productos {short}')
+    return short
+
+
+def release_expired(batch_size=500):
+    """Libera las reservas activas vencidas; retorna ``(reservas, unidades)``."""
+    now = timezone.now()
+    released = units = 0
+    while True:
+        batch = list(
+            StockReservation.objects.filter(status='active', expires_at__lt=now)
+            .order_by('expires_at', 'pk')[:batch_size]
+        )
+        if not batch:
+            break
+        for reservation in batch:
+            if _release(reservation, 'expired'):
+                released += 1
+                units += reservation.quantity
+        if len(batch) < batch_size:
+            break
+    return released, units
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.store.customer_orders import backfill_customers
+
+
+class Command(BaseCommand):
+    help = (
+        "Liga las órdenes existentes con su cliente (Order.customer) por email "
+        "o por quien las creó. Ejecutar una vez después de migrar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Órdenes por lote (por defecto: 1000)",
+        )
+
+    def handle(self, *args, **opts):
+        seen, linked = backfill_customers(batch_size=max(1, opts["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Órdenes revisadas: {seen}, ligadas a un cliente: {linked}"
+        ))
@@ -0,0 +1,77 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.store.checkout import create_order
+from apps.store.models import Product
+
+CUSTOMER = {
+    "name": "Cliente Benchmark",
+    "email": "bench@example.com",
+    "phone": "3000000000",
+    "document": "123456789",
+    "address": "Calle 1 # 2-3",
+    "city": "Medellín",
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la creación de órdenes del checkout con carritos de 1, 20 y 100 "
+        "líneas (latencia y consultas). Todo se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lines", default="1,20,100",
+            help="Tamaños de carrito separados por coma (por defecto: 1,20,100)",
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=20,
+            help="Órdenes por tamaño de carrito (por defecto: 20)",
+        )
+
+    def handle(self, *args, **opts):
+        sizes = [int(x) for x in opts["lines"].split(",") if x.strip()]
+        iterations = max(1, opts["iterations"])
+        results = []
+
+        try:
+            with transaction.atomic():
+                products = Product.objects.bulk_create([
+                    Product(
+                        name=f"Bench {i}", slug=f"bench-checkout-{i}",
+                        price=Decimal("10000") + i, stock=1_000_000,
+                    )
+                    for i in range(max(sizes))
+                ])
+                for size in sizes:
+                    cart = [
+                        {"id": p.slug, "qty": 1 + i % 3}
+                        for i, p in enumerate(products[:size])
+                    ]
+                    create_order(CUSTOMER, cart)  # calentamiento
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        for _ in range(iterations):
+                            create_order(CUSTOMER, cart)
+                        elapsed = time.perf_counter() - start
+                    results.append((
+                        size, elapsed / iterations * 1000,
+                        len(ctx.captured_queries) / iterations,
+                    ))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        for size, ms, queries in results:
+            self.stdout.write(
+                f"{size:>4} líneas: {ms:7.2f} ms/orden, {queries:.0f} consultas/orden"
+            )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.store.payments import process_payment_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica a las órdenes los eventos de Wompi registrados por el webhook "
+        "(PaymentEvent), en orden y sin duplicados. Con --loop queda como worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=500,
+            help="Máximo de órdenes por ciclo (por defecto: 500)",
+        )
+        parser.add_argument(
+            "--loop", action="store_true", default=False,
+            help="Repetir indefinidamente (worker)",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2.0,
+            help="Segundos de espera entre ciclos sin eventos (por defecto: 2)",
+        )
+
+    def handle(self, *args, **opts):
+        limit = max(1, opts["limit"])
+        while True:
+            stats = process_payment_events(limit=limit)
+            if stats["orders"]:
+                detail = ", ".join(
+                    f"{k}: {v}" for k, v in sorted(stats.items()) if k != "orders"
+                )
+                self.stdout.write(f"{stats['orders']} órdenes procesadas ({detail})")
+            if not opts["loop"]:
+                if not stats["orders"]:
+                    self.stdout.write("Sin eventos pendientes.")
+                return
+            if stats["orders"] < limit:
+                time.sleep(opts["interval"])
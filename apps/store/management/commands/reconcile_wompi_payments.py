@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.store.models import Order, PaymentEvent
+from apps.store.payments import event_from_transaction, process_payment_events
+from apps.store.wompi import WompiAPIError, get_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Concilia órdenes con pago pendiente consultando Wompi en paralelo "
+        "(pool de hilos acotado y sesión compartida). Los estados nuevos se "
+        "registran como PaymentEvent en bloque y se aplican como los del webhook."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=float, default=48,
+            help="Ventana hacia atrás desde ahora (por defecto: 48 horas)",
+        )
+        parser.add_argument(
+            "--min-age", type=float, default=5,
+            help="Ignorar órdenes más recientes que N minutos (por defecto: 5)",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8,
+            help="Consultas simultáneas a Wompi (por defecto: 8)",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=5000,
+            help="Máximo de órdenes por ejecución (por defecto: 5000)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", default=False,
+            help="Consulta y muestra cambios sin registrarlos",
+        )
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        now = timezone.now()
+        orders = Order.objects.filter(
+            payment_status="pending",
+            created_at__gte=now - timedelta(hours=opts["hours"]),
+            created_at__lte=now - timedelta(minutes=opts["min_age"]),
+        )
+        if not getattr(settings, "WOMPI_PRIVATE_KEY", ""):
+            # Sin llave privada solo se pueden consultar transacciones por id
+            orders = orders.exclude(wompi_transaction_id="")
+        rows = list(
+            orders.order_by("created_at")
+            .values_list("number", "wompi_transaction_id")[:max(1, opts["limit"])]
+        )
+
+        client = get_client()
+        stats = {"orders": len(rows), "errors": 0, "not_found": 0, "unchanged": 0}
+
+        def lookup(row):
+            number, tx_id = row
+            try:
+                if tx_id:
+                    return number, client.get_transaction(tx_id)
+                return number, client.find_transaction_by_reference(number)
+            except WompiAPIError:
+                return number, False
+
+        events = []
+        with ThreadPoolExecutor(max_workers=max(1, opts["workers"])) as pool:
+            for number, tx in pool.map(lookup, rows):
+                if tx is False:
+                    stats["errors"] += 1
+                elif not tx:
+                    stats["not_found"] += 1
+                elif tx.get("status") in ("", None, "PENDING"):
+                    stats["unchanged"] += 1
+                else:
+                    events.append(event_from_transaction(number, tx))
+        lookup_time = time.perf_counter() - start
+
+        for ev in events:
+            stats[ev.status] = stats.get(ev.status, 0) + 1
+            if opts["dry_run"]:
+                self.stdout.write(f"[DRY] {ev.reference} → {ev.status} ({ev.transaction_id})")
+
+        if events and not opts["dry_run"]:
+            PaymentEvent.objects.bulk_create(events, ignore_conflicts=True)
+            applied = process_payment_events(
+                limit=len(events), references=[ev.reference for ev in events],
+            )
+            stats["applied"] = applied["applied"]
+
+        elapsed = time.perf_counter() - start
+        detail = ", ".join(f"{k}: {v}" for k, v in stats.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"{detail} | consultas {lookup_time:.2f}s, total {elapsed:.2f}s"
+        ))
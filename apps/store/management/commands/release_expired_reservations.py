@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.store.inventory import release_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Devuelve al inventario las reservas de stock vencidas de órdenes "
+        "que no se pagaron a tiempo. Programar en cron cada pocos minutos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Reservas por lote (por defecto: 500)",
+        )
+
+    def handle(self, *args, **opts):
+        released, units = release_expired(batch_size=max(1, opts["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Reservas vencidas liberadas: {released} ({units} unidades)"
+        ))
@@ -0,0 +1,37 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_orderitem_item_type_orderitem_service'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=100, verbose_name='Wompi Transaction ID')),
+                ('status', models.CharField(max_length=20, verbose_name='Estado Wompi')),
+                ('event_timestamp', models.BigIntegerField(default=0, verbose_name='Timestamp del evento')),
+                ('reference', models.CharField(db_index=True, max_length=20, verbose_name='Referencia')),
+                ('payment_method', models.CharField(blank=True, max_length=50, verbose_name='Método de pago')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Payload')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Recibido')),
+                ('processed_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Procesado')),
+                ('result', models.CharField(blank=True, choices=[('applied', 'Aplicado'), ('duplicate', 'Sin cambios'), ('stale', 'Obsoleto'), ('order_not_found', 'Orden no encontrada')], max_length=20, verbose_name='Resultado')),
+            ],
+            options={
+                'verbose_name': 'Evento de pago',
+                'verbose_name_plural': 'Eventos de pago',
+                'ordering': ['event_timestamp', 'pk'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='paymentevent',
+            constraint=models.UniqueConstraint(fields=('transaction_id', 'status', 'event_timestamp'), name='paymentevent_tx_status_ts_uniq'),
+        ),
+    ]
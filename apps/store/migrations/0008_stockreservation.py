@@ -0,0 +1,33 @@
+# Generated manually
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_paymentevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Cantidad')),
+                ('status', models.CharField(choices=[('active', 'Activa'), ('committed', 'Confirmada'), ('released', 'Liberada'), ('expired', 'Vencida')], default='active', max_length=20, verbose_name='Estado')),
+                ('expires_at', models.DateTimeField(verbose_name='Vence')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='store.order', verbose_name='Orden')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='store.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de stock',
+                'verbose_name_plural': 'Reservas de stock',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='stockres_status_exp_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_plan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
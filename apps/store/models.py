@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
 
+from apps.core.models import FieldTrackerMixin
+
 
 class ProductCategory(models.Model):
     """Categoría de productos de la tienda"""
@@ -14,6 +16,7 @@ class ProductCategory(models.Model):
     order = models.PositiveIntegerField('Orden', default=0)
     is_active = models.BooleanField('Activa', default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Categoría de producto'
@@ -113,8 +116,57 @@ class Product(models.Model):
         return labels.get(self.badge, '')
 
 
-class Order(models.Model):
+class Plan(models.Model):
+    """Plan digital (web, hosting, e-commerce, WordPress) de precio fijo"""
+    CATEGORY_CHOICES = [
+        ('web', 'Web'),
+        ('hosting', 'Hosting & Email'),
+        ('ecommerce', 'E-commerce'),
+        ('wordpress', 'WordPress'),
+    ]
+    PERIOD_CHOICES = [
+        ('año', 'Anual'),
+        ('mes', 'Mensual'),
+        ('único', 'Pago único'),
+    ]
+
+    slug = models.SlugField('Slug', max_length=120, unique=True)
+    title = models.CharField('Nombre', max_length=200)
+    category = models.CharField(
+        'Categoría', max_length=20, choices=CATEGORY_CHOICES
+    )
+    price = models.DecimalField('Precio', max_digits=12, decimal_places=0)
+    period = models.CharField(
+        'Periodo', max_length=10, choices=PERIOD_CHOICES, default='año'
+    )
+    icon = models.CharField(
+        'Icono', max_length=50, default='fa-tag',
+        help_text='Clase Font Awesome (ej: fa-server)'
+    )
+    image = models.URLField('Imagen', max_length=500, blank=True)
+    description = models.TextField('Descripción', blank=True)
+    features = models.JSONField(
+        'Características', default=list, blank=True,
+        help_text='Lista de textos'
+    )
+    order = models.PositiveIntegerField('Orden', default=0)
+    is_active = models.BooleanField('Activo', default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Plan'
+        verbose_name_plural = 'Planes'
+        ordering = ['order', 'title']
+
+    def __str__(self):
+        return self.title
+
+
+class Order(FieldTrackerMixin, models.Model):
     """Orden de compra de la tienda"""
+    tracked_fields = ('status', 'payment_status', 'customer_email')
+
     STATUS_CHOICES = [
         ('pending', 'Pendiente'),
         ('confirmed', 'Confirmada'),
@@ -192,6 +244,13 @@ class Order(models.Model):
         null=True, blank=True, related_name='store_orders',
         verbose_name='Creada por'
     )
+    # Dueño de la orden en el panel; se asigna al crearla (ver save()).
+    # El índice (customer, created_at) cubre también las búsquedas por FK.
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='customer_orders',
+        db_index=False, verbose_name='Cliente'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -199,10 +258,35 @@ class Order(models.Model):
         verbose_name = 'Orden'
         verbose_name_plural = 'Órdenes'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['customer', '-created_at'],
+                name='order_customer_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.number} - {self.customer_name}'
 
+    def save(self, *args, **kwargs):
+        from .customer_orders import resolve_customer_id
+        previous_customer_id = self.customer_id
+        if self._state.adding:
+            if self.customer_id is None:
+                self.customer_id = resolve_customer_id(self)
+        elif (
+            self.saves_tracked(kwargs.get('update_fields'), 'customer_email')
+            and self.has_changed('customer_email')
+        ):
+            # Otro email: la orden pasa al dueño de ese email
+            self.customer_id = resolve_customer_id(self)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'customer'}
+        super().save(*args, **kwargs)
+        if previous_customer_id and previous_customer_id != self.customer_id:
+            from apps.core.panel_summary import invalidate_client_summary
+            invalidate_client_summary(previous_customer_id)
+
     def calculate_totals(self):
         items_total = sum(
             item.subtotal for item in self.items.all()
@@ -256,3 +340,90 @@ class OrderItem(models.Model):
     def save(self, *args, **kwargs):
         self.subtotal = self.quantity * self.unit_price
         super().save(*args, **kwargs)
+
+
+class PaymentEvent(models.Model):
+    """
+    Evento de Wompi recibido por el webhook.
+
+    El webhook solo lo inserta y responde; ``process_payment_events`` lo
+    aplica a la orden. La restricción única descarta reintentos de Wompi.
+    """
+    RESULT_CHOICES = [
+        ('applied', 'Aplicado'),
+        ('duplicate', 'Sin cambios'),
+        ('stale', 'Obsoleto'),
+        ('order_not_found', 'Orden no encontrada'),
+    ]
+
+    transaction_id = models.CharField('Wompi Transaction ID', max_length=100)
+    status = models.CharField('Estado Wompi', max_length=20)
+    event_timestamp = models.BigIntegerField('Timestamp del evento', default=0)
+    reference = models.CharField('Referencia', max_length=20, db_index=True)
+    payment_method = models.CharField('Método de pago', max_length=50, blank=True)
+    payload = models.JSONField('Payload', default=dict, blank=True)
+    received_at = models.DateTimeField('Recibido', auto_now_add=True)
+    processed_at = models.DateTimeField(
+        'Procesado', null=True, blank=True, db_index=True
+    )
+    result = models.CharField(
+        'Resultado', max_length=20, choices=RESULT_CHOICES, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Evento de pago'
+        verbose_name_plural = 'Eventos de pago'
+        ordering = ['event_timestamp', 'pk']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['transaction_id', 'status', 'event_timestamp'],
+                name='paymentevent_tx_status_ts_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.reference} {self.status} ({self.transaction_id})'
+
+
+class StockReservation(models.Model):
+    """
+    Unidades apartadas de ``Product.stock`` mientras el pago está pendiente.
+
+    El stock se descuenta al reservar; al aprobarse el pago la reserva queda
+    confirmada y, si se rechaza o vence, las unidades vuelven al producto.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Activa'),
+        ('committed', 'Confirmada'),
+        ('released', 'Liberada'),
+        ('expired', 'Vencida'),
+    ]
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name='stock_reservations',
+        verbose_name='Producto'
+    )
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name='stock_reservations',
+        verbose_name='Orden'
+    )
+    quantity = models.PositiveIntegerField('Cantidad')
+    status = models.CharField(
+        'Estado', max_length=20, choices=STATUS_CHOICES, default='active'
+    )
+    expires_at = models.DateTimeField('Vence')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Reserva de stock'
+        verbose_name_plural = 'Reservas de stock'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'expires_at'], name='stockres_status_exp_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.product} x{self.quantity} ({self.get_status_display()})'
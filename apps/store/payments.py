@@ -0,0 +1,198 @@
+"""
+Aplicación de estados de pago de Wompi a las órdenes.
+
+El webhook solo registra ``PaymentEvent``; ``process_payment_events`` los
+aplica en orden (por ``event_timestamp``) para cada orden, con la orden
+bloqueada con ``select_for_update``. Los eventos repetidos no cambian nada y
+las transiciones que retroceden (p. ej. PENDING después de APPROVED) o que
+llegan con un timestamp anterior al último aplicado se marcan obsoletas.
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.emails import send_admin_notification, send_payment_failed
+
+from .models import Order, PaymentEvent
+
+logger = logging.getLogger(__name__)
+
+# Estado de transacción Wompi → Order.payment_status
+PAYMENT_STATUS_MAP = {
+    'PENDING': 'pending',
+    'APPROVED': 'approved',
+    'DECLINED': 'declined',
+    'VOIDED': 'voided',
+    'ERROR': 'error',
+}
+
+# Transiciones válidas de payment_status (un reintento de pago puede
+# aprobar una orden rechazada; una aprobada solo puede anularse).
+ALLOWED_TRANSITIONS = {
+    'pending': {'approved', 'declined', 'voided', 'error'},
+    'declined': {'approved'},
+    'error': {'approved', 'declined'},
+    'approved': {'voided'},
+    'voided': set(),
+}
+
+# Estados en los que una transacción ya no cambia por sí sola
+TERMINAL_PAYMENT_STATUSES = {'approved', 'declined', 'voided', 'error'}
+
+ORDER_PAYMENT_FIELDS = [
+    'wompi_transaction_id', 'payment_status',
+    'payment_method', 'status', 'paid_at',
+]
+
+# payment_status → (motivo para el cliente, título para admin)
+PAYMENT_FAILURES = {
+    'declined': ('pago declinado', 'Pago declinado'),
+    'voided': ('pago anulado', 'Pago anulado'),
+    'error': ('error en el pago', 'Error de pago'),
+}
+
+
+def apply_status(order, wompi_status, *, transaction_id='', payment_method='', now=None):
+    """
+    Aplica un estado Wompi a la orden en memoria (no guarda).
+
+    Retorna ``'applied'``, ``'duplicate'`` (ya estaba en ese estado) o
+    ``'stale'`` (estado desconocido o transición no permitida).
+    """
+    target = PAYMENT_STATUS_MAP.get(wompi_status)
+    if target is None:
+        return 'stale'
+    if target == order.payment_status:
+        return 'duplicate'
+    if target not in ALLOWED_TRANSITIONS.get(order.payment_status, set()):
+        return 'stale'
+
+    order.payment_status = target
+    if transaction_id:
+        order.wompi_transaction_id = transaction_id
+    if payment_method:
+        order.payment_method = payment_method
+    if target == 'approved':
+        order.status = 'confirmed'
+        order.paid_at = now or timezone.now()
+    return 'applied'
+
+
+def notify_payment_failure(order):
+    """Notifica el fallo de pago al cliente y a los administradores."""
+    failure_reason, title = PAYMENT_FAILURES[order.payment_status]
+    try:
+        base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
+        if order.customer_email:
+            retry_url = f"{base}/tienda/" if base else '/tienda/'
+            send_payment_failed(
+                to=order.customer_email,
+                order_number=order.number,
+                payment_method=order.payment_method,
+                retry_url=retry_url,
+                failure_reason=failure_reason,
+            )
+        admin_path = f"/dashboard/ordenes/{order.pk}/"
+        admin_url = f"{base}{admin_path}" if base else admin_path
+        send_admin_notification(
+            title=f"{title} • {order.number}",
+            body=(
+                f"Cliente: {order.customer_name} <{order.customer_email}>\n"
+                f"Método: {order.payment_method or ''}"
+            ),
+            cta_url=admin_url,
+            cta_label='Ver orden',
+            event_type='payment_failed',
+            amount=order.total,
+        )
+    except Exception:
+        logger.exception(f'Error enviando notificaciones de {failure_reason}')
+
+
+def event_from_transaction(reference, tx):
+    """
+    ``PaymentEvent`` (sin guardar) a partir de una transacción consultada a
+    la API, con el timestamp de su finalización (o creación) en segundos.
+    """
+    when = parse_datetime(tx.get('finalized_at') or tx.get('created_at') or '')
+    return PaymentEvent(
+        transaction_id=str(tx.get('id', ''))[:100],
+        status=str(tx.get('status', ''))[:20],
+        event_timestamp=int(when.timestamp()) if when else int(timezone.now().timestamp()),
+        reference=reference[:20],
+        payment_method=str(tx.get('payment_method_type') or '')[:50],
+        payload={'source': 'api', 'transaction': tx},
+    )
+
+
+def _process_reference(reference, stats):
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(number=reference).first()
+        events = list(
+            PaymentEvent.objects.select_for_update()
+            .filter(reference=reference, processed_at__isnull=True)
+            .order_by('event_timestamp', 'pk')
+        )
+        if not events:
+            # Otro worker ya los procesó mientras esperábamos el bloqueo
+            return
+
+        now = timezone.now()
+        if order is None:
+            logger.warning(f'Wompi: orden no encontrada: {reference}')
+            for ev in events:
+                ev.result = 'order_not_found'
+        else:
+            last_ts = PaymentEvent.objects.filter(
+                reference=reference, result='applied',
+            ).aggregate(m=Max('event_timestamp'))['m'] or 0
+            prev_status = order.payment_status
+            for ev in events:
+                if ev.event_timestamp < last_ts:
+                    ev.result = 'stale'
+                    continue
+                ev.result = apply_status(
+                    order, ev.status,
+                    transaction_id=ev.transaction_id,
+                    payment_method=ev.payment_method,
+                    now=now,
+                )
+                if ev.result == 'applied':
+                    last_ts = ev.event_timestamp
+
+            if order.payment_status != prev_status:
+                order.save(update_fields=ORDER_PAYMENT_FIELDS)
+                if order.payment_status in PAYMENT_FAILURES:
+                    transaction.on_commit(lambda: notify_payment_failure(order))
+
+        for ev in events:
+            ev.processed_at = now
+            stats[ev.result] += 1
+        PaymentEvent.objects.bulk_update(events, ['processed_at', 'result'])
+
+
+def process_payment_events(limit=500, references=None):
+    """
+    Aplica los eventos pendientes de hasta ``limit`` órdenes (opcionalmente
+    solo las de ``references``).
+
+    Retorna un ``Counter`` con ``orders`` y un conteo por resultado.
+    """
+    stats = Counter()
+    pending = PaymentEvent.objects.filter(processed_at__isnull=True)
+    if references is not None:
+        pending = pending.filter(reference__in=references)
+    references = list(
+        pending.order_by('reference')
+        .values_list('reference', flat=True)
+        .distinct()[:limit]
+    )
+    for reference in references:
+        _process_reference(reference, stats)
+        stats['orders'] += 1
+    return stats
@@ -0,0 +1,112 @@
+"""
+Catálogo de planes (``Plan``) compartido por la página de planes, el
+checkout, los precios de la orden y el sitemap.
+
+Cada proceso carga los planes activos una sola vez en un índice inmutable
+(``slug`` → ``PlanEntry``). Guardar o borrar un plan cambia la versión
+publicada en la caché compartida (``PLAN_CATALOG_VERSION_KEY``); cada
+proceso compara esa versión (una lectura de caché) y recarga el índice solo
+cuando cambió.
+"""
+import threading
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.core.cache import cache
+
+from .models import Plan
+
+PLAN_CATALOG_VERSION_KEY = 'store:plans:version'
+
+
+@dataclass(frozen=True)
+class PlanEntry:
+    slug: str
+    title: str
+    category: str
+    price: Decimal
+    period: str
+    icon: str
+    image: str
+    description: str
+    features: tuple
+    updated_at: object
+
+
+@dataclass(frozen=True)
+class PlanCatalog:
+    version: str
+    plans: MappingProxyType
+    slugs: frozenset
+
+    def get(self, slug):
+        return self.plans.get(slug)
+
+    def __contains__(self, slug):
+        return slug in self.plans
+
+    def __iter__(self):
+        return iter(self.plans.values())
+
+    def __len__(self):
+        return len(self.plans)
+
+
+_catalog = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(PLAN_CATALOG_VERSION_KEY)
+    if version is None:
+        # Caché vacía o reiniciada: se publica una versión nueva para todos
+        cache.add(PLAN_CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(PLAN_CATALOG_VERSION_KEY, '')
+    return version
+
+
+def _load(version):
+    plans = {}
+    for plan in Plan.objects.filter(is_active=True).order_by('order', 'title'):
+        plans[plan.slug] = PlanEntry(
+            slug=plan.slug,
+            title=plan.title,
+            category=plan.category,
+            price=plan.price,
+            period=plan.period,
+            icon=plan.icon,
+            image=plan.image,
+            description=plan.description,
+            features=tuple(plan.features or ()),
+            updated_at=plan.updated_at,
+        )
+    return PlanCatalog(
+        version=version, plans=MappingProxyType(plans), slugs=frozenset(plans),
+    )
+
+
+def get_catalog():
+    """Catálogo vigente de planes activos."""
+    global _catalog
+    version = _current_version()
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        with _lock:
+            catalog = _catalog
+            if catalog is None or catalog.version != version:
+                catalog = _catalog = _load(version)
+    return catalog
+
+
+def get_plan(slug):
+    """``PlanEntry`` activo para ``slug`` o None."""
+    return get_catalog().get(slug)
+
+
+def invalidate_catalog():
+    """Obliga a todos los procesos a recargar el catálogo."""
+    global _catalog
+    cache.set(PLAN_CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _catalog = None
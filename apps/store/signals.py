@@ -1,8 +1,12 @@
 from decimal import Decimal
-from django.db.models.signals import pre_save, post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
-from .models import Order
+from .customer_orders import link_orders_to_user
+from .inventory import commit_reservations, release_reservations
+from .models import Order, Plan
+from .plans import invalidate_catalog
 from apps.core.emails import (
     send_order_confirmation,
     send_order_shipped,
@@ -29,29 +33,16 @@ def _items_payload(order: Order):
     ]
 
 
-@receiver(pre_save, sender=Order)
-def _store_prev_order_state(sender, instance: Order, **kwargs):
-    if instance.pk:
-        try:
-            prev = Order.objects.get(pk=instance.pk)
-            instance._old_status = prev.status
-            instance._old_payment_status = prev.payment_status
-        except Order.DoesNotExist:
-            instance._old_status = None
-            instance._old_payment_status = None
-    else:
-        instance._old_status = None
-        instance._old_payment_status = None
-
-
 @receiver(post_save, sender=Order)
-def _send_order_emails(sender, instance: Order, created: bool, **kwargs):
+def _send_order_emails(sender, instance: Order, created: bool, update_fields=None, **kwargs):
+    if not instance.saves_tracked(update_fields, "status", "payment_status"):
+        return
     email = (instance.customer_email or "").strip()
     if not email:
         return
 
-    old_status = getattr(instance, "_old_status", None)
-    old_payment = getattr(instance, "_old_payment_status", None)
+    old_status = instance.previous("status")
+    old_payment = instance.previous("payment_status")
 
     try:
         # URL absoluta para dashboard si se configuró SITE_URL
@@ -79,6 +70,7 @@ def _send_order_emails(sender, instance: Order, created: bool, **kwargs):
                 ),
                 cta_url=admin_url,
                 cta_label="Ver orden",
+                event_type="order",
             )
 
         if instance.status == "shipped" and old_status != "shipped":
@@ -91,6 +83,7 @@ def _send_order_emails(sender, instance: Order, created: bool, **kwargs):
                 body=f"Cliente: {instance.customer_name} <{instance.customer_email}>",
                 cta_url=admin_url,
                 cta_label="Ver orden",
+                event_type="order",
             )
 
         if instance.status == "delivered" and old_status != "delivered":
@@ -103,7 +96,46 @@ def _send_order_emails(sender, instance: Order, created: bool, **kwargs):
                 body=f"Cliente: {instance.customer_name} <{instance.customer_email}>",
                 cta_url=admin_url,
                 cta_label="Ver orden",
+                event_type="order",
             )
     except Exception:
         import logging
         logging.getLogger(__name__).exception("Error enviando correos de orden")
+
+
+@receiver(post_save, sender=Order)
+def _sync_stock_reservations(sender, instance: Order, created: bool, update_fields=None, **kwargs):
+    """Confirma o libera el stock reservado cuando cambia el estado de pago."""
+    if created or not instance.saves_tracked(update_fields, "payment_status"):
+        return
+    if not instance.has_changed("payment_status"):
+        return
+    if instance.payment_status == "approved":
+        short = commit_reservations(instance)
+        if short:
+            send_admin_notification(
+                title=f"Orden pagada sin stock suficiente • {instance.number}",
+                body=(
+                    "La reserva de stock venció o se liberó (pago rechazado o con "
+                    "error) antes de aprobarse el pago y ya no "
+                    f"hay unidades de los productos {', '.join(map(str, short))}."
+                ),
+                event_type="order",
+                critical=True,
+            )
+    elif instance.payment_status in ("declined", "voided", "error"):
+        release_reservations(instance)
+
+
+@receiver(post_save, sender=Plan)
+@receiver(post_delete, sender=Plan)
+def _invalidate_plan_catalog(sender, **kwargs):
+    invalidate_catalog()
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def _link_guest_orders(sender, instance, created: bool, **kwargs):
+    """Al registrarse, el usuario recibe las órdenes que hizo como invitado."""
+    if created:
+        link_orders_to_user(instance)
@@ -2,62 +2,30 @@ import json
 import hashlib
 import hmac
 import logging
-import requests
-from decimal import Decimal
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.core.cache import cache
+from django.db import transaction
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 from django.shortcuts import render, get_object_or_404
-from django.utils import timezone
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
 
-from .models import Product, Order, OrderItem
-from apps.core.emails import send_payment_failed, send_admin_notification
+from .checkout import InvalidCartItem, create_order
+from .inventory import InsufficientStock
+from .models import Order, PaymentEvent
+from .payments import ORDER_PAYMENT_FIELDS, TERMINAL_PAYMENT_STATUSES, apply_status
+from .plans import get_catalog
+from .wompi import WompiAPIError, get_client as get_wompi_client
+from apps.core.async_io import run_io
 
 logger = logging.getLogger(__name__)
 
 
-# Slugs de planes digitales (no generan costo de envío)
-DIGITAL_PLAN_SLUGS = {
-    'presencia-web', 'corporativo', 'e-commerce', 'empresarial',
-    'hosting-basico', 'hosting-pro', 'email-profesional', 'cloud-empresarial',
-    'seo-starter', 'social-media', 'google-ads', 'marketing-360',
-    'e-commerce-basico', 'e-commerce-pro', 'e-commerce-avanzado',
-    'marketplace',
-    'instalacion-basica', 'seguridad-backup', 'velocidad-seo',
-    'soporte-mensual',
-}
-
-
-def _get_next_order_number():
-    """Genera el siguiente número de orden secuencial."""
-    last = Order.objects.order_by('-id').first()
-    if last and last.number.startswith('ORD-'):
-        try:
-            num = int(last.number.split('-')[1]) + 1
-        except (ValueError, IndexError):
-            num = 1
-    else:
-        num = 1
-    return f'ORD-{num:05d}'
-
-
-def _wompi_api_base():
-    """Retorna la URL base de la API de Wompi."""
-    if settings.WOMPI_SANDBOX:
-        return 'https://sandbox.wompi.co/v1'
-    return 'https://production.wompi.co/v1'
-
-
 def _get_acceptance_token():
-    """Obtiene el acceptance token de Wompi (merchants endpoint)."""
-    url = f'{_wompi_api_base()}/merchants/{settings.WOMPI_PUBLIC_KEY}'
+    """Obtiene el acceptance token de Wompi (cacheado por WompiClient)."""
     try:
-        resp = requests.get(url, timeout=10)
-        data = resp.json()
-        return data['data']['presigned_acceptance']['acceptance_token']
-    except Exception:
+        return get_wompi_client().get_acceptance_token()
+    except WompiAPIError:
         logger.exception('Error obteniendo acceptance token de Wompi')
         return ''
 
@@ -85,12 +53,9 @@ def _verify_wompi_signature(event_body, signature_header):
 
 def _verify_transaction(transaction_id):
     """Verifica una transacción directamente con la API de Wompi."""
-    url = f'{_wompi_api_base()}/transactions/{transaction_id}'
     try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            return resp.json().get('data', {})
-    except Exception:
+        return get_wompi_client().get_transaction(transaction_id)
+    except WompiAPIError:
         logger.exception('Error verificando transacción Wompi')
     return None
 
@@ -132,61 +97,26 @@ def checkout(request):
                 status=400
             )
 
-        # Determine if all items are digital plans
-        all_digital = True
-        for it in cart_items:
-            slug_val = str(it.get('id', '')).strip()
-            if slug_val not in DIGITAL_PLAN_SLUGS:
-                all_digital = False
-                break
-
-        # Create order
-        order = Order(
-            number=_get_next_order_number(),
-            customer_name=name,
-            customer_email=email,
-            customer_phone=phone,
-            customer_address=address,
-            customer_country=country,
-            customer_state=state,
-            customer_city=city,
-            customer_doc_type=doc_type,
-            customer_document=document,
-            status='pending',
-            payment_status='pending',
-            shipping_cost=Decimal('0') if all_digital else Decimal('12000'),
-        )
-        if request.user.is_authenticated:
-            order.created_by = request.user
-        order.save()
-
-        # Create order items
-        subtotal = Decimal('0')
-        for item in cart_items:
-            slug = item.get('id', '')
-            qty = int(item.get('qty', 1))
-            product = Product.objects.filter(
-                slug=slug, is_active=True
-            ).first()
-            if product:
-                line_price = product.price
-                item_name = product.name
-            else:
-                line_price = Decimal(str(item.get('price', 0)))
-                item_name = item.get('name', 'Producto')
-
-            oi = OrderItem.objects.create(
-                order=order,
-                product=product,
-                description=item_name,
-                quantity=qty,
-                unit_price=line_price,
+        try:
+            order = create_order(
+                {
+                    'name': name, 'email': email, 'phone': phone,
+                    'address': address, 'country': country, 'state': state,
+                    'city': city, 'doc_type': doc_type, 'document': document,
+                },
+                cart_items,
+                user=request.user if request.user.is_authenticated else None,
+            )
+        except InvalidCartItem as exc:
+            return JsonResponse(
+                {'error': f'"{exc.name}" no está disponible'},
+                status=400,
+            )
+        except InsufficientStock as exc:
+            return JsonResponse(
+                {'error': f'No hay stock suficiente de "{exc.name}"'},
+                status=409,
             )
-            subtotal += oi.subtotal
-
-        order.subtotal = subtotal
-        order.total = subtotal + order.shipping_cost - order.discount
-        order.save(update_fields=['subtotal', 'total'])
 
         # Wompi amount in cents (COP)
         amount_cents = int(order.total * 100)
@@ -207,8 +137,9 @@ def checkout(request):
         })
 
     # GET — render checkout page
-    from apps.accounts.models import Country, UserAddress
-    countries = Country.objects.all()
+    from apps.accounts.geo import get_index as get_geo_index
+    from apps.accounts.models import UserAddress
+    countries = get_geo_index().countries
     iso_map = {c.pk: c.iso2 for c in countries}
 
     # Pre-fill data for authenticated users
@@ -237,57 +168,74 @@ def checkout(request):
         'countries': countries,
         'iso_map': iso_map,
         'prefill': prefill,
-        'digital_plan_slugs': sorted(list(DIGITAL_PLAN_SLUGS)),
+        'digital_plan_slugs': sorted(get_catalog().slugs),
     })
 
 
-def checkout_result(request):
+def _cached_transaction(transaction_id):
+    """
+    Estado de la transacción con caché corta (``WOMPI_TX_CACHE_TTL``), para
+    que recargar la página de resultado no consulte Wompi en cada petición.
+    """
+    key = f'wompi:tx:{transaction_id}'
+    tx_data = cache.get(key)
+    if tx_data is None:
+        tx_data = _verify_transaction(transaction_id)
+        if tx_data:
+            tx_data = {
+                'status': tx_data.get('status', ''),
+                'payment_method_type': tx_data.get('payment_method_type', ''),
+            }
+            cache.set(key, tx_data, getattr(settings, 'WOMPI_TX_CACHE_TTL', 15))
+    return tx_data
+
+
+def _apply_checkout_result(order, transaction_id, tx_data):
+    """Guarda el estado solo si cambia, con la orden bloqueada."""
+    kwargs = {
+        'transaction_id': transaction_id,
+        'payment_method': tx_data.get('payment_method_type', ''),
+    }
+    if apply_status(order, tx_data.get('status', ''), **kwargs) != 'applied':
+        return order
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order.pk)
+        if apply_status(order, tx_data.get('status', ''), **kwargs) == 'applied':
+            order.save(update_fields=ORDER_PAYMENT_FIELDS)
+    return order
+
+
+async def checkout_result(request):
     """
     Página de resultado post-pago. Wompi redirige aquí.
     Verifica el estado de la transacción con la API de Wompi.
+
+    Si la orden ya está en un estado final para esa transacción no se
+    consulta Wompi; si no, se usa el estado cacheado unos segundos y la
+    orden solo se escribe cuando el estado cambia.
+
+    Vista async: la consulta a Wompi espera en el pool de I/O y el ORM y el
+    render se ejecutan con ``sync_to_async``.
     """
     ref = request.GET.get('ref', '')
     transaction_id = request.GET.get('id', '')
 
-    order = get_object_or_404(Order, number=ref)
-
-    status_display = 'pending'
-    tx_data = None
+    order = await sync_to_async(get_object_or_404)(Order, number=ref)
 
-    if transaction_id:
-        tx_data = _verify_transaction(transaction_id)
+    settled = (
+        order.payment_status in TERMINAL_PAYMENT_STATUSES
+        and order.wompi_transaction_id == transaction_id
+    )
+    if transaction_id and not settled:
+        tx_data = await run_io(_cached_transaction, transaction_id)
         if tx_data:
-            wompi_status = tx_data.get('status', '')
-            order.wompi_transaction_id = transaction_id
-            order.payment_method = tx_data.get(
-                'payment_method_type', ''
+            order = await sync_to_async(_apply_checkout_result)(
+                order, transaction_id, tx_data,
             )
 
-            if wompi_status == 'APPROVED':
-                order.payment_status = 'approved'
-                order.status = 'confirmed'
-                order.paid_at = timezone.now()
-                status_display = 'approved'
-            elif wompi_status == 'DECLINED':
-                order.payment_status = 'declined'
-                status_display = 'declined'
-            elif wompi_status == 'VOIDED':
-                order.payment_status = 'voided'
-                status_display = 'voided'
-            elif wompi_status == 'ERROR':
-                order.payment_status = 'error'
-                status_display = 'error'
-            else:
-                status_display = 'pending'
-
-            order.save(update_fields=[
-                'wompi_transaction_id', 'payment_status',
-                'payment_method', 'status', 'paid_at',
-            ])
-
-    return render(request, 'core/checkout_result.html', {
+    return await sync_to_async(render)(request, 'core/checkout_result.html', {
         'order': order,
-        'status': status_display,
+        'status': order.payment_status,
         'transaction_id': transaction_id,
     })
 
@@ -296,13 +244,17 @@ def checkout_result(request):
 # WEBHOOK WOMPI
 # ═══════════════════════════════════════════════════════════════
 
-@csrf_exempt
-@require_POST
-def wompi_webhook(request):
+async def wompi_webhook(request):
     """
     Recibe eventos de Wompi (transaction.updated).
-    Verifica firma y actualiza la orden correspondiente.
+
+    Verifica la firma, registra el evento en ``PaymentEvent`` y responde de
+    inmediato; ``process_payment_events`` lo aplica a la orden. Los
+    reintentos de Wompi del mismo evento no se registran dos veces.
     """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
     try:
         body = json.loads(request.body)
     except json.JSONDecodeError:
@@ -328,101 +280,28 @@ def wompi_webhook(request):
         return JsonResponse({'status': 'no reference'})
 
     try:
-        order = Order.objects.get(number=tx_reference)
-    except Order.DoesNotExist:
-        logger.warning(f'Wompi webhook: orden no encontrada: {tx_reference}')
-        return JsonResponse({'status': 'order not found'}, status=404)
-
-    order.wompi_transaction_id = tx_id
-    order.payment_method = tx_method
-
-    if tx_status == 'APPROVED':
-        order.payment_status = 'approved'
-        order.status = 'confirmed'
-        order.paid_at = timezone.now()
-    elif tx_status == 'DECLINED':
-        order.payment_status = 'declined'
-        # Notificar fallo de pago al cliente y admin
-        try:
-            if order.customer_email:
-                base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
-                retry_url = f"{base}/tienda/" if base else '/tienda/'
-                send_payment_failed(
-                    to=order.customer_email,
-                    order_number=order.number,
-                    payment_method=order.payment_method,
-                    retry_url=retry_url,
-                    failure_reason='pago declinado',
-                )
-            base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
-            admin_path = f"/dashboard/ordenes/{order.pk}/"
-            admin_url = f"{base}{admin_path}" if base else admin_path
-            send_admin_notification(
-                title=f"Pago declinado • {order.number}",
-                body=(
-                    f"Cliente: {order.customer_name} <{order.customer_email}>\n"
-                    f"Método: {order.payment_method or ''}"
-                ),
-                cta_url=admin_url,
-                cta_label='Ver orden',
-            )
-        except Exception:
-            logger.exception('Error enviando notificaciones de pago declinado')
-    elif tx_status == 'VOIDED':
-        order.payment_status = 'voided'
-        try:
-            if order.customer_email:
-                base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
-                retry_url = f"{base}/tienda/" if base else '/tienda/'
-                send_payment_failed(
-                    to=order.customer_email,
-                    order_number=order.number,
-                    payment_method=order.payment_method,
-                    retry_url=retry_url,
-                    failure_reason='pago anulado',
-                )
-            base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
-            admin_path = f"/dashboard/ordenes/{order.pk}/"
-            admin_url = f"{base}{admin_path}" if base else admin_path
-            send_admin_notification(
-                title=f"Pago anulado • {order.number}",
-                body=f"Cliente: {order.customer_name} <{order.customer_email}>",
-                cta_url=admin_url,
-                cta_label='Ver orden',
-            )
-        except Exception:
-            logger.exception('Error enviando notificaciones de pago anulado')
-    elif tx_status == 'ERROR':
-        order.payment_status = 'error'
-        try:
-            if order.customer_email:
-                base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
-                retry_url = f"{base}/tienda/" if base else '/tienda/'
-                send_payment_failed(
-                    to=order.customer_email,
-                    order_number=order.number,
-                    payment_method=order.payment_method,
-                    retry_url=retry_url,
-                    failure_reason='error en el pago',
-                )
-            base = (getattr(settings, 'SITE_URL', '') or '').rstrip('/')
-            admin_path = f"/dashboard/ordenes/{order.pk}/"
-            admin_url = f"{base}{admin_path}" if base else admin_path
-            send_admin_notification(
-                title=f"Error de pago • {order.number}",
-                body=f"Cliente: {order.customer_name} <{order.customer_email}>",
-                cta_url=admin_url,
-                cta_label='Ver orden',
-            )
-        except Exception:
-            logger.exception('Error enviando notificaciones de error de pago')
-
-    order.save(update_fields=[
-        'wompi_transaction_id', 'payment_status',
-        'payment_method', 'status', 'paid_at',
-    ])
+        event_ts = int(body.get('timestamp') or 0)
+    except (TypeError, ValueError):
+        event_ts = 0
+
+    _event, created = await PaymentEvent.objects.aget_or_create(
+        transaction_id=tx_id[:100],
+        status=tx_status[:20],
+        event_timestamp=event_ts,
+        defaults={
+            'reference': tx_reference[:20],
+            'payment_method': tx_method[:50],
+            'payload': body,
+        },
+    )
 
     logger.info(
         f'Wompi webhook: orden {tx_reference} → {tx_status}'
+        f'{"" if created else " (duplicado)"}'
     )
-    return JsonResponse({'status': 'ok'})
+    return JsonResponse({'status': 'ok' if created else 'duplicate'})
+
+
+# En Django 4.2 csrf_exempt/require_POST envuelven la vista con una función
+# sync; para la vista async se marca la exención directamente.
+wompi_webhook.csrf_exempt = True
@@ -0,0 +1,205 @@
+"""
+Cliente HTTP para la API de Wompi.
+
+- Una sola ``requests.Session`` por proceso, con pool de conexiones y
+  reintentos (``Retry``) ante errores de red y respuestas 429/5xx.
+- El acceptance token del comercio se guarda en la caché compartida
+  (``WOMPI_ACCEPTANCE_TOKEN_TTL`` segundos) y se refresca en single-flight:
+  un solo hilo/proceso lo pide a Wompi mientras los demás esperan el valor.
+- Cada llamada registra su latencia por endpoint (ver ``metrics()``).
+"""
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TOKEN_TTL = 3600
+
+TOKEN_CACHE_KEY = "wompi:acceptance_token:{}"
+
+
+class WompiAPIError(Exception):
+    """Error de integración con la API de Wompi."""
+
+
+def api_base():
+    """URL base de la API (``WOMPI_API_BASE`` permite apuntar a un servidor local)."""
+    base = getattr(settings, "WOMPI_API_BASE", "")
+    if base:
+        return base.rstrip("/")
+    if settings.WOMPI_SANDBOX:
+        return "https://sandbox.wompi.co/v1"
+    return "https://production.wompi.co/v1"
+
+
+class WompiClient:
+    """Cliente de la API pública de Wompi (merchants y transactions)."""
+
+    def __init__(self, base_url=None, timeout=None, retries=None, pool_size=None):
+        self._base_url = base_url
+        self.timeout = timeout or getattr(settings, "WOMPI_TIMEOUT", DEFAULT_TIMEOUT)
+        if retries is None:
+            retries = getattr(settings, "WOMPI_RETRIES", DEFAULT_RETRIES)
+        pool_size = pool_size or getattr(settings, "WOMPI_POOL_SIZE", DEFAULT_POOL_SIZE)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/json"
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._token_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}
+
+    @property
+    def base_url(self):
+        return (self._base_url or api_base()).rstrip("/")
+
+    def _record(self, endpoint, elapsed_ms, ok):
+        with self._metrics_lock:
+            m = self._metrics.setdefault(
+                endpoint, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            m["calls"] += 1
+            m["errors"] += 0 if ok else 1
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+        logger.debug("Wompi %s: %.1f ms%s", endpoint, elapsed_ms, "" if ok else " (error)")
+
+    def _get(self, endpoint, path, params=None, headers=None):
+        """GET a la API; retorna ``(status_code, json)`` y registra la latencia."""
+        url = f"{self.base_url}{path}"
+        start = time.perf_counter()
+        ok = False
+        try:
+            resp = self.session.get(
+                url, params=params, headers=headers, timeout=self.timeout,
+            )
+            data = resp.json() if resp.content else {}
+            ok = resp.status_code < 500
+            return resp.status_code, data
+        except requests.RequestException as exc:
+            raise WompiAPIError(f"No se pudo conectar con Wompi: {exc}") from exc
+        except ValueError as exc:
+            raise WompiAPIError("Respuesta inválida de Wompi") from exc
+        finally:
+            self._record(endpoint, (time.perf_counter() - start) * 1000, ok)
+
+    def get_transaction(self, transaction_id):
+        """Datos de la transacción (``data``) o None si Wompi no la encuentra."""
+        status, data = self._get("transactions", f"/transactions/{transaction_id}")
+        if status == 200:
+            return data.get("data", {})
+        if status == 404:
+            return None
+        raise WompiAPIError(f"HTTP {status} consultando la transacción {transaction_id}")
+
+    def find_transaction_by_reference(self, reference):
+        """
+        Última transacción de una referencia (número de orden) o None.
+
+        Requiere ``WOMPI_PRIVATE_KEY``; sin ella retorna None.
+        """
+        private_key = getattr(settings, "WOMPI_PRIVATE_KEY", "")
+        if not private_key:
+            return None
+        status, data = self._get(
+            "transactions_by_reference", "/transactions",
+            params={"reference": reference},
+            headers={"Authorization": f"Bearer {private_key}"},
+        )
+        if status != 200:
+            raise WompiAPIError(f"HTTP {status} buscando transacciones de {reference}")
+        transactions = data.get("data") or []
+        if not transactions:
+            return None
+        return max(transactions, key=lambda tx: tx.get("created_at") or "")
+
+    def _fetch_acceptance_token(self, public_key):
+        status, data = self._get("merchants", f"/merchants/{public_key}")
+        try:
+            return data["data"]["presigned_acceptance"]["acceptance_token"]
+        except (KeyError, TypeError) as exc:
+            raise WompiAPIError(f"HTTP {status}: acceptance token no disponible") from exc
+
+    def get_acceptance_token(self):
+        """Acceptance token del comercio, cacheado y refrescado en single-flight."""
+        public_key = settings.WOMPI_PUBLIC_KEY
+        key = TOKEN_CACHE_KEY.format(public_key)
+        token = cache.get(key)
+        if token:
+            return token
+
+        with self._token_lock:
+            token = cache.get(key)
+            if token:
+                return token
+
+            lock_key = f"{key}:lock"
+            if not cache.add(lock_key, 1, timeout=int(self.timeout) + 5):
+                # Otro proceso ya lo está pidiendo: esperar a que lo publique
+                deadline = time.monotonic() + self.timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    token = cache.get(key)
+                    if token:
+                        return token
+                token = self._fetch_acceptance_token(public_key)
+            else:
+                try:
+                    token = self._fetch_acceptance_token(public_key)
+                finally:
+                    cache.delete(lock_key)
+
+            ttl = getattr(settings, "WOMPI_ACCEPTANCE_TOKEN_TTL", DEFAULT_TOKEN_TTL)
+            cache.set(key, token, ttl)
+            return token
+
+    def metrics(self):
+        """Resumen de latencia por endpoint: llamadas, errores, promedio y máximo (ms)."""
+        with self._metrics_lock:
+            return {
+                endpoint: {
+                    **m,
+                    "avg_ms": m["total_ms"] / m["calls"] if m["calls"] else 0.0,
+                }
+                for endpoint, m in self._metrics.items()
+            }
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Cliente compartido por el proceso (una sola sesión y pool de conexiones)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WompiClient()
+    return _client
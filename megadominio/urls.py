@@ -17,14 +17,16 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from django.contrib.sitemaps.views import sitemap
+from django.contrib.sitemaps import views as sitemap_views
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 from apps.core.auth_views import SecureLoginView
+from apps.core.captcha_pool import captcha_image_view
 from apps.core.signup_view import signup
 from apps.core.sitemaps import (
-    StaticViewSitemap, ServiceSitemap, ProductSitemap
+    StaticViewSitemap, ServiceSitemap, ProductSitemap, PlanSitemap,
+    cache_sitemap,
 )
 from apps.store.views import wompi_webhook
 
@@ -32,11 +34,15 @@ sitemaps = {
     'static': StaticViewSitemap,
     'services': ServiceSitemap,
     'products': ProductSitemap,
+    'plans': PlanSitemap,
 }
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps},
+    path('sitemap.xml', cache_sitemap(sitemap_views.index),
+         {'sitemaps': sitemaps}, name='sitemap_index'),
+    path('sitemap-<section>.xml', cache_sitemap(sitemap_views.sitemap),
+         {'sitemaps': sitemaps},
          name='django.contrib.sitemaps.views.sitemap'),
     path('robots.txt', TemplateView.as_view(
         template_name='robots.txt',
@@ -44,6 +50,7 @@ urlpatterns = [
     ), name='robots_txt'),
     path('', include('apps.store.urls')),
     path('', include('apps.core.urls')),
+    path('captcha/pool/<str:key>/', captcha_image_view, name='captcha-pool-image'),
     path('captcha/', include('captcha.urls')),
     path('webhooks/wompi/', wompi_webhook, name='wompi_webhook'),
     path('accounts/registro/', signup, name='signup'),